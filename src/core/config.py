@@ -10,5 +10,12 @@ class DocumentationSettings(config.Settings):
     ROUTER_URL: str
     SPECKLE_TOKEN: str
 
+    # Commit history
+    COMMIT_CHECKPOINT_INTERVAL: int = 100
+    COMMIT_CHECKPOINT_SIZE: int = 10_000
+    COMMIT_CONFLICT_RETRIES: int = 3
+    COMMIT_SQUASH_WINDOW_DAYS: int = 1
+    COMMIT_COALESCE_WINDOW_SECONDS: int = 0
+
 
 settings = DocumentationSettings()
@@ -1,5 +1,6 @@
 import httpx
 import strawberry
+from graphql import GraphQLResolveInfo, GraphQLUnionType
 from lcacollect_config.context import get_token
 from strawberry.types import Info
 
@@ -58,3 +59,24 @@ async def get_members(project_id: str, token: str) -> list[GraphQLProjectMember]
         )
 
     return members
+
+
+def resolve_entity_types(schema: strawberry.federation.Schema):
+    """
+    Lets the `_Entity` union of a federation schema resolve database items to their entity type,
+    through the `is_type_of` of the entity types, so `resolve_reference` can return items like the other resolvers.
+    Values that are instances of a GraphQL type are still resolved by the union itself.
+    """
+
+    entity_type = schema._schema.get_type("_Entity")
+    if entity_type is None:
+        return
+    resolve_type = entity_type.resolve_type
+
+    def resolve_entity_type(value, info: GraphQLResolveInfo, union: GraphQLUnionType) -> str:
+        for type_ in union.types:
+            if type_.is_type_of is not None and type_.is_type_of(value, info):
+                return type_.name
+        return resolve_type(value, info, union)
+
+    entity_type.resolve_type = resolve_entity_type
@@ -0,0 +1,149 @@
+from functools import partial
+from typing import Mapping, Optional, Sequence, Type
+
+from graphql import GraphQLResolveInfo
+from lcacollect_config.context import get_session
+from sqlalchemy import inspect
+from sqlalchemy.orm import defer, joinedload, selectinload
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from strawberry.dataloader import DataLoader
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField, Selection, convert_selections
+from strawberry.utils.str_converters import to_snake_case
+
+
+def graphql_options(
+    info: Info,
+    query,
+    model: Type[SQLModel],
+    path: Sequence[str] = (),
+    deferred: Optional[Mapping[str, set[str]]] = None,
+):
+    """
+    Eager loads the relationships of a model that are selected in the request provided in the info, to any depth.
+    Collections are "select IN" loaded and single related items are joined, so nothing is lazy loaded later on.
+
+    Args:
+        info (Info): request information
+        query: current query provided
+        model: model selected by the query
+        path: names of the fields leading from the resolved field to the model, e.g. `["schemaElements"]`
+            when the model is returned inside a mutation payload
+        deferred: columns of the model left out of the query, unless one of the fields needing them is selected.
+            Only for queries whose items are not used beyond the response, as a deferred column can not be loaded later
+
+    Returns: updated query
+    """
+
+    fields = list(info.selected_fields)
+    for name in path:
+        fields = [field for field in selected_fields(fields) if field.name == name]
+
+    if options := field_options(model, selected_fields(fields), deferred):
+        query = query.options(*options)
+    return query
+
+
+def field_options(
+    model: Type[SQLModel], fields: list[SelectedField], deferred: Optional[Mapping[str, set[str]]] = None
+) -> list:
+    """Returns loader options for the model with the given fields selected of it, see `graphql_options`"""
+
+    options = loader_options(model, fields)
+
+    names = {field.name for field in fields}
+    for column, needed_by in (deferred or {}).items():
+        if not names & needed_by:
+            options.append(defer(getattr(model, column)))
+    return options
+
+
+def loader_options(model: Type[SQLModel], fields: list[SelectedField]) -> list:
+    """Returns loader options for the relationships of the model among the fields and for their selections in turn"""
+
+    relationships = inspect(model).relationships
+    options = []
+    for field in fields:
+        relationship = relationships.get(to_snake_case(field.name))
+        if relationship is None:
+            continue
+
+        attribute = getattr(model, relationship.key)
+        option = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+        if nested := loader_options(relationship.mapper.class_, selected_fields([field])):
+            option = option.options(*nested)
+        options.append(option)
+
+    return options
+
+
+def nested_fields(selections: list[Selection], name: str) -> list[SelectedField]:
+    """Returns the fields with the given name selected at any depth below the given fields, but not below each other"""
+
+    fields = []
+    for field in selected_fields(selections):
+        if field.name == name:
+            fields.append(field)
+        else:
+            fields.extend(nested_fields([field], name))
+    return fields
+
+
+def selected_fields(selections: list[Selection], type_name: Optional[str] = None) -> list[SelectedField]:
+    """
+    Returns the fields selected below the given fields, with the fields of fragments spread into them.
+    With a type name, fragments on other types are left out.
+    """
+
+    fields = []
+    for selection in selections:
+        for child in selection.selections:
+            if isinstance(child, SelectedField):
+                fields.append(child)
+            elif type_name is None or child.type_condition in (None, type_name):
+                fields.extend(selected_fields([child], type_name))
+    return fields
+
+
+def get_loader(info: Info, model: Type[SQLModel]) -> DataLoader:
+    """
+    Returns a DataLoader of items of the model by their id, scoped to the request provided in the info.
+    Ids loaded while resolving the same level of the result are fetched together in a single IN query.
+    """
+
+    loaders = info.context.setdefault("loaders", {})
+    if model not in loaders:
+        loaders[model] = DataLoader(load_fn=partial(load_by_ids, get_session(info), model))
+    return loaders[model]
+
+
+def get_entity_loader(info: GraphQLResolveInfo, model: Type[SQLModel], type_name: str) -> DataLoader:
+    """
+    Returns a DataLoader resolving the references to a federation entity in an `_entities` request, by their id.
+    All references to the entity in the request are fetched in a single IN query,
+    eager loading the relationships selected on the entity.
+
+    Args:
+        info: information of the `_entities` field, as given to `resolve_reference`
+        model: model of the entity
+        type_name: name of the GraphQL type of the entity
+    """
+
+    loaders = info.context.setdefault("loaders", {})
+    if type_name not in loaders:
+        fields = selected_fields(convert_selections(info, info.field_nodes), type_name)
+        loaders[type_name] = DataLoader(
+            load_fn=partial(load_by_ids, get_session(info), model, options=loader_options(model, fields))
+        )
+    return loaders[type_name]
+
+
+async def load_by_ids(
+    session: AsyncSession, model: Type[SQLModel], ids: list[str], options: Sequence = ()
+) -> list[Optional[SQLModel]]:
+    """Loads the items with the given ids in one query, in the order of the ids and with None for missing items"""
+
+    query = select(model).where(col(model.id).in_(ids)).options(*options)
+    items = {item.id: item for item in (await session.exec(query)).all()}
+    return [items.get(id) for id in ids]
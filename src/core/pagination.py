@@ -0,0 +1,171 @@
+import base64
+import json
+from typing import Any, Callable, Optional, Type
+
+import strawberry
+from lcacollect_config.graphql import pagination
+from lcacollect_config.graphql.input_filters import BaseFilter, SortOptions
+from lcacollect_config.graphql.pagination import Edge, GenericType, PageInfo
+from sqlalchemy import and_, cast, func, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql.expression import ColumnElement
+from sqlmodel import SQLModel, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from exceptions import PaginationError
+
+# number of items in a page, when not given
+PAGE_SIZE = 100
+# fields leading from a connection to the items of the page
+PAGE_PATH = ("edges", "node")
+
+# expression to order by and whether it is descending
+SortKey = tuple[ColumnElement, bool]
+
+
+@strawberry.type
+class Connection(pagination.Connection[GenericType]):
+    """A page of a list, with the number of items in the whole list"""
+
+    total_count: int
+
+
+async def paginate(
+    session: AsyncSession,
+    query,
+    model: Type[SQLModel],
+    first: int,
+    after: Optional[str] = None,
+    node: Callable[[Any], Any] = lambda row: row,
+    keys: Optional[list[SortKey]] = None,
+) -> Connection:
+    """
+    Returns a page of the results of a query, starting after the item the cursor points to.
+    Pages are keyed on the sort keys of the items, so fetching a page never scans the pages before it.
+
+    Args:
+        session: database session
+        query: query selecting the model, with all filters applied
+        model: model the items are keyed on
+        first: number of items in the page
+        after: cursor of the item the page starts after
+        node: converts a row of the query into an item of the page
+        keys: keys to order the items by, see `sort_keys`. Ordered by id when not given
+
+    Returns: page of the results
+    """
+
+    if first < 0:
+        raise PaginationError("first must be a positive number")
+
+    count_query = select(func.count()).select_from(query.subquery()).execution_options(**query.get_execution_options())
+    total_count = (await session.execute(count_query)).scalar()
+
+    keys = keys or sort_keys(model)
+    page = order_query(query, keys)
+    if after:
+        page = seek(page, query, model, keys, decode_cursor(after))
+    rows = (await session.exec(page.limit(first + 1))).all()
+
+    edges = []
+    for row in rows[:first]:
+        item = node(row)
+        edges.append(Edge(node=item, cursor=encode_cursor(item.id)))
+
+    return Connection(
+        page_info=PageInfo(
+            has_next_page=len(rows) > first,
+            has_previous_page=after is not None,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+        edges=edges,
+        num_edges=len(edges),
+        total_count=total_count,
+    )
+
+
+def sort_keys(
+    model: Type[SQLModel], sort_by: Optional[BaseFilter] = None, content: Optional[ColumnElement] = None
+) -> list[SortKey]:
+    """
+    Returns the keys to order the items of a model by, in the order of the fields of a sort input.
+    The id is always the last key, so items with equal values still have a fixed order.
+
+    Args:
+        model: model of the items
+        sort_by: sort input with the fields to sort on
+        content: JSON column with the versioned content of the items, sorted on instead of their current values
+    """
+
+    keys = []
+    for key in sort_by.keys() if sort_by else []:
+        expression = col(getattr(model, key))
+        if content is not None:
+            expression = func.nullif(
+                func.coalesce(content[key], func.to_jsonb(expression)), cast(literal("null"), JSONB)
+            )
+        keys.append((expression, getattr(sort_by, key) == SortOptions.DSC))
+    keys.append((col(model.id), False))
+    return keys
+
+
+def order_query(query, keys: list[SortKey]):
+    """Orders a query by the sort keys. Empty values come last, as in the default order of an index"""
+
+    return query.order_by(
+        *[
+            expression.desc().nulls_first() if descending else expression.asc().nulls_last()
+            for expression, descending in keys
+        ]
+    )
+
+
+def seek(query, base_query, model: Type[SQLModel], keys: list[SortKey], id: str):
+    """
+    Filters an ordered query to the items coming after the item with the given id.
+    The values of the item are looked up with the base query, so they are never sent to the client.
+    """
+
+    values = [
+        base_query.with_only_columns(expression).where(col(model.id) == id).correlate(None).scalar_subquery()
+        for expression, _ in keys
+    ]
+
+    # a row comparison can be answered by an index, when all keys are ordered alike and can not be empty
+    if len({descending for _, descending in keys}) == 1 and not any(nullable(expression) for expression, _ in keys):
+        row, cursor = tuple_(*[expression for expression, _ in keys]), tuple_(*values)
+        return query.where(row < cursor if keys[0][1] else row > cursor)
+
+    after = []
+    for index, (expression, descending) in enumerate(keys):
+        value = values[index]
+        if descending:
+            beyond = or_(expression < value, and_(expression.is_not(None), value.is_(None)))
+        else:
+            beyond = or_(expression > value, and_(expression.is_(None), value.is_not(None)))
+        equal = [key.is_not_distinct_from(values[previous]) for previous, (key, _) in enumerate(keys[:index])]
+        after.append(and_(*equal, beyond))
+    return query.where(or_(*after))
+
+
+def nullable(expression: ColumnElement) -> bool:
+    """Whether an expression can be empty, true for anything but a column that is not nullable"""
+
+    return getattr(getattr(expression, "expression", expression), "nullable", True)
+
+
+def encode_cursor(id: str) -> str:
+    """Opaque cursor pointing at an item"""
+
+    return base64.urlsafe_b64encode(json.dumps([id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    """Returns the id of the item a cursor points at"""
+
+    try:
+        (id,) = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        raise PaginationError(f"Invalid cursor: {cursor}")
+    return id
@@ -12,3 +12,19 @@ class MicroServiceResponseError(Exception):
 
 class SourceElementCreationError(Exception):
     pass
+
+
+class ChangesetError(Exception):
+    pass
+
+
+class CommitConflictError(Exception):
+    extensions = {"code": "COMMIT_CONFLICT"}
+
+
+class BranchError(Exception):
+    pass
+
+
+class PaginationError(ValueError):
+    pass
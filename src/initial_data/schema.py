@@ -111,20 +111,17 @@ async def create_elements():
             await session.exec(
                 select(Repository)
                 .where(Repository.id == "4c6854c7-c1a3-41e7-bf5c-d7a6b7aff04b")
-                .options(
-                    selectinload(Repository.commits)
-                    .options(selectinload(Commit.tasks))
-                    .options(selectinload(Commit.schema_elements))
-                    .options(selectinload(Commit.schema_categories))
-                )
+                .options(selectinload(Repository.head))
             )
         ).one()
 
         i = 0
         commit = Commit.copy_from_parent(
-            await session.get(Commit, repo.head.id),
+            repo.head,
             author_id="60067d80-3bd0-42b7-8b17-2b9c0c8aaff3",
         )
+        repo.head_commit_id = commit.id
+        session.add(repo)
         for category in categories:
             for _ in range(3):
                 element = SchemaElement(
@@ -135,9 +132,10 @@ async def create_elements():
                     description=f"This is my wall {i}",
                 )
                 session.add(element)
-                commit.schema_elements.append(element)
+                commit.changed_schema_elements.append(element)
                 i += 1
         session.add(commit)
+        await commit.write_versions(session)
         await session.commit()
 
 
@@ -170,6 +168,7 @@ async def assign_reporting():
         )
         commit = Commit(author_id="60067d80-3bd0-42b7-8b17-2b9c0c8aaff3")
         repository.commits.append(commit)
+        repository.head_commit_id = commit.id
 
         path_map = {}
         categories = []
@@ -188,12 +187,13 @@ async def assign_reporting():
             session.add(category)
 
         reporting_schema.categories = categories
-        commit.schema_categories = categories
+        commit.changed_schema_categories = categories
 
         session.add(commit)
         session.add(reporting_schema)
         session.add(repository)
 
+        await commit.write_versions(session)
         await session.commit()
         await session.refresh(reporting_schema)
         await session.refresh(repository)
@@ -40,18 +40,15 @@ async def load_task(path: Path):
             await session.exec(
                 select(Repository)
                 .where(Repository.id == "4c6854c7-c1a3-41e7-bf5c-d7a6b7aff04b")
-                .options(
-                    selectinload(Repository.commits)
-                    .options(selectinload(Commit.tasks))
-                    .options(selectinload(Commit.schema_elements))
-                    .options(selectinload(Commit.schema_categories))
-                )
+                .options(selectinload(Repository.head))
             )
         ).one()
         commit = Commit.copy_from_parent(
-            await session.get(Commit, repo.head.id),
+            repo.head,
             author_id="60067d80-3bd0-42b7-8b17-2b9c0c8aaff3",
         )
+        repo.head_commit_id = commit.id
+        session.add(repo)
         for task_data in data:
             task = await session.get(Task, task_data.get("id"))
             if not task:
@@ -67,11 +64,12 @@ async def load_task(path: Path):
                     task_data.update(element_id=element.id)
                 task = Task(**task_data)
                 session.add(task)
-                commit.tasks.append(task)
+                commit.changed_tasks.append(task)
                 await session.commit()
                 await session.refresh(task)
             tasks.append(task)
         session.add(commit)
+        await commit.write_versions(session)
         await session.commit()
     return tasks
 
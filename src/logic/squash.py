@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from lcacollect_config.connection import create_postgres_engine
+from sqlalchemy import case, delete, func, literal, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.branch import Branch
+from models.commit import MEMBER_COLUMNS, Commit
+from models.repository import Repository
+from models.tag import Tag
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SquashReport:
+    """Runs of commits of a repository that are, or would be, squashed into the last commit of each run"""
+
+    repository_id: str
+    runs: list[list[str]] = field(default_factory=list)
+
+    @property
+    def squashed_commits(self) -> int:
+        return sum(len(run) - 1 for run in self.runs)
+
+
+async def squash_repositories(
+    dry_run: bool = False, window: Optional[datetime.timedelta] = None, before: Optional[datetime.date] = None
+) -> list[SquashReport]:
+    """
+    Squashes the history of all repositories. Every repository is squashed in its own transaction,
+    so the API can keep serving requests while the job runs.
+
+    Args:
+        dry_run: only report the runs that would be squashed
+        window: maximum time between the first and the last commit of a run, defaults to `COMMIT_SQUASH_WINDOW_DAYS`
+        before: only squash commits made before this date, defaults to today
+
+    Returns: a report per repository with runs to squash
+    """
+
+    window = window if window is not None else datetime.timedelta(days=settings.COMMIT_SQUASH_WINDOW_DAYS)
+    before = before or datetime.date.today()
+    engine = create_postgres_engine()
+
+    async with AsyncSession(engine) as session:
+        repository_ids = (await session.exec(select(Repository.id))).all()
+
+    reports = []
+    for repository_id in repository_ids:
+        async with AsyncSession(engine) as session:
+            report = await squash_repository(session, repository_id, window, before, dry_run)
+            if report.runs:
+                reports.append(report)
+    return reports
+
+
+async def squash_repository(
+    session: AsyncSession, repository_id: str, window: datetime.timedelta, before: datetime.date, dry_run: bool
+) -> SquashReport:
+    """Squashes the history of a repository and commits the transaction, unless it is a dry run"""
+
+    report = SquashReport(repository_id=repository_id)
+
+    # other squash jobs skip the repository, while this transaction is working on it
+    locked = (await session.execute(select(func.pg_try_advisory_xact_lock(func.hashtext(repository_id))))).scalar()
+    if not locked:
+        logger.info(f"Skipping repository: {repository_id}, it is being squashed by another job")
+        return report
+
+    report.runs = await find_runs(session, repository_id, window, before)
+    if dry_run:
+        await session.rollback()
+        return report
+
+    for run in report.runs:
+        await squash_run(session, run)
+    await session.commit()
+    return report
+
+
+async def find_runs(
+    session: AsyncSession, repository_id: str, window: datetime.timedelta, before: datetime.date
+) -> list[list[str]]:
+    """
+    Finds runs of commits by the same author on the history leading up to the head of a repository.
+    A commit can only be squashed into its child when it is not tagged, not the head of a branch, not a checkpoint,
+    not the root commit and not the parent of other commits. The last commit of a run is kept.
+
+    Returns: the ids of the commits in each run, oldest first
+    """
+
+    children = Commit.__table__.alias()
+    query = select(
+        Commit.id,
+        Commit.parent_id,
+        Commit.author_id,
+        Commit.added,
+        Commit.checkpoint,
+        (
+            select(func.count()).where(Tag.commit_id == Commit.id).scalar_subquery()
+            + select(func.count()).where(Branch.head_commit_id == Commit.id).scalar_subquery()
+        ).label("tags"),
+        select(func.count()).where(children.c.parent_id == Commit.id).scalar_subquery().label("children"),
+    ).where(Commit.repository_id == repository_id)
+    commits = {commit.id: commit for commit in (await session.execute(query)).all()}
+
+    head_id = (await session.exec(select(Repository.head_commit_id).where(Repository.id == repository_id))).one()
+    history = []
+    while head_id in commits:
+        history.insert(0, commits[head_id])
+        head_id = commits[head_id].parent_id
+
+    runs = []
+    run = []
+    for commit, child in zip(history, history[1:]):
+        squashable = (
+            commit.parent_id
+            and not commit.tags
+            and not commit.checkpoint
+            and commit.children == 1
+            and child.author_id == commit.author_id
+            and child.added < before
+            and child.added - (run[0] if run else commit).added <= window
+        )
+        if squashable:
+            run.append(commit)
+        elif run:
+            runs.append([*[_commit.id for _commit in run], commit.id])
+            run = []
+    if run:
+        runs.append([*[_commit.id for _commit in run], history[-1].id])
+
+    return runs
+
+
+async def squash_run(session: AsyncSession, run: list[str]):
+    """
+    Squashes a run of commits into the last commit of the run.
+    The kept commit links the latest change and version of every member that changed during the run.
+    """
+
+    *squashed, kept = run
+    positions = {commit_id: position for position, commit_id in enumerate(run)}
+
+    for member in MEMBER_COLUMNS:
+        links = member.class_.__table__
+        latest_changes = (
+            select(member, literal(kept), links.c.change, links.c.version_id)
+            .where(links.c.commit_id.in_(run))
+            .distinct(member)
+            .order_by(member, case(positions, value=links.c.commit_id).desc())
+        )
+        await session.execute(
+            insert(links)
+            .from_select([member.key, links.c.commit_id, links.c.change, links.c.version_id], latest_changes)
+            .on_conflict_do_nothing()
+        )
+        await session.execute(delete(links).where(links.c.commit_id.in_(squashed)))
+
+    commits = Commit.__table__
+    parent_id = select(commits.c.parent_id).where(commits.c.id == squashed[0]).scalar_subquery()
+    await session.execute(update(commits).where(commits.c.id == kept).values(parent_id=parent_id))
+    await session.execute(delete(commits).where(commits.c.id.in_(squashed)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Squash runs of untagged commits by the same author")
+    parser.add_argument("--dry-run", action="store_true", help="only report the commits that would be squashed")
+    parser.add_argument("--window-days", type=int, default=settings.COMMIT_SQUASH_WINDOW_DAYS)
+    args = parser.parse_args()
+
+    reports = await squash_repositories(dry_run=args.dry_run, window=datetime.timedelta(days=args.window_days))
+    for report in reports:
+        logger.info(
+            f"Repository: {report.repository_id} - {len(report.runs)} runs, "
+            f"{report.squashed_commits} commits {'to squash' if args.dry_run else 'squashed'}"
+        )
+    logger.info(f"{sum(report.squashed_commits for report in reports)} commits in total")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+import datetime
+from typing import TYPE_CHECKING, Optional
+
+from lcacollect_config.formatting import string_uuid
+from sqlalchemy import UniqueConstraint, update
+from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from exceptions import CommitConflictError
+from models.commit import Commit
+
+if TYPE_CHECKING:
+    from models.repository import Repository
+
+
+class Branch(SQLModel, table=True):
+    """
+    Repository Branch database class
+
+    A branch is a named head, next to the head of the repository, that shares the history up to the commit
+    it was created from. Changes on a branch are stored as versions, so the members themselves are never copied.
+    """
+
+    __table_args__ = (UniqueConstraint("repository_id", "name"),)
+
+    id: Optional[str] = Field(default_factory=string_uuid, primary_key=True, nullable=False)
+    added: datetime.date = Field(default_factory=datetime.datetime.now, nullable=False)
+    author_id: str | None
+    name: str = Field(nullable=False)
+    head_commit_id: str = Field(nullable=False)
+
+    # Relationships
+    repository_id: str = Field(foreign_key="repository.id")
+    repository: "Repository" = Relationship(back_populates="branches")
+
+    async def move_head(self, session: AsyncSession, commit: Commit):
+        """
+        Makes the commit the head of the branch, as long as the head is still the parent of the commit
+
+        Raises: CommitConflictError when the head was moved since the parent was read
+        """
+
+        result = await session.execute(
+            update(Branch)
+            .where(Branch.id == self.id, Branch.head_commit_id == commit.parent_id)
+            .values(head_commit_id=commit.id)
+        )
+        if result.rowcount != 1:
+            raise CommitConflictError(
+                f"Branch: {self.name} was changed while creating commit: {commit.id}. Please try again"
+            )
@@ -2,9 +2,34 @@ import datetime
 from typing import TYPE_CHECKING, Optional
 
 from lcacollect_config.formatting import string_uuid
+from sqlalchemy import (
+    Index,
+    case,
+    cast,
+    except_,
+    func,
+    intersect,
+    literal,
+    not_,
+    select,
+    union,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import InstrumentedAttribute, object_session
+from sqlalchemy.sql.expression import CTE, ColumnElement, Subquery
 from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from models.links import CategoryCommitLink, ElementCommitLink, TaskCommitLink
+from core.config import settings
+from models.links import (
+    CategoryCommitLink,
+    ChangeType,
+    ElementCommitLink,
+    TaskCommitLink,
+)
+from models.version import Version
 
 if TYPE_CHECKING:
     from models.repository import Repository
@@ -13,13 +38,30 @@ if TYPE_CHECKING:
     from models.tag import Tag
     from models.task import Task
 
+MEMBER_COLUMNS = (
+    CategoryCommitLink.schema_category_id,
+    ElementCommitLink.schema_element_id,
+    TaskCommitLink.task_id,
+)
+
 
 class Commit(SQLModel, table=True):
-    """Repository Commit database class"""
+    """
+    Repository Commit database class
+
+    A commit only links the categories, elements and tasks that changed compared to its parent.
+    The full set of members of a commit is rebuilt from the chain of parents with `Commit.snapshot`.
+    Checkpoint commits link all of their members, so rebuilding never walks past the nearest checkpoint.
+    """
+
+    # commit history is paginated by (updated, id) within a repository, as commits of the same day share `added`
+    __table_args__ = (Index("ix_commit_repository_id_updated_id", "repository_id", "updated", "id"),)
 
     id: Optional[str] = Field(default_factory=string_uuid, primary_key=True, nullable=False)
     added: datetime.date = Field(default_factory=datetime.datetime.now, nullable=False)
     short_id: str | None
+    checkpoint: bool = Field(default=False, nullable=False, sa_column_kwargs={"server_default": "false"})
+    updated: datetime.datetime = Field(default_factory=datetime.datetime.now, nullable=False)
 
     # Relationships
     parent_id: Optional[str] = Field(default=None, nullable=True, foreign_key="commit.id")
@@ -32,20 +74,365 @@ class Commit(SQLModel, table=True):
     repository: "Repository" = Relationship(back_populates="commits")
     author_id: str | None
 
-    schema_categories: list["SchemaCategory"] = Relationship(back_populates="commits", link_model=CategoryCommitLink)
-    schema_elements: list["SchemaElement"] = Relationship(back_populates="commits", link_model=ElementCommitLink)
-    tasks: list["Task"] = Relationship(back_populates="commits", link_model=TaskCommitLink)
+    # members changed in the commit, see `Commit.snapshot` for all of its members
+    changed_schema_categories: list["SchemaCategory"] = Relationship(
+        back_populates="commits", link_model=CategoryCommitLink
+    )
+    changed_schema_elements: list["SchemaElement"] = Relationship(
+        back_populates="commits", link_model=ElementCommitLink
+    )
+    changed_tasks: list["Task"] = Relationship(back_populates="commits", link_model=TaskCommitLink)
     tags: list["Tag"] = Relationship(back_populates="commit", sa_relationship_kwargs={"cascade": "all,delete"})
 
     @classmethod
     def copy_from_parent(cls, previous_commit: "Commit", author_id: str) -> "Commit":
+        """Creates a child commit of `previous_commit` without any changes of its own"""
+
         return cls(
             parent_id=previous_commit.id,
-            added=datetime.date,
             repository_id=previous_commit.repository_id,
-            schema_categories=previous_commit.schema_categories,
-            schema_elements=previous_commit.schema_elements,
-            repository=previous_commit.repository,
             author_id=author_id,
-            tasks=previous_commit.tasks,
         )
+
+    @classmethod
+    async def amend_or_copy(cls, session: AsyncSession, head: "Commit", author_id: str) -> "Commit":
+        """
+        Returns the commit to record the changes of an author in.
+        When coalescing is enabled, the head is amended if its author made it within `COMMIT_COALESCE_WINDOW_SECONDS`
+        of its last change, and it is not the root commit, a checkpoint or tagged.
+        Otherwise the changes are recorded in a new child commit of the head.
+        """
+
+        now = datetime.datetime.now()
+        window = datetime.timedelta(seconds=settings.COMMIT_COALESCE_WINDOW_SECONDS)
+        amendable = (
+            settings.COMMIT_COALESCE_WINDOW_SECONDS > 0
+            and head.author_id == author_id
+            and head.parent_id
+            and not head.checkpoint
+            and now - head.updated <= window
+        )
+        if not amendable or (await session.execute(select(cls.tags.any()).where(cls.id == head.id))).scalar():
+            return cls.copy_from_parent(head, author_id=author_id)
+
+        # members changed again update the links recorded earlier, see `Commit.record`
+        recorded = {}
+        for member in MEMBER_COLUMNS:
+            query = select(member.class_).where(member.class_.commit_id == head.id)
+            for link in (await session.execute(query)).scalars().all():
+                recorded[(member.class_, getattr(link, member.key))] = link
+        session.sync_session.info[("recorded", head.id)] = recorded
+
+        head.updated = now
+        return head
+
+    def record(self, link: SQLModel) -> SQLModel:
+        """
+        Returns the link to add for a change in this commit.
+        An amended commit updates the link of a member it changed before, a member added in it stays added.
+        """
+
+        session = object_session(self)
+        recorded = session.info.get(("recorded", self.id), {}) if session else {}
+        member = next(column for column in MEMBER_COLUMNS if column.class_ is type(link))
+        if previous := recorded.get((type(link), getattr(link, member.key))):
+            if not (previous.change == ChangeType.ADDED.value and link.change == ChangeType.MODIFIED.value):
+                previous.change = link.change
+            return previous
+        return link
+
+    def record_category(self, schema_category_id: str, change: ChangeType) -> CategoryCommitLink:
+        """Records a change of a Schema Category in this commit"""
+
+        return self.record(
+            CategoryCommitLink(schema_category_id=schema_category_id, commit_id=self.id, change=change.value)
+        )
+
+    def record_element(self, schema_element_id: str, change: ChangeType) -> ElementCommitLink:
+        """Records a change of a Schema Element in this commit"""
+
+        return self.record(
+            ElementCommitLink(schema_element_id=schema_element_id, commit_id=self.id, change=change.value)
+        )
+
+    def record_task(self, task_id: str, change: ChangeType) -> TaskCommitLink:
+        """Records a change of a Task in this commit"""
+
+        return self.record(TaskCommitLink(task_id=task_id, commit_id=self.id, change=change.value))
+
+    @classmethod
+    def ancestry(cls, commit_id: str | ColumnElement, full: bool = False, max_depth: Optional[int] = None) -> CTE:
+        """
+        Recursive CTE holding the commit and its ancestors up to and including the nearest checkpoint,
+        together with their distance to the commit
+
+        Args:
+            commit_id: commit to start from, either an id or a scalar subquery selecting it
+            full: follow the parents past checkpoints, all the way to the root commit
+            max_depth: stop following the parents at this distance from the commit
+        """
+
+        commits = cls.__table__
+        ancestry = (
+            select(commits.c.id, commits.c.parent_id, commits.c.checkpoint, literal(0).label("depth"))
+            .where(commits.c.id == commit_id)
+            .cte(recursive=True)
+        )
+        parents = commits.alias()
+        parent_query = select(parents.c.id, parents.c.parent_id, parents.c.checkpoint, ancestry.c.depth + 1).where(
+            parents.c.id == ancestry.c.parent_id
+        )
+        if not full:
+            parent_query = parent_query.where(not_(ancestry.c.checkpoint))
+        if max_depth is not None:
+            parent_query = parent_query.where(ancestry.c.depth < max_depth)
+        return ancestry.union_all(parent_query)
+
+    @classmethod
+    def snapshot(cls, member: InstrumentedAttribute, commit_id: str) -> Subquery:
+        """
+        Rebuilds the members of a commit from the chain of changes leading up to it.
+
+        Args:
+            member: member column of a link model, e.g. `ElementCommitLink.schema_element_id`
+            commit_id: commit to rebuild
+
+        Returns: subquery with a `member_id` column holding the ids of all members of the commit
+        and a `version_id` column holding the version of each member
+        """
+
+        links = member.class_.__table__
+        ancestry = cls.ancestry(commit_id)
+        latest_changes = (
+            select(member.label("member_id"), links.c.change, links.c.version_id)
+            .join(ancestry, links.c.commit_id == ancestry.c.id)
+            .distinct(member)
+            .order_by(member, ancestry.c.depth)
+            .subquery()
+        )
+        return (
+            select(latest_changes.c.member_id, latest_changes.c.version_id)
+            .where(latest_changes.c.change != ChangeType.REMOVED.value)
+            .subquery()
+        )
+
+    @classmethod
+    def members(cls, model, member: InstrumentedAttribute, commit_id: str, *columns: InstrumentedAttribute) -> Subquery:
+        """
+        Reads columns of the members of a commit as they were in the commit.
+        Members linked without a version have their current values.
+
+        Args:
+            model: member model, e.g. `SchemaElement`
+            member: member column of a link model, e.g. `ElementCommitLink.schema_element_id`
+            commit_id: commit to read
+            columns: columns of the member model to read
+
+        Returns: subquery with an `id` column and a column for each of the given columns
+        """
+
+        snapshot = cls.snapshot(member, commit_id)
+        values = [
+            case((Version.id == None, column), else_=cast(Version.data[column.key].astext, column.type)).label(
+                column.key
+            )
+            for column in columns
+        ]
+        return (
+            select(model.id, *values)
+            .join(snapshot, model.id == snapshot.c.member_id)
+            .outerjoin(Version, Version.id == snapshot.c.version_id)
+            .subquery()
+        )
+
+    @classmethod
+    def diff(cls, member: InstrumentedAttribute, from_commit_id: str, to_commit_id: str) -> Subquery:
+        """
+        Compares the members of two commits with set operations on the link tables.
+        A member of both commits is modified when it was added or modified in a commit
+        that is an ancestor of only one of them.
+
+        Args:
+            member: member column of a link model, e.g. `ElementCommitLink.schema_element_id`
+            from_commit_id: commit to compare from
+            to_commit_id: commit to compare to
+
+        Returns: subquery with a `member_id` column and a `change` column telling whether the member was
+        added, removed or modified going from the first commit to the second one
+        """
+
+        links = member.class_.__table__
+        before = select(cls.snapshot(member, from_commit_id).c.member_id)
+        after = select(cls.snapshot(member, to_commit_id).c.member_id)
+
+        from_history = select(cls.ancestry(from_commit_id, full=True).c.id)
+        to_history = select(cls.ancestry(to_commit_id, full=True).c.id)
+        diverged = union(except_(from_history, to_history), except_(to_history, from_history)).subquery()
+        changes = select(member).where(
+            links.c.commit_id.in_(select(diverged.c.id)),
+            links.c.change.in_([ChangeType.ADDED.value, ChangeType.MODIFIED.value]),
+        )
+
+        added = except_(after, before).subquery()
+        removed = except_(before, after).subquery()
+        modified = intersect(before, after, changes).subquery()
+        return union_all(
+            select(added.c.member_id, literal(ChangeType.ADDED.value).label("change")),
+            select(removed.c.member_id, literal(ChangeType.REMOVED.value).label("change")),
+            select(modified.c.member_id, literal(ChangeType.MODIFIED.value).label("change")),
+        ).subquery()
+
+    @classmethod
+    async def merge_base(cls, session: AsyncSession, commit_id: str, other_commit_id: str) -> Optional[str]:
+        """Returns the id of the nearest commit both commits descend from, or None when their histories are unrelated"""
+
+        ours = cls.ancestry(commit_id, full=True)
+        theirs = cls.ancestry(other_commit_id, full=True)
+        query = select(ours.c.id).join(theirs, theirs.c.id == ours.c.id).order_by(ours.c.depth).limit(1)
+        return (await session.execute(query)).scalar()
+
+    @classmethod
+    def merge(
+        cls, member: InstrumentedAttribute, base_commit_id: str, commit_id: str, other_commit_id: str
+    ) -> Subquery:
+        """
+        Three-way comparison of the changes made going from a base commit to another commit ("theirs"),
+        with the changes made going from the base commit to the commit they are merged into ("ours").
+        A change conflicts when both sides changed the member and ended up with different versions of it.
+
+        Args:
+            member: member column of a link model, e.g. `ElementCommitLink.schema_element_id`
+            base_commit_id: nearest common ancestor of the two commits
+            commit_id: commit to merge into
+            other_commit_id: commit to merge
+
+        Returns: subquery with a row for each member changed on their side, with `member_id`, `change` and
+        `version_id` of their side, `ours_change` and `ours_version_id` of our side and whether it is a `conflict`
+        """
+
+        theirs = cls.diff(member, base_commit_id, other_commit_id)
+        ours = cls.diff(member, base_commit_id, commit_id)
+        theirs_snapshot = cls.snapshot(member, other_commit_id)
+        ours_snapshot = cls.snapshot(member, commit_id)
+
+        # removed members are not part of the snapshot, so their version is NULL
+        conflict = ours.c.change.isnot(None) & ours_snapshot.c.version_id.is_distinct_from(theirs_snapshot.c.version_id)
+        return (
+            select(
+                theirs.c.member_id,
+                theirs.c.change,
+                theirs_snapshot.c.version_id,
+                ours.c.change.label("ours_change"),
+                ours_snapshot.c.version_id.label("ours_version_id"),
+                conflict.label("conflict"),
+            )
+            .select_from(theirs)
+            .outerjoin(ours, ours.c.member_id == theirs.c.member_id)
+            .outerjoin(theirs_snapshot, theirs_snapshot.c.member_id == theirs.c.member_id)
+            .outerjoin(ours_snapshot, ours_snapshot.c.member_id == theirs.c.member_id)
+            .subquery()
+        )
+
+    async def write_versions(self, session: AsyncSession):
+        """
+        Stores the content of the members added or modified in this commit as versions and links them.
+        Content that was committed before reuses the existing version.
+        """
+
+        await session.flush()
+
+        for member in MEMBER_COLUMNS:
+            links = member.class_.__table__
+            members = next(iter(member.foreign_keys)).column.table
+            changed = (
+                (links.c.commit_id == self.id)
+                & (links.c.change.in_([ChangeType.ADDED.value, ChangeType.MODIFIED.value]))
+                & (links.c[member.key] == members.c.id)
+            )
+            await session.execute(
+                insert(Version.__table__)
+                .from_select(
+                    ["id", "data"],
+                    select(Version.content_hash(members), Version.content(members)).where(changed),
+                )
+                .on_conflict_do_nothing()
+            )
+            await session.execute(
+                update(links).where(changed).values(version_id=Version.content_hash(members)),
+            )
+
+    async def write_revert(self, session: AsyncSession, head_commit_id: str, target_commit_id: str):
+        """
+        Turns the commit, a child of the head, into a checkpoint linking the members of the target commit
+        with their versions in it, using one INSERT ... SELECT per link table.
+        Members that differ from the head are linked as added or modified, the others as unchanged.
+        """
+
+        await session.flush()
+
+        for member in MEMBER_COLUMNS:
+            links = member.class_.__table__
+            diff = self.diff(member, head_commit_id, target_commit_id)
+            snapshot = self.snapshot(member, target_commit_id)
+            await session.execute(
+                insert(links).from_select(
+                    [member.key, links.c.commit_id, links.c.change, links.c.version_id],
+                    select(
+                        snapshot.c.member_id,
+                        literal(self.id),
+                        func.coalesce(diff.c.change, ChangeType.UNCHANGED.value),
+                        snapshot.c.version_id,
+                    ).outerjoin(diff, diff.c.member_id == snapshot.c.member_id),
+                )
+            )
+
+        self.checkpoint = True
+        session.add(self)
+
+    async def write_checkpoint(self, session: AsyncSession) -> bool:
+        """
+        Turns the commit into a checkpoint when more than `COMMIT_CHECKPOINT_INTERVAL` commits or
+        `COMMIT_CHECKPOINT_SIZE` changes were made since the last checkpoint.
+        A checkpoint links all of its members, the ones that did not change are linked as unchanged.
+
+        Returns: whether a checkpoint was written
+        """
+
+        await session.flush()
+
+        ancestry = self.ancestry(self.id)
+        changes = [
+            select(func.count())
+            .select_from(member.class_.__table__)
+            .join(ancestry, member.class_.__table__.c.commit_id == ancestry.c.id)
+            .where(not_(ancestry.c.checkpoint))
+            .scalar_subquery()
+            for member in MEMBER_COLUMNS
+        ]
+        depth, *sizes = (
+            await session.execute(select(select(func.count()).select_from(ancestry).scalar_subquery(), *changes))
+        ).one()
+
+        if depth < settings.COMMIT_CHECKPOINT_INTERVAL and sum(sizes) < settings.COMMIT_CHECKPOINT_SIZE:
+            return False
+
+        for member in MEMBER_COLUMNS:
+            links = member.class_.__table__
+            snapshot = self.snapshot(member, self.id)
+            await session.execute(
+                insert(links)
+                .from_select(
+                    [member.key, links.c.commit_id, links.c.change, links.c.version_id],
+                    select(
+                        snapshot.c.member_id,
+                        literal(self.id),
+                        literal(ChangeType.UNCHANGED.value),
+                        snapshot.c.version_id,
+                    ),
+                )
+                .on_conflict_do_nothing()
+            )
+
+        self.checkpoint = True
+        session.add(self)
+        return True
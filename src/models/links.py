@@ -1,24 +1,57 @@
+from enum import Enum
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
+class ChangeType(str, Enum):
+    """
+    How a member of a commit changed compared to the parent commit.
+    Checkpoint commits link their unchanged members as well.
+    """
+
+    ADDED = "added"
+    MODIFIED = "modified"
+    REMOVED = "removed"
+    UNCHANGED = "unchanged"
+
+
 class CategoryCommitLink(SQLModel, table=True):
     """Category Commit Database class"""
 
+    # the members of a commit are read from this index alone, the other link tables have the same index
+    __table_args__ = (Index("ix_categorycommitlink_commit_id", "commit_id", "schema_category_id", "change"),)
+
     schema_category_id: Optional[str] = Field(default=None, foreign_key="schemacategory.id", primary_key=True)
     commit_id: Optional[str] = Field(default=None, foreign_key="commit.id", primary_key=True)
+    change: str = Field(
+        default=ChangeType.ADDED.value, nullable=False, sa_column_kwargs={"server_default": ChangeType.ADDED.value}
+    )
+    version_id: Optional[str] = Field(default=None, foreign_key="version.id", nullable=True)
 
 
 class ElementCommitLink(SQLModel, table=True):
     """Element Commit Database class"""
 
+    __table_args__ = (Index("ix_elementcommitlink_commit_id", "commit_id", "schema_element_id", "change"),)
+
     schema_element_id: Optional[str] = Field(default=None, foreign_key="schemaelement.id", primary_key=True)
     commit_id: Optional[str] = Field(default=None, foreign_key="commit.id", primary_key=True)
+    change: str = Field(
+        default=ChangeType.ADDED.value, nullable=False, sa_column_kwargs={"server_default": ChangeType.ADDED.value}
+    )
+    version_id: Optional[str] = Field(default=None, foreign_key="version.id", nullable=True)
 
 
 class TaskCommitLink(SQLModel, table=True):
     """Task Commit Database class"""
 
+    __table_args__ = (Index("ix_taskcommitlink_commit_id", "commit_id", "task_id", "change"),)
+
     task_id: Optional[str] = Field(default=None, foreign_key="task.id", primary_key=True)
     commit_id: Optional[str] = Field(default=None, foreign_key="commit.id", primary_key=True)
+    change: str = Field(
+        default=ChangeType.ADDED.value, nullable=False, sa_column_kwargs={"server_default": ChangeType.ADDED.value}
+    )
+    version_id: Optional[str] = Field(default=None, foreign_key="version.id", nullable=True)
@@ -0,0 +1,33 @@
+from sqlalchemy import event, false
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+from sqlmodel import Field, SQLModel
+
+# execution option reading removed members as well, for queries that read members as they were in a commit
+INCLUDE_REMOVED = {"include_removed": True}
+
+
+class Removable(SQLModel):
+    """
+    Members of the history of a Reporting Schema, which are removed from the head instead of deleted.
+    A removed member keeps its row and its versions, so the commits it belonged to can still be read,
+    while it is left out of every query unless `INCLUDE_REMOVED` is set on it.
+    Members only added on a branch are stored as removed until the branch is merged.
+    """
+
+    removed: bool = Field(
+        default=False, nullable=False, sa_column_kwargs={"server_default": "false", "info": {"versioned": False}}
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def exclude_removed(state: ORMExecuteState):
+    """Leaves removed members out of queries, relationships loaded by the query included"""
+
+    if state.is_select and not state.is_column_load and not state.is_relationship_load:
+        if not state.execution_options.get("include_removed", False):
+            state.statement = state.statement.options(
+                *[
+                    with_loader_criteria(model, model.removed == false(), include_aliases=True)
+                    for model in Removable.__subclasses__()
+                ]
+            )
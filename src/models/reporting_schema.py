@@ -1,6 +1,7 @@
 from typing import Optional
 
 from lcacollect_config.formatting import string_uuid
+from sqlalchemy import Index
 from sqlalchemy.orm import RelationshipProperty
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -12,6 +13,9 @@ from models.task import Task
 class ReportingSchema(SQLModel, table=True):
     """Reporting Schema database class"""
 
+    # Reporting Schemas are sorted by name within their project
+    __table_args__ = (Index("ix_reportingschema_project_id_name", "project_id", "name", "id"),)
+
     id: Optional[str] = Field(default_factory=string_uuid, primary_key=True, nullable=False)
     name: str
     project_id: str | None
@@ -1,27 +1,118 @@
+import re
 from typing import TYPE_CHECKING, Optional
 
 from lcacollect_config.formatting import string_uuid
-from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import func, update
+from sqlalchemy.orm import RelationshipProperty
+from sqlalchemy.sql.expression import ScalarSelect
+from sqlmodel import Field, Relationship, SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from exceptions import CommitConflictError
+from models.branch import Branch
 from models.commit import Commit
+from models.tag import Tag
 
 if TYPE_CHECKING:
     from models.commit import Commit
     from models.reporting_schema import ReportingSchema
 
 
+# HEAD, a branch name, a tag name or a commit id, optionally followed by ~n to select the n-th ancestor
+REF_PATTERN = re.compile(r"^(?P<name>[^~]+)(?P<ancestor>~(?P<depth>\d*))?$")
+
+
 class Repository(SQLModel, table=True):
     """Repository database class"""
 
     id: Optional[str] = Field(default_factory=string_uuid, primary_key=True, nullable=False)
+    head_commit_id: Optional[str] = Field(default=None, nullable=True)
 
     # Relationships
-    reporting_schema_id: Optional[str] = Field(foreign_key="reportingschema.id")
+    reporting_schema_id: Optional[str] = Field(foreign_key="reportingschema.id", index=True)
     reporting_schema: "ReportingSchema" = Relationship(back_populates="repository")
     commits: list["Commit"] = Relationship(
         back_populates="repository", sa_relationship_kwargs={"cascade": "all,delete"}
     )
+    branches: list["Branch"] = Relationship(
+        back_populates="repository", sa_relationship_kwargs={"cascade": "all,delete"}
+    )
+    head: Optional["Commit"] = Relationship(
+        sa_relationship=RelationshipProperty(
+            "Commit",
+            primaryjoin="foreign(Repository.head_commit_id) == Commit.id",
+            uselist=False,
+            viewonly=True,
+        ),
+    )
+
+    @classmethod
+    async def get_head_commit(cls, session: AsyncSession, reporting_schema_id: str) -> Commit:
+        """Fetches the head commit of the repository belonging to a Reporting Schema"""
+
+        query = (
+            select(Commit)
+            .join(cls, cls.head_commit_id == Commit.id)
+            .where(cls.reporting_schema_id == reporting_schema_id)
+        )
+        return (await session.exec(query)).one()
+
+    @classmethod
+    async def move_head(cls, session: AsyncSession, commit: Commit):
+        """
+        Makes the commit the head of its repository, as long as the head is still the parent of the commit,
+        or the commit itself when it was amended.
+        Concurrent writers are serialized by the row lock on the repository, so only one child of a head can succeed.
+
+        Raises: CommitConflictError when the head was moved since the parent was read
+        """
+
+        result = await session.execute(
+            update(cls)
+            .where(cls.id == commit.repository_id, col(cls.head_commit_id).in_([commit.parent_id, commit.id]))
+            .values(head_commit_id=commit.id)
+        )
+        if result.rowcount != 1:
+            raise CommitConflictError(
+                f"Repository: {commit.repository_id} was changed while creating commit: {commit.id}. Please try again"
+            )
+
+    @classmethod
+    def resolve_ref(cls, reporting_schema_id: str, ref: str) -> Optional[ScalarSelect]:
+        """
+        Resolves a ref like `HEAD`, `HEAD~5`, `v1.0` or `v1.0~2` to a commit of the repository of a Reporting Schema.
+        Names are looked up as HEAD, then as branch names, tag names and lastly as commit ids.
+
+        Returns: scalar subquery selecting the id of the commit, or None if the ref is malformed
+        """
+
+        if not (match := REF_PATTERN.match(ref)):
+            return None
+        name = match["name"]
+        depth = int(match["depth"] or 1) if match["ancestor"] else 0
+
+        if name == "HEAD":
+            start = select(cls.head_commit_id).where(cls.reporting_schema_id == reporting_schema_id).scalar_subquery()
+        else:
+            branch = (
+                select(Branch.head_commit_id)
+                .join(cls, cls.id == Branch.repository_id)
+                .where(Branch.name == name, cls.reporting_schema_id == reporting_schema_id)
+            )
+            tagged = (
+                select(Tag.commit_id)
+                .join(Commit, Commit.id == Tag.commit_id)
+                .join(cls, cls.id == Commit.repository_id)
+                .where(Tag.name == name, cls.reporting_schema_id == reporting_schema_id)
+                .order_by(Tag.added.desc())
+                .limit(1)
+            )
+            commit = (
+                select(Commit.id)
+                .join(cls, cls.id == Commit.repository_id)
+                .where(Commit.id == name, cls.reporting_schema_id == reporting_schema_id)
+            )
+            start = func.coalesce(branch.scalar_subquery(), tagged.scalar_subquery(), commit.scalar_subquery())
 
-    @property
-    def head(self):
-        return self.commits[-1]
+        ancestry = Commit.ancestry(start, full=True, max_depth=depth)
+        return select(ancestry.c.id).where(ancestry.c.depth == depth).scalar_subquery()
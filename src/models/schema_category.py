@@ -1,28 +1,89 @@
 from typing import Optional
 
 from lcacollect_config.formatting import string_uuid
+from sqlalchemy import DDL, Index, event
 from sqlmodel import Field, Relationship, SQLModel
 
 from models.commit import Commit
 from models.links import CategoryCommitLink
+from models.removable import Removable
 from models.schema_element import SchemaElement
+from models.search import searchable
 from models.task import Task
 
 
-class SchemaCategory(SQLModel, table=True):
+class SchemaCategory(Removable, table=True):
     """Schema Category database class"""
 
+    # categories are sorted by name within their Reporting Schema
+    __table_args__ = (Index("ix_schemacategory_reporting_schema_id_name", "reporting_schema_id", "name", "id"),)
+
     id: Optional[str] = Field(default_factory=string_uuid, primary_key=True, nullable=False)
     path: str | None
     name: str | None
     description: str | None
 
     # Relationships
-    reporting_schema_id: Optional[str] = Field(foreign_key="reportingschema.id")
+    reporting_schema_id: Optional[str] = Field(foreign_key="reportingschema.id", index=True)
     reporting_schema: "ReportingSchema" = Relationship(back_populates="categories")
     elements: list[SchemaElement] = Relationship(
         back_populates="schema_category",
         sa_relationship_kwargs={"cascade": "all,delete"},
     )
-    commits: list[Commit] = Relationship(back_populates="schema_categories", link_model=CategoryCommitLink)
+    commits: list[Commit] = Relationship(back_populates="changed_schema_categories", link_model=CategoryCommitLink)
     tasks: list[Task] = Relationship(back_populates="category", sa_relationship_kwargs={"cascade": "all,delete"})
+
+
+searchable(SchemaCategory.__table__, "name", "description")
+
+
+class SchemaCategoryClosure(SQLModel, table=True):
+    """
+    Schema Category Closure database class
+
+    Links every Schema Category to itself and to each of the categories in its path, with the distance between them.
+    The rows follow the paths of the categories through triggers on the category table,
+    so they are kept up to date by every insert, update and delete, including bulk ones.
+    """
+
+    # the primary key finds the descendants of a category, this index finds its ancestors
+    __table_args__ = (Index("ix_schemacategoryclosure_descendant_id", "descendant_id", "depth"),)
+
+    ancestor_id: str = Field(primary_key=True)
+    descendant_id: str = Field(primary_key=True)
+    depth: int = Field(nullable=False)
+
+
+CLOSURE_FUNCTION = """
+CREATE OR REPLACE FUNCTION schemacategory_closure() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        DELETE FROM schemacategoryclosure
+        WHERE descendant_id = OLD.id OR (TG_OP = 'DELETE' AND ancestor_id = OLD.id);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO schemacategoryclosure (ancestor_id, descendant_id, depth)
+        SELECT ancestor.id, NEW.id, cardinality(ids) - ancestor.position
+        FROM (
+            SELECT array_append(string_to_array(trim(BOTH '/' FROM coalesce(NEW.path, '')), '/'), NEW.id) AS ids
+        ) AS path, unnest(path.ids) WITH ORDINALITY AS ancestor(id, position)
+        WHERE ancestor.id <> ''
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+CLOSURE_TRIGGERS = [
+    """
+    CREATE TRIGGER schemacategory_closure AFTER INSERT OR DELETE ON schemacategory
+    FOR EACH ROW EXECUTE FUNCTION schemacategory_closure()
+    """,
+    """
+    CREATE TRIGGER schemacategory_closure_path AFTER UPDATE OF path ON schemacategory
+    FOR EACH ROW WHEN (OLD.path IS DISTINCT FROM NEW.path) EXECUTE FUNCTION schemacategory_closure()
+    """,
+]
+
+for statement in [CLOSURE_FUNCTION, *CLOSURE_TRIGGERS]:
+    event.listen(SchemaCategory.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
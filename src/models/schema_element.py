@@ -2,18 +2,23 @@ import json
 from typing import Optional
 
 from lcacollect_config.formatting import string_uuid
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlalchemy.dialects.postgresql import JSON
 from sqlmodel import Field, Relationship, SQLModel
 
 from models.commit import Commit
 from models.links import ElementCommitLink
+from models.removable import Removable
+from models.search import searchable
 from models.task import Task
 
 
-class SchemaElement(SQLModel, table=True):
+class SchemaElement(Removable, table=True):
     """Schema Element database class"""
 
+    # elements are sorted by name within their categories
+    __table_args__ = (Index("ix_schemaelement_schema_category_id_name", "schema_category_id", "name", "id"),)
+
     id: Optional[str] = Field(default_factory=string_uuid, primary_key=True, nullable=False)
     name: str
     quantity: float = Field(default=0.0)
@@ -22,10 +27,12 @@ class SchemaElement(SQLModel, table=True):
     result: dict = Field(default=None, sa_column=Column(JSON), nullable=False)
 
     # Relationships
-    schema_category_id: str = Field(foreign_key="schemacategory.id")
+    schema_category_id: str = Field(foreign_key="schemacategory.id", index=True)
     schema_category: "SchemaCategory" = Relationship(back_populates="elements")
 
-    commits: Optional[list[Commit]] = Relationship(back_populates="schema_elements", link_model=ElementCommitLink)
+    commits: Optional[list[Commit]] = Relationship(
+        back_populates="changed_schema_elements", link_model=ElementCommitLink
+    )
 
     tasks: Optional[list[Task]] = Relationship(
         back_populates="element", sa_relationship_kwargs={"cascade": "all,delete"}
@@ -36,3 +43,6 @@ class SchemaElement(SQLModel, table=True):
     assembly_id: str | None
 
     meta_fields: dict = Field(default=None, sa_column=Column(JSON), nullable=False)
+
+
+searchable(SchemaElement.__table__, "name", "description")
@@ -0,0 +1,61 @@
+from sqlalchemy import DDL, Column, Computed, Index, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.sql.schema import Table
+from sqlmodel import SQLModel
+
+# text search configuration of the search vectors, without stemming as names are written in several languages
+SEARCH_CONFIG = "simple"
+# weights of the searchable columns in the search vectors, in the order they are given
+SEARCH_WEIGHTS = "ABCD"
+
+# Names are also matched by their spelling, when the optional pg_trgm extension is installed.
+# It is created when the server provides it and left out otherwise, so the database can be set up without it.
+CREATE_TRIGRAM_EXTENSION = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    END IF;
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'pg_trgm could not be created, names are only searched by their words';
+END $$
+"""
+
+event.listen(SQLModel.metadata, "before_create", DDL(CREATE_TRIGRAM_EXTENSION).execute_if(dialect="postgresql"))
+
+
+def trigram_index(table: str, column: str) -> str:
+    """
+    DDL of the trigram index of a column, which is only created when pg_trgm is installed.
+    The index is left out of the metadata, see `include_object` in the alembic environment
+    """
+
+    return f"""
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+        CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops);
+    END IF;
+END $$
+"""
+
+
+def searchable(table: Table, *columns: str) -> Column:
+    """
+    Adds a generated `search_vector` column to a table holding the words of the given columns, most important first,
+    with a GIN index on it and, when pg_trgm is installed, a trigram index on the first column.
+    The column is left out of the model, so it is never written or returned with the items.
+
+    Returns: search vector column
+    """
+
+    document = " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in zip(columns, SEARCH_WEIGHTS)
+    )
+    vector = Column("search_vector", TSVECTOR, Computed(document, persisted=True))
+    table.append_column(vector)
+
+    Index(f"ix_{table.name}_search_vector", vector, postgresql_using="gin")
+    event.listen(table, "after_create", DDL(trigram_index(table.name, columns[0])).execute_if(dialect="postgresql"))
+    return vector
@@ -8,9 +8,11 @@ from sqlmodel import Field, Relationship, SQLModel
 from models.comment import Comment
 from models.commit import Commit
 from models.links import TaskCommitLink
+from models.removable import Removable
+from models.search import searchable
 
 
-class Task(SQLModel, table=True):
+class Task(Removable, table=True):
     """Task database class"""
 
     id: Optional[str] = Field(default_factory=string_uuid, primary_key=True, nullable=False)
@@ -20,7 +22,7 @@ class Task(SQLModel, table=True):
     status: str | None
 
     # Relationships
-    reporting_schema_id: Optional[str] = Field(foreign_key="reportingschema.id")
+    reporting_schema_id: Optional[str] = Field(foreign_key="reportingschema.id", index=True)
     reporting_schema: "ReportingSchema" = Relationship(back_populates="tasks")
 
     category_id: Optional[str] = Field(foreign_key="schemacategory.id")
@@ -29,8 +31,11 @@ class Task(SQLModel, table=True):
     element_id: Optional[str] = Field(foreign_key="schemaelement.id")
     element: "SchemaElement" = Relationship(back_populates="tasks")
 
-    commits: list[Commit] = Relationship(back_populates="tasks", link_model=TaskCommitLink)
+    commits: list[Commit] = Relationship(back_populates="changed_tasks", link_model=TaskCommitLink)
     comments: list[Comment] = Relationship(back_populates="task")
     author_id: str | None
     assignee_id: str | None
     assigned_group_id: str | None
+
+
+searchable(Task.__table__, "name", "description")
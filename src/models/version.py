@@ -0,0 +1,123 @@
+from typing import Optional
+
+from sqlalchemy import (
+    Column,
+    Text,
+    cast,
+    false,
+    func,
+    literal,
+    literal_column,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.expression import ColumnElement, Subquery
+from sqlalchemy.sql.schema import Table
+from sqlmodel import Field, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class Version(SQLModel, table=True):
+    """
+    Version database class
+
+    Immutable content of a Schema Category, Schema Element or Task as it was committed.
+    Versions are keyed on a hash of their content, so unchanged content is stored once and shared between commits.
+    """
+
+    id: Optional[str] = Field(primary_key=True, nullable=False)
+    data: dict = Field(default=None, sa_column=Column(JSONB, nullable=False))
+
+    @classmethod
+    def content(cls, table: Table) -> ColumnElement:
+        """Content of a row of a member table, all of its versioned columns"""
+
+        return cls.strip(table, func.to_jsonb(table.table_valued()))
+
+    @staticmethod
+    def unversioned(table: Table) -> list[str]:
+        """Columns of a member table that are not part of its versions: the id, generated and unversioned columns"""
+
+        return [
+            column.name
+            for column in table.columns
+            if column.name == "id" or column.computed is not None or not column.info.get("versioned", True)
+        ]
+
+    @classmethod
+    def strip(cls, table: Table, row: ColumnElement) -> ColumnElement:
+        """Removes the columns that are not versioned from a JSON row of a member table"""
+
+        for key in cls.unversioned(table):
+            row = row.op("-")(key)
+        return row
+
+    @classmethod
+    def content_hash(cls, table: Table) -> ColumnElement:
+        """Hash identifying the content of a row of a member table"""
+
+        return func.md5(cast(cls.content(table), Text))
+
+    @classmethod
+    async def write(cls, session: AsyncSession, item: SQLModel) -> str:
+        """
+        Stores the content of an item as a version, without persisting the item itself.
+        The content is converted to the row type of the item's table, so it hashes like the content of a stored row.
+
+        Returns: id of the version
+        """
+
+        table = type(item).__table__
+        row = func.jsonb_populate_record(literal_column(f"NULL::{table.name}"), cast(literal(item.json(), Text), JSONB))
+        content = cls.strip(table, func.to_jsonb(row))
+        version_id = (await session.execute(select(func.md5(cast(content, Text))))).scalar()
+        await session.execute(
+            insert(cls.__table__).values(id=version_id, data=content).on_conflict_do_nothing(),
+        )
+        return version_id
+
+    @classmethod
+    async def write_rows(cls, session: AsyncSession, table: Table, pairs: Subquery):
+        """
+        Sets the rows of a member table to the content of versions in a single UPDATE.
+        Removed rows that are set to a version become members of the head again, see `models.removable`
+
+        Args:
+            session: database session
+            table: member table to update
+            pairs: subquery with a `member_id` column and a `version_id` column holding the version to set it to
+        """
+
+        content = (
+            select(
+                pairs.c.member_id,
+                func.jsonb_populate_record(literal_column(f"NULL::{table.name}"), cls.data).label("record"),
+            )
+            .join(cls, cls.id == pairs.c.version_id)
+            .subquery("content")
+        )
+        values = {
+            column.name: literal_column(f"(content.record).{column.name}", column.type)
+            for column in table.columns
+            if column.name not in cls.unversioned(table)
+        }
+        if "removed" in table.c:
+            values["removed"] = false()
+        await session.execute(update(table).where(table.c.id == content.c.member_id).values(values))
+
+    @staticmethod
+    def restore(session: AsyncSession, item: SQLModel, data: Optional[dict]) -> SQLModel:
+        """
+        Sets the fields of an item to the values of a version.
+        The item is removed from the session first, so the current values are neither overwritten nor persisted.
+        Items linked without a version keep their current values.
+        """
+
+        session.expunge(item)
+        for key, value in (data or {}).items():
+            if field := item.__fields__.get(key):
+                value, _ = field.validate(value, {}, loc=key)
+                set_committed_value(item, key, value)
+        return item
@@ -3,18 +3,24 @@ from inspect import getdoc
 import strawberry
 from lcacollect_config.permissions import IsAuthenticated
 
+import schema.aggregate as schema_aggregate
+import schema.branch as schema_branch
+import schema.changeset as schema_changeset
 import schema.comment as schema_comment
 import schema.commit as schema_commit
 import schema.export as schema_export
+import schema.hierarchy as schema_hierarchy
 import schema.reporting_schema as schema_reporting
 import schema.schema_category as schema_category
 import schema.schema_element as schema_element
 import schema.schema_template as schema_template
+import schema.search as schema_search
 import schema.source as schema_source
 import schema.tag as schema_tag
 import schema.task as schema_task
 import schema.typecode as schema_typecode
 from core import federation
+from core.pagination import Connection
 from core.permissions import IsAdmin
 
 
@@ -28,6 +34,11 @@ class Query:
         resolver=schema_source.project_sources_query,
         description=getdoc(schema_source.project_sources_query),
     )
+    project_sources_connection: Connection[schema_source.GraphQLProjectSource] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_source.project_sources_connection_query,
+        description=getdoc(schema_source.project_sources_connection_query),
+    )
     schema_templates: list[schema_template.GraphQLSchemaTemplate] = strawberry.field(
         permission_classes=[IsAuthenticated],
         resolver=schema_template.query_schema_templates,
@@ -43,31 +54,91 @@ class Query:
         resolver=schema_category.query_schema_categories,
         description=getdoc(schema_category.query_schema_categories),
     )
+    schema_categories_connection: Connection[schema_category.GraphQLSchemaCategory] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_category.query_schema_categories_connection,
+        description=getdoc(schema_category.query_schema_categories_connection),
+    )
+    descendants: list[schema_category.GraphQLSchemaCategory] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_category.query_descendants,
+        description=getdoc(schema_category.query_descendants),
+    )
     schema_elements: list[schema_element.GraphQLSchemaElement] = strawberry.field(
         permission_classes=[IsAuthenticated],
         resolver=schema_element.query_schema_elements,
         description=getdoc(schema_element.query_schema_elements),
     )
+    schema_elements_connection: Connection[schema_element.GraphQLSchemaElement] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_element.query_schema_elements_connection,
+        description=getdoc(schema_element.query_schema_elements_connection),
+    )
+    schema_aggregates: list[schema_aggregate.GraphQLSchemaAggregate] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_aggregate.query_schema_aggregates,
+        description=getdoc(schema_aggregate.query_schema_aggregates),
+    )
+    schema_tree: list[schema_hierarchy.GraphQLSchemaTreeNode] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_hierarchy.query_schema_tree,
+        description=getdoc(schema_hierarchy.query_schema_tree),
+    )
+    search: schema_search.GraphQLSearchResults = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_search.query_search,
+        description=getdoc(schema_search.query_search),
+    )
     commits: list[schema_commit.GraphQLCommit] = strawberry.field(
         permission_classes=[IsAuthenticated],
         resolver=schema_commit.query_commits,
         description=getdoc(schema_commit.query_commits),
     )
+    commit: schema_commit.GraphQLCommit = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_commit.query_commit,
+        description=getdoc(schema_commit.query_commit),
+    )
+    commit_diff: schema_commit.GraphQLCommitDiff = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_commit.query_commit_diff,
+        description=getdoc(schema_commit.query_commit_diff),
+    )
+    branches: list[schema_branch.GraphQLBranch] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_branch.query_branches,
+        description=getdoc(schema_branch.query_branches),
+    )
     tags: list[schema_tag.GraphQLTag] = strawberry.field(
         permission_classes=[IsAuthenticated],
         resolver=schema_tag.query_tags,
         description=getdoc(schema_tag.query_tags),
     )
+    tags_connection: Connection[schema_tag.GraphQLTag] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_tag.query_tags_connection,
+        description=getdoc(schema_tag.query_tags_connection),
+    )
     tasks: list[schema_task.GraphQLTask] = strawberry.field(
         permission_classes=[IsAuthenticated],
         resolver=schema_task.query_tasks,
         description=getdoc(schema_task.query_tasks),
     )
+    tasks_connection: Connection[schema_task.GraphQLTask] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_task.query_tasks_connection,
+        description=getdoc(schema_task.query_tasks_connection),
+    )
     comments: list[schema_comment.GraphQLComment] = strawberry.field(
         permission_classes=[IsAuthenticated],
         resolver=schema_comment.query_comments,
         description=getdoc(schema_comment.query_comments),
     )
+    comments_connection: Connection[schema_comment.GraphQLComment] = strawberry.field(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_comment.query_comments_connection,
+        description=getdoc(schema_comment.query_comments_connection),
+    )
     export_reporting_schema: str = strawberry.field(
         permission_classes=[IsAuthenticated],
         resolver=schema_export.export_reporting_schema_mutation,
@@ -163,6 +234,37 @@ class Mutation:
         description=getdoc(schema_element.delete_schema_element_mutation),
     )
 
+    # Commit
+    revert_to_commit: schema_commit.GraphQLCommit = strawberry.mutation(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_commit.revert_to_commit_mutation,
+        description=getdoc(schema_commit.revert_to_commit_mutation),
+    )
+
+    # Changeset
+    apply_changeset: schema_changeset.GraphQLChangeset = strawberry.mutation(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_changeset.apply_changeset_mutation,
+        description=getdoc(schema_changeset.apply_changeset_mutation),
+    )
+
+    # Branch
+    add_branch: schema_branch.GraphQLBranch = strawberry.mutation(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_branch.add_branch_mutation,
+        description=getdoc(schema_branch.add_branch_mutation),
+    )
+    merge_branch: schema_branch.GraphQLMerge = strawberry.mutation(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_branch.merge_branch_mutation,
+        description=getdoc(schema_branch.merge_branch_mutation),
+    )
+    delete_branch: str = strawberry.mutation(
+        permission_classes=[IsAuthenticated],
+        resolver=schema_branch.delete_branch_mutation,
+        description=getdoc(schema_branch.delete_branch_mutation),
+    )
+
     # Project Source
     add_project_source: schema_source.GraphQLProjectSource = strawberry.mutation(
         permission_classes=[IsAuthenticated],
@@ -261,3 +363,4 @@ schema = strawberry.federation.Schema(
     enable_federation_2=True,
     types=[federation.GraphQLProjectMember],
 )
+federation.resolve_entity_types(schema)
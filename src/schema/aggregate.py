@@ -0,0 +1,105 @@
+from typing import Optional
+
+import strawberry
+from lcacollect_config.context import get_session
+from lcacollect_config.exceptions import DatabaseItemNotFound
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.sql.expression import Subquery
+from strawberry.types import Info
+
+import models.commit as models_commit
+import models.reporting_schema as models_schema
+import models.schema_category as models_category
+import models.schema_element as models_element
+from core.validate import authenticate
+from models.removable import INCLUDE_REMOVED
+from schema.schema_element import Unit
+
+
+@strawberry.type
+class GraphQLSchemaAggregate:
+    schema_category_id: str
+    path: str | None
+    unit: Unit | None
+    element_count: int
+    quantity: float
+
+
+async def query_schema_aggregates(
+    info: Info, reporting_schema_id: str, commit_id: Optional[str] = None
+) -> list[GraphQLSchemaAggregate]:
+    """
+    Get the number of Schema Elements and their summed quantity per unit, for the subtree of each Schema Category
+    of a Reporting Schema. The subtree of a category holds the category and all categories below it
+    """
+
+    session = get_session(info)
+    reporting_schema = await session.get(models_schema.ReportingSchema, reporting_schema_id)
+    if not reporting_schema:
+        raise DatabaseItemNotFound(f"Could not find Reporting Schema with id: {reporting_schema_id}")
+    await authenticate(info, reporting_schema.project_id, check_public=True)
+
+    closure = models_category.SchemaCategoryClosure
+    categories = category_rows(reporting_schema_id, commit_id)
+    elements = element_rows(commit_id)
+    root = categories.alias("root")
+
+    if commit_id:
+        # paths hold the ids of all parents, so a category is in the subtree of every category in its path
+        member = categories.alias("member")
+        in_subtree = or_(
+            member.c.id == root.c.id,
+            func.concat(member.c.path, "/").contains(func.concat("/", root.c.id, "/")),
+        )
+    else:
+        # the closure table holds the current subtrees
+        member = select(closure.ancestor_id, closure.descendant_id.label("id")).subquery("member")
+        in_subtree = member.c.ancestor_id == root.c.id
+
+    query = (
+        select(
+            root.c.id.label("schema_category_id"),
+            root.c.path,
+            elements.c.unit,
+            func.count(elements.c.id).label("element_count"),
+            func.coalesce(func.sum(elements.c.quantity), literal(0.0)).label("quantity"),
+        )
+        .select_from(root)
+        .join(member, in_subtree)
+        .join(elements, elements.c.schema_category_id == member.c.id)
+        .group_by(root.c.id, root.c.path, elements.c.unit)
+        .order_by(root.c.path, root.c.id, elements.c.unit)
+    )
+    if commit_id:
+        query = query.execution_options(**INCLUDE_REMOVED)
+
+    return [GraphQLSchemaAggregate(**row._mapping) for row in (await session.execute(query)).all()]
+
+
+def category_rows(reporting_schema_id: str, commit_id: Optional[str] = None) -> Subquery:
+    """Ids and paths of the Schema Categories of a Reporting Schema, as they were in the commit when one is given"""
+
+    model = models_category.SchemaCategory
+    if commit_id:
+        categories = models_commit.Commit.members(
+            model, models_category.CategoryCommitLink.schema_category_id, commit_id, model.path
+        )
+        return (
+            select(categories)
+            .join(model, model.id == categories.c.id)
+            .where(model.reporting_schema_id == reporting_schema_id)
+            .subquery()
+        )
+    return select(model.id, model.path).where(model.reporting_schema_id == reporting_schema_id).subquery()
+
+
+def element_rows(commit_id: Optional[str] = None) -> Subquery:
+    """Category, unit and quantity of the Schema Elements, as they were in the commit when one is given"""
+
+    model = models_element.SchemaElement
+    columns = (model.schema_category_id, model.unit, model.quantity)
+    if commit_id:
+        return models_commit.Commit.members(
+            model, models_element.ElementCommitLink.schema_element_id, commit_id, *columns
+        )
+    return select(model.id, *columns).subquery()
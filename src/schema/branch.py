@@ -0,0 +1,305 @@
+import datetime
+from enum import Enum
+from typing import Optional
+
+import strawberry
+from lcacollect_config.context import get_session, get_user
+from lcacollect_config.exceptions import DatabaseItemNotFound
+from sqlalchemy import Text, all_, any_, bindparam, cast, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from strawberry.scalars import JSON
+from strawberry.types import Info
+
+import models.branch as models_branch
+import models.commit as models_commit
+import models.reporting_schema as models_schema
+import models.repository as models_repository
+import models.schema_category as models_category
+import models.schema_element as models_element
+import models.task as models_task
+from core.validate import authenticate
+from exceptions import BranchError
+from models.links import ChangeType
+from models.version import Version
+from schema.commit import authenticate_commit, retry_on_conflict
+
+
+@strawberry.type
+class GraphQLBranch:
+    id: str
+    added: datetime.date
+    author_id: str | None
+    name: str
+    head_commit_id: str
+    repository_id: str
+
+
+@strawberry.enum
+class MergeMemberType(Enum):
+    SCHEMA_CATEGORY = "SchemaCategory"
+    SCHEMA_ELEMENT = "SchemaElement"
+    TASK = "Task"
+
+
+@strawberry.type
+class GraphQLMergeConflict:
+    member_type: MergeMemberType
+    member_id: str
+    ours: str | None
+    theirs: str
+    ours_content: JSON | None
+    theirs_content: JSON | None
+
+
+@strawberry.type
+class GraphQLMerge:
+    base_commit_id: str
+    commit_id: str | None
+    conflicts: list[GraphQLMergeConflict]
+
+
+# members are merged in this order, so elements are removed before the categories they are placed in
+MERGE_MEMBERS = {
+    MergeMemberType.TASK: (models_task.Task, models_task.TaskCommitLink.task_id),
+    MergeMemberType.SCHEMA_ELEMENT: (
+        models_element.SchemaElement,
+        models_element.ElementCommitLink.schema_element_id,
+    ),
+    MergeMemberType.SCHEMA_CATEGORY: (
+        models_category.SchemaCategory,
+        models_category.CategoryCommitLink.schema_category_id,
+    ),
+}
+
+
+async def query_branches(info: Info, reporting_schema_id: str) -> list[GraphQLBranch]:
+    """Get all branches of a Reporting Schema"""
+
+    session = get_session(info)
+    await authenticate_commit(info, reporting_schema_id)
+
+    query = (
+        select(models_branch.Branch)
+        .join(models_repository.Repository)
+        .where(models_repository.Repository.reporting_schema_id == reporting_schema_id)
+        .order_by(models_branch.Branch.name)
+    )
+    return (await session.exec(query)).all()
+
+
+async def add_branch_mutation(info: Info, reporting_schema_id: str, name: str, ref: str = "HEAD") -> GraphQLBranch:
+    """Add a branch of a Reporting Schema starting at a ref like `HEAD`, `HEAD~5`, a tag name or a commit id"""
+
+    session = get_session(info)
+    user = get_user(info)
+    await authenticate_branch(info, reporting_schema_id)
+
+    if name == "HEAD" or await get_branch(session, reporting_schema_id, name):
+        raise BranchError(f"Branch: {name} already exists")
+
+    commit_id = models_repository.Repository.resolve_ref(reporting_schema_id, ref)
+    if commit_id is None:
+        raise DatabaseItemNotFound(f"Could not resolve ref: {ref}")
+    commit = (await session.exec(select(models_commit.Commit).where(models_commit.Commit.id == commit_id))).first()
+    if commit is None:
+        raise DatabaseItemNotFound(f"Could not find Commit for ref: {ref}")
+
+    # a branch only points at the commit it starts from, none of the members are copied
+    branch = models_branch.Branch(
+        name=name,
+        author_id=user.claims.get("oid"),
+        head_commit_id=commit.id,
+        repository_id=commit.repository_id,
+    )
+    session.add(branch)
+    await session.commit()
+    await session.refresh(branch)
+
+    return branch
+
+
+async def delete_branch_mutation(info: Info, id: str) -> str:
+    """Delete a branch. The commits made on the branch stay reachable by their id"""
+
+    session = get_session(info)
+    branch = await session.get(models_branch.Branch, id)
+    if not branch:
+        raise DatabaseItemNotFound(f"Could not find Branch with id: {id}")
+
+    repository = await session.get(models_repository.Repository, branch.repository_id)
+    await authenticate_branch(info, repository.reporting_schema_id)
+
+    await session.delete(branch)
+    await session.commit()
+    return id
+
+
+async def get_branch(session: AsyncSession, reporting_schema_id: str, name: str) -> Optional[models_branch.Branch]:
+    """Returns the branch of a Reporting Schema with the given name, if it exists"""
+
+    query = (
+        select(models_branch.Branch)
+        .join(models_repository.Repository)
+        .where(
+            models_repository.Repository.reporting_schema_id == reporting_schema_id,
+            models_branch.Branch.name == name,
+        )
+    )
+    return (await session.exec(query)).first()
+
+
+async def authenticate_branch(info: Info, reporting_schema_id: str):
+    """Authenticates the user trying to change the branches of a Reporting Schema"""
+
+    reporting_schema = await get_session(info).get(models_schema.ReportingSchema, reporting_schema_id)
+    if not reporting_schema:
+        raise DatabaseItemNotFound(f"Could not find Reporting Schema with id: {reporting_schema_id}")
+    await authenticate(info, reporting_schema.project_id)
+
+
+@retry_on_conflict
+async def merge_branch_mutation(info: Info, reporting_schema_id: str, branch: str) -> GraphQLMerge:
+    """
+    Merge the changes made on a branch into the head of a Reporting Schema as a single commit.
+    Changes that conflict with the changes made on the head since the branch started are returned instead
+    """
+
+    session = get_session(info)
+    user = get_user(info)
+    await authenticate_branch(info, reporting_schema_id)
+
+    _branch = await get_branch(session, reporting_schema_id, branch)
+    if not _branch:
+        raise DatabaseItemNotFound(f"Could not find Branch: {branch}")
+
+    head = await models_repository.Repository.get_head_commit(session, reporting_schema_id)
+    base_commit_id = await models_commit.Commit.merge_base(session, head.id, _branch.head_commit_id)
+
+    changes = {}
+    for member_type, (_, member) in MERGE_MEMBERS.items():
+        merge = models_commit.Commit.merge(member, base_commit_id, head.id, _branch.head_commit_id)
+        changes[member_type] = (await session.execute(select(merge).order_by(merge.c.member_id))).all()
+
+    conflicting = await find_conflicts(session, reporting_schema_id, changes)
+    conflicts = [
+        (member_type, row) for member_type, rows in changes.items() for row in rows if row.member_id in conflicting
+    ]
+    # changes made alike on both sides are merged already
+    merged = {
+        member_type: [row for row in rows if row.member_id not in conflicting and row.ours_change is None]
+        for member_type, rows in changes.items()
+    }
+
+    commit_id = None
+    if any(merged.values()):
+        commit = models_commit.Commit.copy_from_parent(head, author_id=user.claims.get("oid"))
+        commit.short_id = commit.id[:8]
+        commit_id = commit.id
+        session.add(commit)
+        await session.flush()
+
+        for member_type, (model, member) in MERGE_MEMBERS.items():
+            await merge_members(session, model, member, commit_id, merged[member_type])
+
+        await models_repository.Repository.move_head(session, commit)
+        await commit.write_versions(session)
+        await commit.write_checkpoint(session)
+        await session.commit()
+
+    version_ids = [version_id for _, row in conflicts for version_id in (row.version_id, row.ours_version_id)]
+    query = select(Version.id, Version.data).where(Version.id == any_(array(version_ids)))
+    contents = dict((await session.execute(query)).all()) if conflicts else {}
+
+    return GraphQLMerge(
+        base_commit_id=base_commit_id,
+        commit_id=commit_id,
+        conflicts=[
+            GraphQLMergeConflict(
+                member_type=member_type,
+                member_id=row.member_id,
+                ours=row.ours_change,
+                theirs=row.change,
+                ours_content=contents.get(row.ours_version_id),
+                theirs_content=contents.get(row.version_id),
+            )
+            for member_type, row in conflicts
+        ],
+    )
+
+
+async def find_conflicts(session: AsyncSession, reporting_schema_id: str, changes: dict[MergeMemberType, list]) -> set:
+    """
+    Returns the ids of the members with conflicting changes.
+    Next to members changed differently on both sides, an element conflicts when it was moved into a category
+    that is no longer on the head, and a category conflicts when it was removed while elements remain in it.
+    """
+
+    conflicting = {row.member_id for rows in changes.values() for row in rows if row.conflict}
+    elements = [row for row in changes[MergeMemberType.SCHEMA_ELEMENT] if row.member_id not in conflicting]
+
+    categories = select(models_category.SchemaCategory.id).where(
+        models_category.SchemaCategory.reporting_schema_id == reporting_schema_id
+    )
+    versions = [row.version_id for row in elements if row.change != ChangeType.REMOVED.value]
+    query = select(Version.id).where(
+        Version.id == any_(array(versions)), Version.data["schema_category_id"].astext.notin_(categories)
+    )
+    moved = set((await session.execute(query)).scalars().all()) if versions else set()
+    conflicting |= {row.member_id for row in elements if row.version_id in moved}
+
+    removed_elements = [
+        row.member_id for row in elements if row.change == ChangeType.REMOVED.value and row.member_id not in conflicting
+    ]
+    removed_categories = [
+        row.member_id
+        for row in changes[MergeMemberType.SCHEMA_CATEGORY]
+        if row.change == ChangeType.REMOVED.value and row.member_id not in conflicting
+    ]
+    query = (
+        select(models_element.SchemaElement.schema_category_id)
+        .where(
+            models_element.SchemaElement.schema_category_id == any_(array(removed_categories)),
+            models_element.SchemaElement.id != all_(array(removed_elements)),
+        )
+        .distinct()
+    )
+    conflicting |= set((await session.execute(query)).scalars().all()) if removed_categories else set()
+
+    return conflicting
+
+
+async def merge_members(session: AsyncSession, model, member, commit_id: str, rows: list):
+    """Applies the merged changes of one kind of member to the current members and records them in the commit"""
+
+    removed = [row.member_id for row in rows if row.change == ChangeType.REMOVED.value]
+    modified = [row for row in rows if row.change != ChangeType.REMOVED.value]
+
+    # removed members are deleted like any other member, together with their links and tasks
+    if removed:
+        for item in (await session.exec(select(model).where(model.id == any_(array(removed))))).all():
+            await session.delete(item)
+        await session.flush()
+
+    if modified:
+        member_ids = [row.member_id for row in modified]
+        pairs = select(
+            func.unnest(array(member_ids)).label("member_id"),
+            func.unnest(array([row.version_id for row in modified])).label("version_id"),
+        ).subquery()
+        await Version.write_rows(session, model.__table__, pairs)
+
+        links = member.class_.__table__
+        await session.execute(
+            insert(links).from_select(
+                [member.key, links.c.commit_id, links.c.change],
+                select(func.unnest(array(member_ids)), literal(commit_id), literal(ChangeType.MODIFIED.value)),
+            )
+        )
+
+
+def array(values: list[str]):
+    """Binds a list of ids as a single array parameter, so lists of any length can be used in a query"""
+
+    return cast(bindparam(None, values, type_=ARRAY(Text)), ARRAY(Text))
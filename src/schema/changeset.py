@@ -0,0 +1,611 @@
+from typing import Optional, Type
+
+import strawberry
+from lcacollect_config.context import get_session, get_user
+from lcacollect_config.email import EmailType, send_email
+from lcacollect_config.exceptions import DatabaseItemNotFound
+from lcacollect_config.formatting import string_uuid
+from sqlalchemy import func
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from strawberry.types import Info
+
+import models.commit as models_commit
+import models.reporting_schema as models_schema
+import models.repository as models_repository
+import models.schema_category as models_category
+import models.schema_element as models_element
+import models.task as models_task
+from core.loading import graphql_options
+from core.validate import authenticate
+from exceptions import ChangesetError
+from models.links import ChangeType
+from models.removable import INCLUDE_REMOVED
+from models.version import Version
+from schema.branch import get_branch
+from schema.commit import remove_members, retry_on_conflict
+from schema.schema_category import (
+    GraphQLSchemaCategory,
+    SchemaCategoryAddInput,
+    SchemaCategoryUpdateInput,
+)
+from schema.schema_element import (
+    GraphQLSchemaElement,
+    SchemaElementAddInput,
+    SchemaElementUpdateInput,
+    update_schema_element_fields,
+)
+from schema.task import (
+    AssigneeType,
+    GraphQLTask,
+    GraphQLTaskItem,
+    TaskAddInput,
+    TaskItemType,
+    TaskUpdateInput,
+    resolve_assignee,
+)
+
+# members that can be checked out from a commit, by the link column recording their changes
+SNAPSHOT_MEMBERS = {
+    models_category.SchemaCategory: models_category.CategoryCommitLink.schema_category_id,
+    models_element.SchemaElement: models_element.ElementCommitLink.schema_element_id,
+    models_task.Task: models_task.TaskCommitLink.task_id,
+}
+
+# changes that can not be made on a branch, as they would add rows to the current members
+BRANCH_UNSUPPORTED_CHANGES = (
+    "add_schema_categories",
+    "add_schema_elements",
+    "add_tasks",
+    "update_tasks",
+    "delete_tasks",
+)
+
+
+@strawberry.input
+class ChangesetInput:
+    add_schema_categories: Optional[list[SchemaCategoryAddInput]] = None
+    update_schema_categories: Optional[list[SchemaCategoryUpdateInput]] = None
+    delete_schema_categories: Optional[list[str]] = None
+    add_schema_elements: Optional[list[SchemaElementAddInput]] = None
+    update_schema_elements: Optional[list[SchemaElementUpdateInput]] = None
+    delete_schema_elements: Optional[list[str]] = None
+    add_tasks: Optional[list[TaskAddInput]] = None
+    update_tasks: Optional[list[TaskUpdateInput]] = None
+    delete_tasks: Optional[list[str]] = None
+
+
+@strawberry.type
+class GraphQLChangeset:
+    commit_id: str
+    schema_categories: list[GraphQLSchemaCategory]
+    schema_elements: list[GraphQLSchemaElement]
+    tasks: list[GraphQLTask]
+
+
+@retry_on_conflict
+async def apply_changeset_mutation(
+    info: Info, reporting_schema_id: str, changeset: ChangesetInput, branch: Optional[str] = None
+) -> GraphQLChangeset:
+    """
+    Apply changes to the Schema Categories, Schema Elements and Tasks of a Reporting Schema as a single commit,
+    optionally on a branch
+    """
+
+    session = get_session(info)
+    user = get_user(info)
+
+    if not any(getattr(changeset, key) for key in ChangesetInput.__annotations__):
+        raise ChangesetError("Changeset does not contain any changes")
+
+    reporting_schema = await session.get(models_schema.ReportingSchema, reporting_schema_id)
+    if not reporting_schema:
+        raise DatabaseItemNotFound(f"Could not find Reporting Schema with id: {reporting_schema_id}")
+
+    members = await authenticate(info, reporting_schema.project_id)
+    await validate_added_ids(session, changeset)
+
+    if branch is not None:
+        return await apply_changeset_to_branch(info, session, reporting_schema_id, branch, changeset)
+
+    head_commit = await models_repository.Repository.get_head_commit(session, reporting_schema_id)
+
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
+    commit.short_id = commit.id[:8]
+    commit_id = commit.id
+    session.add(commit)
+
+    # deletes are applied first, so the other changes can not refer to deleted members
+    await delete_members(session, commit, reporting_schema_id, changeset)
+
+    categories = await update_categories(session, reporting_schema_id, changeset)
+    elements = await update_elements(session, reporting_schema_id, changeset)
+    tasks, emails = await update_tasks(info, session, reporting_schema, members, changeset)
+    session.add_all([*categories.values(), *elements.values(), *tasks.values()])
+    await session.flush()
+
+    session.add_all(
+        [
+            *[
+                commit.record_category(_id, change)
+                for _id, change in record_changes(categories, changeset.update_schema_categories).items()
+            ],
+            *[
+                commit.record_element(_id, change)
+                for _id, change in record_changes(elements, changeset.update_schema_elements).items()
+            ],
+            *[commit.record_task(_id, change) for _id, change in record_changes(tasks, changeset.update_tasks).items()],
+        ]
+    )
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
+    await session.commit()
+
+    # send email notifications
+    for email, email_type, email_kwargs in emails:
+        info.context["background_tasks"].add_task(send_email, email, email_type, **email_kwargs)
+
+    return GraphQLChangeset(
+        commit_id=commit_id,
+        schema_categories=await fetch_changed(
+            info, session, models_category.SchemaCategory, list(categories), "schemaCategories"
+        ),
+        schema_elements=await fetch_changed(
+            info, session, models_element.SchemaElement, list(elements), "schemaElements"
+        ),
+        tasks=await fetch_changed(info, session, models_task.Task, list(tasks), "tasks"),
+    )
+
+
+async def apply_changeset_to_branch(
+    info: Info, session: AsyncSession, reporting_schema_id: str, name: str, changeset: ChangesetInput
+) -> GraphQLChangeset:
+    """
+    Applies the updates and deletes of Schema Categories and Schema Elements of a changeset as a commit on a branch.
+    The members are checked out from the head of the branch and their new content is only stored as versions,
+    so the current members and the head of the repository are left as they are.
+    """
+
+    if any(getattr(changeset, key) for key in BRANCH_UNSUPPORTED_CHANGES):
+        raise ChangesetError(
+            "Only updates and deletes of Schema Categories and Schema Elements can be made on a branch"
+        )
+
+    branch = await get_branch(session, reporting_schema_id, name)
+    if not branch:
+        raise DatabaseItemNotFound(f"Could not find Branch: {name}")
+
+    commit = models_commit.Commit(
+        parent_id=branch.head_commit_id, repository_id=branch.repository_id, author_id=get_user(info).claims.get("oid")
+    )
+    commit.short_id = commit.id[:8]
+    commit_id = commit.id
+    session.add(commit)
+
+    # deleting a category on the branch also deletes the elements placed in it on the branch
+    removed_categories = set(
+        await checkout_members(
+            session,
+            models_category.SchemaCategory,
+            changeset.delete_schema_categories or [],
+            branch.head_commit_id,
+            reporting_schema_id,
+        )
+    )
+    removed_elements = set(
+        await checkout_members(
+            session,
+            models_element.SchemaElement,
+            changeset.delete_schema_elements or [],
+            branch.head_commit_id,
+            reporting_schema_id,
+        )
+    )
+    if removed_categories:
+        schema_category_id = func.coalesce(
+            Version.data["schema_category_id"].astext, models_element.SchemaElement.schema_category_id
+        )
+        removed_elements |= set(
+            await fetch_snapshot(
+                session,
+                models_element.SchemaElement,
+                schema_category_id.in_(removed_categories),
+                branch.head_commit_id,
+                reporting_schema_id,
+            )
+        )
+
+    category_updates = changeset.update_schema_categories or []
+    categories = await checkout_members(
+        session,
+        models_category.SchemaCategory,
+        [update.id for update in category_updates if update.id not in removed_categories],
+        branch.head_commit_id,
+        reporting_schema_id,
+        expected=[update.id for update in category_updates],
+    )
+    for update in category_updates:
+        update_category_fields(categories[update.id], update)
+
+    element_updates = changeset.update_schema_elements or []
+    elements = await checkout_members(
+        session,
+        models_element.SchemaElement,
+        [update.id for update in element_updates if update.id not in removed_elements],
+        branch.head_commit_id,
+        reporting_schema_id,
+        expected=[update.id for update in element_updates],
+    )
+    # elements can only be placed in categories of the branch
+    category_ids = {update.schema_category for update in element_updates if update.schema_category}
+    await checkout_members(
+        session,
+        models_category.SchemaCategory,
+        list(category_ids - removed_categories),
+        branch.head_commit_id,
+        reporting_schema_id,
+        expected=list(category_ids),
+    )
+    for update in element_updates:
+        update_schema_element_fields(elements[update.id], update)
+
+    links = [
+        *[commit.record_category(_id, ChangeType.REMOVED) for _id in removed_categories],
+        *[commit.record_element(_id, ChangeType.REMOVED) for _id in removed_elements],
+    ]
+    for members, record in ((categories, commit.record_category), (elements, commit.record_element)):
+        for member in members.values():
+            link = record(member.id, ChangeType.MODIFIED)
+            link.version_id = await Version.write(session, member)
+            links.append(link)
+    session.add_all(links)
+
+    await branch.move_head(session, commit)
+    await commit.write_checkpoint(session)
+    await session.commit()
+
+    return GraphQLChangeset(
+        commit_id=commit_id,
+        schema_categories=await fetch_changed(
+            info, session, models_category.SchemaCategory, list(categories), "schemaCategories", commit_id=commit_id
+        ),
+        schema_elements=await fetch_changed(
+            info, session, models_element.SchemaElement, list(elements), "schemaElements", commit_id=commit_id
+        ),
+        tasks=[],
+    )
+
+
+async def validate_added_ids(session: AsyncSession, changeset: ChangesetInput):
+    """
+    Checks the ids given to the members added in a changeset, before any of them is written
+
+    Raises: ChangesetError when an id is given to more than one added member or is already taken
+    """
+
+    for model, additions in (
+        (models_category.SchemaCategory, changeset.add_schema_categories),
+        (models_element.SchemaElement, changeset.add_schema_elements),
+        (models_task.Task, changeset.add_tasks),
+    ):
+        ids = [addition.id for addition in additions or [] if addition.id]
+        if duplicates := {_id for _id in ids if ids.count(_id) > 1}:
+            raise ChangesetError(f"{model.__name__} ids are given more than once: {', '.join(sorted(duplicates))}")
+        if not ids:
+            continue
+
+        query = select(model.id).where(col(model.id).in_(ids)).execution_options(**INCLUDE_REMOVED)
+        if taken := (await session.exec(query)).all():
+            raise ChangesetError(f"{model.__name__} ids are already taken: {', '.join(sorted(taken))}")
+
+
+async def fetch_members(
+    session: AsyncSession, model: Type[SQLModel], ids: list[str], reporting_schema_id: str
+) -> dict[str, SQLModel]:
+    """
+    Fetches the members of a Reporting Schema with one query
+
+    Args:
+        session: database session
+        model: SchemaCategory, SchemaElement or Task
+        ids: ids of the members to fetch
+        reporting_schema_id: Reporting Schema the members must belong to
+
+    Returns: members by id
+    """
+
+    if not ids:
+        return {}
+
+    query = select(model).where(col(model.id).in_(ids))
+    if model is models_element.SchemaElement:
+        query = query.join(models_category.SchemaCategory).where(
+            models_category.SchemaCategory.reporting_schema_id == reporting_schema_id
+        )
+    else:
+        query = query.where(model.reporting_schema_id == reporting_schema_id)
+
+    members = {member.id: member for member in (await session.exec(query)).all()}
+    if missing := set(ids) - set(members):
+        raise DatabaseItemNotFound(f"Could not find {model.__name__} with ids: {', '.join(sorted(missing))}")
+
+    return members
+
+
+async def fetch_snapshot(
+    session: AsyncSession, model: Type[SQLModel], condition, commit_id: str, reporting_schema_id: str
+) -> dict[str, SQLModel]:
+    """
+    Fetches the members of a commit that match the condition, with the content they had in the commit.
+    The members are removed from the session, so changing them does not change the current members.
+
+    Args:
+        session: database session
+        model: SchemaCategory or SchemaElement
+        condition: filter on the members, which can refer to the `Version` of the members
+        commit_id: commit to check the members out from
+        reporting_schema_id: Reporting Schema the members must belong to
+
+    Returns: members by id
+    """
+
+    snapshot = models_commit.Commit.snapshot(SNAPSHOT_MEMBERS[model], commit_id)
+    query = (
+        select(model, Version.data)
+        .join(snapshot, model.id == snapshot.c.member_id)
+        .outerjoin(Version, Version.id == snapshot.c.version_id)
+        .where(condition)
+        .execution_options(**INCLUDE_REMOVED)
+    )
+    if model is models_element.SchemaElement:
+        query = query.join(models_category.SchemaCategory).where(
+            models_category.SchemaCategory.reporting_schema_id == reporting_schema_id
+        )
+    else:
+        query = query.where(model.reporting_schema_id == reporting_schema_id)
+
+    return {member.id: Version.restore(session, member, data) for member, data in (await session.exec(query)).all()}
+
+
+async def checkout_members(
+    session: AsyncSession,
+    model: Type[SQLModel],
+    ids: list[str],
+    commit_id: str,
+    reporting_schema_id: str,
+    expected: Optional[list[str]] = None,
+) -> dict[str, SQLModel]:
+    """
+    Fetches members of a commit by id, with the content they had in the commit
+
+    Raises: DatabaseItemNotFound when any of the expected ids, by default all ids, is not a member of the commit
+    """
+
+    members = (
+        await fetch_snapshot(session, model, col(model.id).in_(ids), commit_id, reporting_schema_id) if ids else {}
+    )
+    if missing := set(ids if expected is None else expected) - set(members):
+        raise DatabaseItemNotFound(f"Could not find {model.__name__} with ids: {', '.join(sorted(missing))}")
+
+    return members
+
+
+async def delete_members(
+    session: AsyncSession, commit: models_commit.Commit, reporting_schema_id: str, changeset: ChangesetInput
+):
+    """Removes the Tasks, Schema Elements and Schema Categories of the changeset from the head in the commit"""
+
+    categories, elements, tasks = [
+        list((await fetch_members(session, model, ids, reporting_schema_id)).values())
+        for model, ids in (
+            (models_category.SchemaCategory, changeset.delete_schema_categories),
+            (models_element.SchemaElement, changeset.delete_schema_elements),
+            (models_task.Task, changeset.delete_tasks),
+        )
+    ]
+    await remove_members(session, commit, categories=categories, elements=elements, tasks=tasks)
+    await session.flush()
+
+
+async def update_categories(
+    session: AsyncSession, reporting_schema_id: str, changeset: ChangesetInput
+) -> dict[str, models_category.SchemaCategory]:
+    """Returns the added and updated Schema Categories of the changeset by id"""
+
+    updates = changeset.update_schema_categories or []
+    categories = await fetch_members(
+        session, models_category.SchemaCategory, [update.id for update in updates], reporting_schema_id
+    )
+
+    for update in updates:
+        update_category_fields(categories[update.id], update)
+
+    for category_input in changeset.add_schema_categories or []:
+        category = models_category.SchemaCategory(
+            id=category_input.id or string_uuid(),
+            name=category_input.name,
+            path=category_input.path,
+            description=category_input.description,
+            reporting_schema_id=reporting_schema_id,
+        )
+        categories[category.id] = category
+
+    return categories
+
+
+def update_category_fields(
+    category: models_category.SchemaCategory, update: SchemaCategoryUpdateInput
+) -> models_category.SchemaCategory:
+    """Sets the fields of a Schema Category that are given in the update"""
+
+    for key in ("name", "path", "description"):
+        if value := getattr(update, key):
+            setattr(category, key, value)
+    return category
+
+
+async def update_elements(
+    session: AsyncSession, reporting_schema_id: str, changeset: ChangesetInput
+) -> dict[str, models_element.SchemaElement]:
+    """Returns the added and updated Schema Elements of the changeset by id"""
+
+    updates = changeset.update_schema_elements or []
+    additions = changeset.add_schema_elements or []
+    elements = await fetch_members(
+        session, models_element.SchemaElement, [update.id for update in updates], reporting_schema_id
+    )
+
+    # elements can only be placed in categories of the reporting schema, including the ones added in the changeset
+    added_category_ids = {category.id for category in changeset.add_schema_categories or [] if category.id}
+    category_ids = {element.schema_category_id for element in additions} | {
+        update.schema_category for update in updates if update.schema_category
+    }
+    await fetch_members(
+        session, models_category.SchemaCategory, list(category_ids - added_category_ids), reporting_schema_id
+    )
+
+    for update in updates:
+        update_schema_element_fields(elements[update.id], update)
+
+    for element_input in additions:
+        element = models_element.SchemaElement(
+            id=element_input.id or string_uuid(),
+            name=element_input.name,
+            quantity=element_input.quantity,
+            unit=element_input.unit.value,
+            description=element_input.description,
+            schema_category_id=element_input.schema_category_id,
+            assembly_id=element_input.assembly_id,
+        )
+        elements[element.id] = element
+
+    return elements
+
+
+async def update_tasks(
+    info: Info,
+    session: AsyncSession,
+    reporting_schema: models_schema.ReportingSchema,
+    members,
+    changeset: ChangesetInput,
+) -> tuple[dict[str, models_task.Task], list[tuple[str, EmailType, dict]]]:
+    """Returns the added and updated Tasks of the changeset by id together with the emails to send"""
+
+    user = get_user(info)
+    updates = changeset.update_tasks or []
+    additions = changeset.add_tasks or []
+    tasks = await fetch_members(session, models_task.Task, [update.id for update in updates], reporting_schema.id)
+
+    # tasks can only refer to members of the reporting schema, including the ones added in the changeset
+    items = [task.item for task in [*updates, *additions] if task.item]
+    for model, item_type, added in (
+        (models_category.SchemaCategory, TaskItemType.Category, changeset.add_schema_categories),
+        (models_element.SchemaElement, TaskItemType.Element, changeset.add_schema_elements),
+    ):
+        added_ids = {member.id for member in added or [] if member.id}
+        item_ids = {item.id for item in items if item.type == item_type} - added_ids
+        await fetch_members(session, model, list(item_ids), reporting_schema.id)
+
+    emails = []
+    for update in updates:
+        task = tasks[update.id]
+        for key in ("name", "due_date", "description"):
+            if value := getattr(update, key):
+                setattr(task, key, value)
+        if update.item:
+            set_task_item(task, update.item)
+
+        email_type, email_kwargs, assignee_email = None, {}, ""
+        if update.status:
+            task.status = update.status.value
+            email_type, email_kwargs = EmailType.TASK_STATUS_CHANGE, {"task": task.name, "status": task.status}
+        if update.assignee:
+            assignee_email = await assign_task(info, task, members, update.assignee, reporting_schema.project_id)
+            email_type, email_kwargs = EmailType.TASK_ASSIGN, {"task": task.name}
+        emails.append((assignee_email, email_type, email_kwargs))
+
+    for task_input in additions:
+        task = models_task.Task(
+            id=task_input.id or string_uuid(),
+            name=task_input.name,
+            due_date=task_input.due_date,
+            description=task_input.description,
+            status=task_input.status.value,
+            reporting_schema_id=reporting_schema.id,
+            author_id=user.claims.get("oid"),
+        )
+        set_task_item(task, task_input.item)
+        if task_input.assignee:
+            email = await assign_task(info, task, members, task_input.assignee, reporting_schema.project_id)
+            emails.append((email, EmailType.TASK_ASSIGN, {"task": task.name}))
+        tasks[task.id] = task
+
+    return tasks, [email for email in emails if email[0] and email[1]]
+
+
+def set_task_item(task: models_task.Task, item: GraphQLTaskItem):
+    """Points a Task at a Schema Category or a Schema Element"""
+
+    task.category_id = item.id if item.type == TaskItemType.Category else None
+    task.element_id = item.id if item.type == TaskItemType.Element else None
+
+
+async def assign_task(info: Info, task: models_task.Task, members, assignee, project_id: str) -> str:
+    """Assigns a Task to a project member or group and returns the email of the assigned user, if it could be found"""
+
+    assignee_id, assignee_email = await resolve_assignee(info, members, assignee, project_id)
+    task.assignee_id = assignee_id if assignee.type == AssigneeType.PROJECT_MEMBER else None
+    task.assigned_group_id = assignee_id if assignee.type == AssigneeType.PROJECT_GROUP else None
+    return assignee_email
+
+
+def record_changes(changed: dict[str, SQLModel], updates: Optional[list]) -> dict[str, ChangeType]:
+    """Returns how each of the added or updated members changed in the commit"""
+
+    updated = {update.id for update in updates or []}
+    return {_id: ChangeType.MODIFIED if _id in updated else ChangeType.ADDED for _id in changed}
+
+
+async def fetch_changed(
+    info: Info,
+    session: AsyncSession,
+    model: Type[SQLModel],
+    ids: list[str],
+    field_name: str,
+    commit_id: Optional[str] = None,
+) -> list[SQLModel]:
+    """
+    Fetches the changed members and eager loads the relationships requested in the info
+
+    Args:
+        info (Info): request information
+        session: database session
+        model: SchemaCategory, SchemaElement or Task
+        ids: ids of the changed members
+        field_name: field of the changeset that returns the members
+        commit_id: read the members with the content they have in this commit instead of their current content
+
+    Returns: changed members
+    """
+
+    if not ids:
+        return []
+
+    if commit_id:
+        snapshot = models_commit.Commit.snapshot(SNAPSHOT_MEMBERS[model], commit_id)
+        query = (
+            select(model, Version.data)
+            .join(snapshot, model.id == snapshot.c.member_id)
+            .outerjoin(Version, Version.id == snapshot.c.version_id)
+            .execution_options(**INCLUDE_REMOVED)
+        )
+    else:
+        query = select(model)
+    query = query.where(col(model.id).in_(ids))
+
+    query = graphql_options(info, query, model, path=[field_name])
+
+    if commit_id:
+        return [Version.restore(session, member, data) for member, data in (await session.exec(query)).all()]
+    return (await session.exec(query)).all()
@@ -1,8 +1,9 @@
 import datetime
-from typing import TYPE_CHECKING, Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional, Sequence
 
 import strawberry
 from aiocache import cached
+from graphql import GraphQLResolveInfo
 from lcacollect_config.context import get_session, get_user
 from lcacollect_config.email import EmailType, send_email
 from lcacollect_config.exceptions import DatabaseItemNotFound
@@ -10,10 +11,13 @@ from lcacollect_config.graphql.input_filters import filter_model_query
 from lcacollect_config.user import get_users_from_azure
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
 from strawberry.types import Info
 
 import models.comment as models_comment
 import models.task as models_task
+from core.loading import get_entity_loader, graphql_options
+from core.pagination import PAGE_PATH, PAGE_SIZE, Connection, paginate
 from core.validate import authenticate
 from schema.inputs import CommentFilters
 
@@ -30,23 +34,52 @@ class GraphQLComment:
     task_id = str
     task: Annotated["GraphQLTask", strawberry.lazy("schema.task")]
 
+    @classmethod
+    async def resolve_reference(cls, info: GraphQLResolveInfo, id: strawberry.ID) -> Optional[models_comment.Comment]:
+        return await get_entity_loader(info, models_comment.Comment, cls.__strawberry_definition__.name).load(id)
+
+    @classmethod
+    def is_type_of(cls, obj, info: GraphQLResolveInfo) -> bool:
+        return isinstance(obj, (cls, models_comment.Comment))
+
 
 async def query_comments(info: Info, task_id: str, filters: Optional[CommentFilters] = None) -> list[GraphQLComment]:
     """Query all comments of a task"""
 
+    query = await select_comments(info, task_id, filters)
+
+    session = get_session(info)
+    comments = await session.exec(query)
+    return comments.all()
+
+
+async def query_comments_connection(
+    info: Info,
+    task_id: str,
+    filters: Optional[CommentFilters] = None,
+    first: int = PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Connection[GraphQLComment]:
+    """Query a page of the comments of a task, starting after the given cursor"""
+
+    query = await select_comments(info, task_id, filters, PAGE_PATH)
+    return await paginate(get_session(info), query, models_comment.Comment, first, after)
+
+
+async def select_comments(
+    info: Info, task_id: str, filters: Optional[CommentFilters] = None, path: Sequence[str] = ()
+) -> SelectOfScalar:
+    """Authenticates the user and returns the query of the comments of a task"""
+
     query = select(models_comment.Comment)
     if task_id:
         await authenticate_comment(info, task_id, check_public=True)
         query = query.where(models_comment.Comment.task_id == task_id)
-    if [field for field in info.selected_fields if field.name == "task"]:
-        query = query.options(selectinload(models_comment.Comment.task))
+    query = graphql_options(info, query, models_comment.Comment, path)
 
     if filters:
         query = filter_model_query(models_comment.Comment, filters, query)
-
-    session = get_session(info)
-    comments = await session.exec(query)
-    return comments.all()
+    return query
 
 
 async def add_comment_mutation(info: Info, task_id: str, text: str) -> GraphQLComment:
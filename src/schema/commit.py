@@ -1,20 +1,36 @@
 import datetime
-from typing import TYPE_CHECKING, Annotated, Optional
+from functools import partial, wraps
+from typing import TYPE_CHECKING, Annotated, Optional, Sequence, Type
 
 import strawberry
 from aiocache import cached
-from lcacollect_config.context import get_session
+from lcacollect_config.context import get_session, get_user
+from lcacollect_config.exceptions import DatabaseItemNotFound
 from lcacollect_config.graphql.input_filters import filter_model_query
-from sqlalchemy.orm import selectinload
-from sqlmodel import select
+from sqlalchemy import delete, or_, update
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from strawberry.dataloader import DataLoader
 from strawberry.types import Info
+from strawberry.utils.str_converters import to_camel_case
 
+import models.comment as models_comment
 import models.commit as models_commit
 import models.reporting_schema as models_schema
 import models.repository as models_repository
 import models.schema_category as models_category
+import models.schema_element as models_element
+import models.task as models_task
+from core.config import settings
+from core.loading import field_options, graphql_options, selected_fields
+from core.pagination import order_query, seek, sort_keys
 from core.validate import authenticate
-from schema.inputs import CommitFilters
+from exceptions import CommitConflictError
+from models.links import ChangeType
+from models.removable import INCLUDE_REMOVED
+from models.version import Version
+from schema.inputs import CommitFilters, CommitSort
 
 if TYPE_CHECKING:  # pragma: no cover
     from schema.schema_category import GraphQLSchemaCategory
@@ -31,20 +47,70 @@ class GraphQLCommit:
     repository_id: str
     author_id: str | None
     reporting_schema_id: str
-    schema_categories: list[Annotated["GraphQLSchemaCategory", strawberry.lazy("schema.schema_category")]] | None
-    schema_elements: list[Annotated["GraphQLSchemaElement", strawberry.lazy("schema.schema_element")]] | None
-    tasks: list[Annotated["GraphQLTask", strawberry.lazy("schema.task")]] | None
     tags: list[Annotated["GraphQLTag", strawberry.lazy("schema.tag")]] | None
 
     @strawberry.field
     def short_id(self) -> str:  # pragma: no cover
         return self.id[:8] if self.id is not None else None
 
+    @strawberry.field
+    async def schema_categories(
+        self, info: Info
+    ) -> list[Annotated["GraphQLSchemaCategory", strawberry.lazy("schema.schema_category")]] | None:
+        return await get_members_loader(info, "schema_categories").load(self.id)
+
+    @strawberry.field
+    async def schema_elements(
+        self, info: Info
+    ) -> list[Annotated["GraphQLSchemaElement", strawberry.lazy("schema.schema_element")]] | None:
+        return await get_members_loader(info, "schema_elements").load(self.id)
+
+    @strawberry.field
+    async def tasks(self, info: Info) -> list[Annotated["GraphQLTask", strawberry.lazy("schema.task")]] | None:
+        return await get_members_loader(info, "tasks").load(self.id)
+
+
+@strawberry.type
+class GraphQLCommitDiff:
+    from_commit_id: str
+    to_commit_id: str
+    added_schema_categories: list[Annotated["GraphQLSchemaCategory", strawberry.lazy("schema.schema_category")]]
+    removed_schema_categories: list[Annotated["GraphQLSchemaCategory", strawberry.lazy("schema.schema_category")]]
+    modified_schema_categories: list[Annotated["GraphQLSchemaCategory", strawberry.lazy("schema.schema_category")]]
+    added_schema_elements: list[Annotated["GraphQLSchemaElement", strawberry.lazy("schema.schema_element")]]
+    removed_schema_elements: list[Annotated["GraphQLSchemaElement", strawberry.lazy("schema.schema_element")]]
+    modified_schema_elements: list[Annotated["GraphQLSchemaElement", strawberry.lazy("schema.schema_element")]]
+    added_tasks: list[Annotated["GraphQLTask", strawberry.lazy("schema.task")]]
+    removed_tasks: list[Annotated["GraphQLTask", strawberry.lazy("schema.task")]]
+    modified_tasks: list[Annotated["GraphQLTask", strawberry.lazy("schema.task")]]
+
+
+# members are reverted in this order, so tasks are deleted before the elements and categories they point at
+REVERT_MEMBERS = (
+    (models_task.Task, models_task.TaskCommitLink.task_id),
+    (models_element.SchemaElement, models_element.ElementCommitLink.schema_element_id),
+    (models_category.SchemaCategory, models_category.CategoryCommitLink.schema_category_id),
+)
+
+DIFF_MEMBERS = {
+    "schema_categories": (models_category.SchemaCategory, models_category.CategoryCommitLink.schema_category_id),
+    "schema_elements": (models_element.SchemaElement, models_element.ElementCommitLink.schema_element_id),
+    "tasks": (models_task.Task, models_task.TaskCommitLink.task_id),
+}
+
 
 async def query_commits(
-    info: Info, reporting_schema_id: str, filters: Optional[CommitFilters] = None
+    info: Info,
+    reporting_schema_id: str,
+    filters: Optional[CommitFilters] = None,
+    sort_by: Optional[CommitSort] = None,
+    first: Optional[int] = None,
+    after: Optional[str] = None,
 ) -> list[GraphQLCommit]:
-    """Get all commits of a Reporting Schema"""
+    """
+    Get the commits of a Reporting Schema, newest first unless sorted otherwise.
+    Paginate by passing the id of the last commit of a page as `after`
+    """
 
     session = get_session(info)
 
@@ -58,9 +124,19 @@ async def query_commits(
         )
     ).first()
 
-    query = select(models_commit.Commit).where(models_commit.Commit.repository_id == repository.id)
+    if sort_by:
+        keys = sort_keys(models_commit.Commit, sort_by)
+    else:
+        keys = [(col(models_commit.Commit.updated), True), (col(models_commit.Commit.id), True)]
+
+    base_query = select(models_commit.Commit).where(models_commit.Commit.repository_id == repository.id)
+    query = order_query(base_query, keys)
+    if after:
+        query = seek(query, base_query, models_commit.Commit, keys, after)
+    if first is not None:
+        query = query.limit(first)
 
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_commit.Commit)
     if filters:
         query = filter_model_query(models_commit.Commit, filters, query)
 
@@ -68,6 +144,101 @@ async def query_commits(
     return commits.all()
 
 
+async def query_commit(info: Info, reporting_schema_id: str, ref: str = "HEAD") -> GraphQLCommit:
+    """Get a commit of a Reporting Schema by a ref like `HEAD`, `HEAD~5`, a branch or tag name or a commit id"""
+
+    session = get_session(info)
+
+    await authenticate_commit(info, reporting_schema_id)
+
+    commit_id = models_repository.Repository.resolve_ref(reporting_schema_id, ref)
+    if commit_id is None:
+        raise DatabaseItemNotFound(f"Could not resolve ref: {ref}")
+
+    query = select(models_commit.Commit).where(models_commit.Commit.id == commit_id)
+    query = graphql_options(info, query, models_commit.Commit)
+
+    commit = (await session.exec(query)).first()
+    if commit is None:
+        raise DatabaseItemNotFound(f"Could not find Commit for ref: {ref}")
+    return commit
+
+
+async def query_commit_diff(info: Info, from_commit_id: str, to_commit_id: str) -> GraphQLCommitDiff:
+    """Compare the Schema Categories, Schema Elements and Tasks of two commits of a Reporting Schema"""
+
+    session = get_session(info)
+
+    query = (
+        select(models_commit.Commit.id, models_repository.Repository.reporting_schema_id)
+        .join(models_repository.Repository, models_repository.Repository.id == models_commit.Commit.repository_id)
+        .where(col(models_commit.Commit.id).in_([from_commit_id, to_commit_id]))
+    )
+    reporting_schema_ids = dict((await session.exec(query)).all())
+    if from_commit_id not in reporting_schema_ids:
+        raise DatabaseItemNotFound(f"Could not find Commit with id: {from_commit_id}")
+    if reporting_schema_ids.get(to_commit_id) != reporting_schema_ids[from_commit_id]:
+        raise DatabaseItemNotFound(
+            f"Could not find Commit with id: {to_commit_id} in the repository of {from_commit_id}"
+        )
+
+    await authenticate_commit(info, reporting_schema_ids[from_commit_id])
+
+    changes = {}
+    for name, (model, member) in DIFF_MEMBERS.items():
+        diff = models_commit.Commit.diff(member, from_commit_id, to_commit_id)
+        query = (
+            select(model, diff.c.change).join(diff, model.id == diff.c.member_id).execution_options(**INCLUDE_REMOVED)
+        )
+        for change in ("added", "removed", "modified"):
+            query = graphql_options(info, query, model, path=[to_camel_case(f"{change}_{name}")])
+
+        changes.update({f"{change.value}_{name}": [] for change in ChangeType if change != ChangeType.UNCHANGED})
+        for item, change in (await session.exec(query)).all():
+            changes[f"{change}_{name}"].append(item)
+
+    return GraphQLCommitDiff(from_commit_id=from_commit_id, to_commit_id=to_commit_id, **changes)
+
+
+def get_members_loader(info: Info, name: str) -> DataLoader:
+    """
+    Returns a DataLoader of the members of commits by commit id, with the content they had in each commit.
+    The relationships selected on the members are eager loaded.
+
+    Args:
+        info (Info): information of the field returning the members
+        name: name of the members in `DIFF_MEMBERS`
+    """
+
+    loaders = info.context.setdefault("loaders", {})
+    if (GraphQLCommit, name) not in loaders:
+        model, member = DIFF_MEMBERS[name]
+        options = field_options(model, selected_fields(info.selected_fields))
+        loaders[(GraphQLCommit, name)] = DataLoader(
+            load_fn=partial(load_commit_members, get_session(info), model, member, options=options)
+        )
+    return loaders[(GraphQLCommit, name)]
+
+
+async def load_commit_members(
+    session: AsyncSession, model: Type[SQLModel], member: InstrumentedAttribute, commit_ids: list[str], options=()
+) -> list[list[SQLModel]]:
+    """Loads the members of each commit as they were in it, see `Commit.snapshot`"""
+
+    members = []
+    for commit_id in commit_ids:
+        snapshot = models_commit.Commit.snapshot(member, commit_id)
+        query = (
+            select(model, Version.data)
+            .join(snapshot, model.id == snapshot.c.member_id)
+            .outerjoin(Version, Version.id == snapshot.c.version_id)
+            .options(*options)
+            .execution_options(**INCLUDE_REMOVED)
+        )
+        members.append([Version.restore(session, item, data) for item, data in (await session.execute(query)).all()])
+    return members
+
+
 @cached(ttl=60)
 async def authenticate_commit(info: Info, reporting_schema_id: str) -> models_schema.ReportingSchema:
     """Authenticates the user trying access a commit"""
@@ -79,33 +250,138 @@ async def authenticate_commit(info: Info, reporting_schema_id: str) -> models_sc
     return reporting_schema
 
 
-async def graphql_options(info, query):
+def retry_on_conflict(resolver):
+    """
+    Reruns a mutation that creates a commit, when a concurrent mutation moved the head of the repository first.
+    The conflict is raised to the client once `COMMIT_CONFLICT_RETRIES` retries are used up.
     """
-    Optionally "select IN" loads the needed collections of a commit
-    based on the request provided in the info
 
-    Args:
-        info (Info): request information
-        query: current query provided
+    @wraps(resolver)
+    async def _resolver(*args, **kwargs):
+        info = kwargs.get("info") or args[0]
+        for retry in range(settings.COMMIT_CONFLICT_RETRIES + 1):
+            try:
+                return await resolver(*args, **kwargs)
+            except CommitConflictError:
+                await get_session(info).rollback()
+                if retry == settings.COMMIT_CONFLICT_RETRIES:
+                    raise
+
+    return _resolver
+
+
+async def remove_members(
+    session: AsyncSession,
+    commit: models_commit.Commit,
+    categories: Sequence[models_category.SchemaCategory] = (),
+    elements: Sequence[models_element.SchemaElement] = (),
+    tasks: Sequence[models_task.Task] = (),
+):
+    """
+    Removes members from the head and records them as removed in the commit.
+    Their rows and versions are kept, so earlier commits still hold them, see `models.removable`.
+    The elements and tasks of removed categories and the tasks of removed elements are removed with them.
+    """
+
+    category_ids = [category.id for category in categories]
+    elements = {element.id: element for element in elements}
+    if category_ids:
+        query = select(models_element.SchemaElement).where(
+            col(models_element.SchemaElement.schema_category_id).in_(category_ids)
+        )
+        elements.update({element.id: element for element in (await session.exec(query)).all()})
+
+    tasks = {task.id: task for task in tasks}
+    if category_ids or elements:
+        query = select(models_task.Task).where(
+            or_(col(models_task.Task.category_id).in_(category_ids), col(models_task.Task.element_id).in_(elements))
+        )
+        tasks.update({task.id: task for task in (await session.exec(query)).all()})
 
-    Returns: updated query
+    for members, record in (
+        (categories, commit.record_category),
+        (elements.values(), commit.record_element),
+        (tasks.values(), commit.record_task),
+    ):
+        for member in members:
+            member.removed = True
+            session.add_all([member, record(member.id, ChangeType.REMOVED)])
+
+
+@retry_on_conflict
+async def revert_to_commit_mutation(info: Info, reporting_schema_id: str, ref: str) -> GraphQLCommit:
+    """
+    Make a new head commit of a Reporting Schema with the Schema Categories, Schema Elements and Tasks of an earlier
+    commit, given by a ref like `HEAD~5`, a branch or tag name or a commit id
     """
-    if commit_field := [field for field in info.selected_fields if field.name == "commits"]:
-        if category_field := [field for field in commit_field[0].selections if field.name == "categories"]:
-            if [field for field in category_field[0].selections if field.name == "elements"]:
-                query = query.options(
-                    selectinload(models_commit.Commit.schema_categories).options(
-                        selectinload(models_category.SchemaCategory.elements)
-                    )
-                )
-            else:
-                query = query.options(selectinload(models_commit.Commit.schema_categories))
-        if [field for field in commit_field[0].selections if field.name == "elements"]:
-            query = query.options(selectinload(models_commit.Commit.schema_elements))
-
-        if [field for field in commit_field[0].selections if field.name == "tasks"]:
-            query = query.options(selectinload(models_commit.Commit.tasks))
-
-        if [field for field in commit_field[0].selections if field.name == "tags"]:
-            query = query.options(selectinload(models_commit.Commit.tags))
-    return query
+
+    session = get_session(info)
+    user = get_user(info)
+
+    reporting_schema = await session.get(models_schema.ReportingSchema, reporting_schema_id)
+    if not reporting_schema:
+        raise DatabaseItemNotFound(f"Could not find Reporting Schema with id: {reporting_schema_id}")
+    await authenticate(info, reporting_schema.project_id)
+
+    target_id = models_repository.Repository.resolve_ref(reporting_schema_id, ref)
+    if target_id is None:
+        raise DatabaseItemNotFound(f"Could not resolve ref: {ref}")
+    target = (await session.exec(select(models_commit.Commit).where(models_commit.Commit.id == target_id))).first()
+    if target is None:
+        raise DatabaseItemNotFound(f"Could not find Commit for ref: {ref}")
+
+    head = await models_repository.Repository.get_head_commit(session, reporting_schema_id)
+    commit = models_commit.Commit.copy_from_parent(head, author_id=user.claims.get("oid"))
+    commit.short_id = commit.id[:8]
+    commit_id = commit.id
+    session.add(commit)
+
+    await session.flush()
+    await revert_members(session, head.id, target.id)
+    await commit.write_revert(session, head.id, target.id)
+    await models_repository.Repository.move_head(session, commit)
+    await session.commit()
+
+    query = select(models_commit.Commit).where(models_commit.Commit.id == commit_id)
+    query = graphql_options(info, query, models_commit.Commit)
+    return (await session.exec(query)).one()
+
+
+async def revert_members(session: AsyncSession, head_commit_id: str, target_commit_id: str):
+    """
+    Sets the current members of a Reporting Schema to the members of the target commit, without loading any of them.
+    Members changed since the target commit get their content back from their version in it,
+    members added since are deleted together with their links.
+    """
+
+    for model, member in REVERT_MEMBERS:
+        diff = models_commit.Commit.diff(member, head_commit_id, target_commit_id)
+        snapshot = models_commit.Commit.snapshot(member, target_commit_id)
+        pairs = (
+            select(snapshot.c.member_id, snapshot.c.version_id)
+            .join(diff, diff.c.member_id == snapshot.c.member_id)
+            .where(col(diff.c.change).in_([ChangeType.ADDED.value, ChangeType.MODIFIED.value]))
+            .subquery()
+        )
+        await Version.write_rows(session, model.__table__, pairs)
+
+    for model, member in REVERT_MEMBERS:
+        diff = models_commit.Commit.diff(member, head_commit_id, target_commit_id)
+        removed = select(diff.c.member_id).where(diff.c.change == ChangeType.REMOVED.value).cte("removed")
+        links = member.class_.__table__
+        statement = (
+            delete(model.__table__)
+            .where(model.__table__.c.id.in_(select(removed.c.member_id)))
+            .add_cte(delete(links).where(links.c[member.key].in_(select(removed.c.member_id))).returning(links).cte())
+        )
+        if model is models_task.Task:
+            # comments are kept, like when a task is deleted on its own
+            comments = models_comment.Comment.__table__
+            statement = statement.add_cte(
+                update(comments)
+                .where(comments.c.task_id.in_(select(removed.c.member_id)))
+                .values(task_id=None)
+                .returning(comments.c.id)
+                .cte()
+            )
+        await session.execute(statement)
@@ -0,0 +1,107 @@
+from collections import defaultdict
+from typing import Optional
+
+import strawberry
+from lcacollect_config.context import get_session
+from lcacollect_config.exceptions import DatabaseItemNotFound
+from sqlmodel import select
+from strawberry.types import Info
+
+import models.commit as models_commit
+import models.reporting_schema as models_schema
+import models.schema_category as models_category
+import models.schema_element as models_element
+from core.loading import field_options, nested_fields, selected_fields
+from core.validate import authenticate
+from models.removable import INCLUDE_REMOVED
+from models.version import Version
+from schema.schema_element import DEFERRED_COLUMNS, GraphQLSchemaElement
+
+
+@strawberry.type
+class GraphQLSchemaTreeNode:
+    id: str
+    name: str | None
+    path: str | None
+    description: str | None
+    depth: int
+    elements: list[GraphQLSchemaElement]
+    children: list["GraphQLSchemaTreeNode"]
+
+
+async def query_schema_tree(
+    info: Info, reporting_schema_id: str, commit_id: Optional[str] = None
+) -> list[GraphQLSchemaTreeNode]:
+    """
+    Get the Schema Categories of a Reporting Schema as a tree, each with the categories right below it
+    and its Schema Elements. Categories whose parent is not in the Reporting Schema are at the top of the tree
+    """
+
+    session = get_session(info)
+    reporting_schema = await session.get(models_schema.ReportingSchema, reporting_schema_id)
+    if not reporting_schema:
+        raise DatabaseItemNotFound(f"Could not find Reporting Schema with id: {reporting_schema_id}")
+    await authenticate(info, reporting_schema.project_id, check_public=True)
+
+    categories = await fetch_members(
+        session,
+        models_category.SchemaCategory,
+        models_category.CategoryCommitLink.schema_category_id,
+        commit_id,
+        select(models_category.SchemaCategory).where(
+            models_category.SchemaCategory.reporting_schema_id == reporting_schema_id
+        ),
+    )
+
+    elements = defaultdict(list)
+    # elements are fetched at once for all categories, with the fields selected at any depth of the tree
+    if element_fields := nested_fields(info.selected_fields, "elements"):
+        query = (
+            select(models_element.SchemaElement)
+            .join(models_category.SchemaCategory)
+            .where(models_category.SchemaCategory.reporting_schema_id == reporting_schema_id)
+            .options(*field_options(models_element.SchemaElement, selected_fields(element_fields), DEFERRED_COLUMNS))
+        )
+        for element in await fetch_members(
+            session, models_element.SchemaElement, models_element.ElementCommitLink.schema_element_id, commit_id, query
+        ):
+            elements[element.schema_category_id].append(element)
+
+    nodes = {
+        category.id: GraphQLSchemaTreeNode(
+            id=category.id,
+            name=category.name,
+            path=category.path,
+            description=category.description,
+            depth=0 if not category.path or category.path == "/" else category.path.count("/"),
+            elements=elements[category.id],
+            children=[],
+        )
+        for category in sorted(categories, key=lambda category: (category.name or "", category.id))
+    }
+
+    roots = []
+    for node in nodes.values():
+        # the last id of the path is the parent of the category
+        parent_id = (node.path or "").rstrip("/").rsplit("/", 1)[-1]
+        if parent := nodes.get(parent_id):
+            parent.children.append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+async def fetch_members(session, model, member, commit_id: Optional[str], query) -> list:
+    """Runs a query of members, reading them as they were in the commit when one is given"""
+
+    if not commit_id:
+        return (await session.exec(query)).all()
+
+    members = models_commit.Commit.snapshot(member, commit_id)
+    query = (
+        query.add_columns(Version.data)
+        .join(members, model.id == members.c.member_id)
+        .outerjoin(Version, Version.id == members.c.version_id)
+        .execution_options(**INCLUDE_REMOVED)
+    )
+    return [Version.restore(session, item, data) for item, data in (await session.execute(query)).all()]
@@ -36,9 +36,8 @@ class ReportingSchemaFilters(BaseFilter):
 
 @strawberry.input
 class ReportingSchemaSort(BaseFilter):
-    name: Optional[FilterOptions] = None
-    id: Optional[FilterOptions] = None
-    description: Optional[FilterOptions] = None
+    name: Optional[SortOptions] = None
+    id: Optional[SortOptions] = None
 
 
 @strawberry.input
@@ -50,9 +49,10 @@ class SchemaCategoryFilters(BaseFilter):
 
 @strawberry.input
 class SchemaCategorySort(BaseFilter):
-    name: Optional[FilterOptions] = None
-    id: Optional[FilterOptions] = None
-    description: Optional[FilterOptions] = None
+    name: Optional[SortOptions] = None
+    id: Optional[SortOptions] = None
+    path: Optional[SortOptions] = None
+    description: Optional[SortOptions] = None
 
 
 @strawberry.input
@@ -70,13 +70,11 @@ class SchemaElementFilters(BaseFilter):
 
 @strawberry.input
 class SchemaElementSort(BaseFilter):
-    id: Optional[FilterOptions] = None
-    name: Optional[FilterOptions] = None
-    classification: Optional[FilterOptions] = None
-    subclassification: Optional[FilterOptions] = None
-    quantity: Optional[FilterOptions] = None
-    unit: Optional[FilterOptions] = None
-    description: Optional[FilterOptions] = None
+    id: Optional[SortOptions] = None
+    name: Optional[SortOptions] = None
+    quantity: Optional[SortOptions] = None
+    unit: Optional[SortOptions] = None
+    description: Optional[SortOptions] = None
 
 
 @strawberry.input
@@ -14,8 +14,11 @@ import models.reporting_schema as models_schema
 import models.repository as models_repository
 import models.schema_category as models_category
 import models.schema_template as models_template
+from core.loading import graphql_options
+from core.pagination import order_query, sort_keys
 from core.validate import authenticate, authenticate_project
-from schema.inputs import ReportingSchemaFilters
+from models.removable import INCLUDE_REMOVED
+from schema.inputs import ReportingSchemaFilters, ReportingSchemaSort
 
 if TYPE_CHECKING:  # pragma: no cover
     from schema.schema_category import GraphQLSchemaCategory
@@ -46,7 +49,10 @@ class GraphQLReportingCreationSchema:
 
 
 async def query_reporting_schemas(
-    info: Info, project_id: str, filters: Optional[ReportingSchemaFilters] = None
+    info: Info,
+    project_id: str,
+    filters: Optional[ReportingSchemaFilters] = None,
+    sort_by: Optional[ReportingSchemaSort] = None,
 ) -> list[GraphQLReportingSchema]:
     """Query a reporting schema using project_id"""
 
@@ -59,10 +65,12 @@ async def query_reporting_schemas(
     if project_id:
         query = query.where(models_schema.ReportingSchema.project_id == project_id)
 
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_schema.ReportingSchema)
 
     if filters:
         query = filter_model_query(models_schema.ReportingSchema, filters, query)
+    if sort_by:
+        query = order_query(query, sort_keys(models_schema.ReportingSchema, sort_by))
 
     reporting_schema = (await session.exec(query)).all()
 
@@ -101,6 +109,7 @@ async def add_reporting_schema_mutation(
     )
     commit = models_commit.Commit(author_id=user.claims.get("oid"))
     repository.commits.append(commit)
+    repository.head_commit_id = commit.id
 
     session.add(commit)
     await session.commit()
@@ -144,6 +153,7 @@ async def add_reporting_schema_from_template_mutation(
     )
     commit = models_commit.Commit(author_id=user.claims.get("oid"))
     repository.commits.append(commit)
+    repository.head_commit_id = commit.id
 
     path_map = {}
     categories = []
@@ -157,7 +167,7 @@ async def add_reporting_schema_from_template_mutation(
 
     update_category_paths(categories, path_map, session)
     reporting_schema.categories = categories
-    commit.schema_categories = categories
+    commit.changed_schema_categories = categories
 
     session.add(commit)
     session.add(reporting_schema)
@@ -194,7 +204,7 @@ async def update_reporting_schema_mutation(
     await session.refresh(reporting_schema)
 
     query = select(models_schema.ReportingSchema).where(models_schema.ReportingSchema.id == reporting_schema.id)
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_schema.ReportingSchema)
     await session.exec(query)
     return reporting_schema
 
@@ -203,38 +213,15 @@ async def delete_reporting_schema_mutation(info: Info, id: str) -> str:
     """Delete a Reporting Schema"""
 
     session = get_session(info)
-    reporting_schema = await session.get(models_schema.ReportingSchema, id)
+    # removed members are loaded as well, so they are deleted together with the Reporting Schema
+    query = select(models_schema.ReportingSchema).where(models_schema.ReportingSchema.id == id)
+    reporting_schema = (await session.exec(query.execution_options(**INCLUDE_REMOVED))).one()
     await authenticate(info, reporting_schema.project_id)
     await session.delete(reporting_schema)
     await session.commit()
     return id
 
 
-async def graphql_options(info, query):
-    """
-    Optionally "select IN" loads the needed collections of a
-    Reporting Schema based on the request provided in the info
-
-    Args:
-        info (Info): request information
-        query: current query provided
-
-    Returns: updated query
-    """
-
-    if schema_field := [field for field in info.selected_fields if field.name == "reportingSchemas"]:
-        if category_field := [field for field in schema_field[0].selections if field.name == "categories"]:
-            if [field for field in category_field[0].selections if field.name == "elements"]:
-                query = query.options(
-                    selectinload(models_schema.ReportingSchema.categories).options(
-                        selectinload(models_category.SchemaCategory.elements)
-                    )
-                )
-            else:
-                query = query.options(selectinload(models_schema.ReportingSchema.categories))
-    return query
-
-
 def update_category_paths(categories, path_map, session):
     """
     Updates the Schema Category paths whenever a Reporting Schema is added
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional, Sequence
 
 import strawberry
 from lcacollect_config.context import get_session, get_user
@@ -13,8 +13,21 @@ import models.reporting_schema as models_schema
 import models.repository as models_repository
 import models.schema_category as models_category
 import models.schema_element as models_element
+from core.loading import graphql_options
+from core.pagination import (
+    PAGE_PATH,
+    PAGE_SIZE,
+    Connection,
+    SortKey,
+    order_query,
+    paginate,
+    sort_keys,
+)
 from core.validate import authenticate
-from schema.inputs import SchemaCategoryFilters
+from models.links import ChangeType
+from models.version import Version
+from schema.commit import remove_members, retry_on_conflict
+from schema.inputs import SchemaCategoryFilters, SchemaCategorySort
 
 if TYPE_CHECKING:  # pragma: no cover
     from schema.commit import GraphQLCommit
@@ -42,14 +55,71 @@ class GraphQLSchemaCategory:
     commits: list[Annotated["GraphQLCommit", strawberry.lazy("schema.commit")]] | None
 
 
+@strawberry.input
+class SchemaCategoryAddInput:
+    id: Optional[str] = None
+    name: Optional[str] = None
+    path: Optional[str] = None
+    description: Optional[str] = None
+
+
+@strawberry.input
+class SchemaCategoryUpdateInput:
+    id: str
+    name: Optional[str] = None
+    path: Optional[str] = None
+    description: Optional[str] = None
+
+
 async def query_schema_categories(
     info: Info,
     reporting_schema_id: str,
     commit_id: Optional[str] = None,
     filters: Optional[SchemaCategoryFilters] = None,
+    sort_by: Optional[SchemaCategorySort] = None,
 ) -> list[GraphQLSchemaCategory]:
     """Get all Schema Categories of a Reporting Schema"""
 
+    session = get_session(info)
+    query = await select_schema_categories(info, reporting_schema_id, commit_id, filters)
+    if sort_by:
+        query = order_query(query, category_sort_keys(commit_id, sort_by))
+    categories = await session.exec(query)
+    if commit_id:
+        return [Version.restore(session, category, data) for category, data in categories.all()]
+    return categories.all()
+
+
+async def query_schema_categories_connection(
+    info: Info,
+    reporting_schema_id: str,
+    commit_id: Optional[str] = None,
+    filters: Optional[SchemaCategoryFilters] = None,
+    sort_by: Optional[SchemaCategorySort] = None,
+    first: int = PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Connection[GraphQLSchemaCategory]:
+    """Get a page of the Schema Categories of a Reporting Schema, starting after the given cursor"""
+
+    session = get_session(info)
+    query = await select_schema_categories(info, reporting_schema_id, commit_id, filters, PAGE_PATH)
+    node = (lambda row: Version.restore(session, *row)) if commit_id else (lambda row: row)
+    keys = category_sort_keys(commit_id, sort_by)
+    return await paginate(session, query, models_category.SchemaCategory, first, after, node, keys)
+
+
+async def select_schema_categories(
+    info: Info,
+    reporting_schema_id: str,
+    commit_id: Optional[str] = None,
+    filters: Optional[SchemaCategoryFilters] = None,
+    path: Sequence[str] = (),
+):
+    """
+    Authenticates the user and returns the query of the Schema Categories of a Reporting Schema.
+    Categories read at a commit are selected together with the data of their version.
+    """
+
     session = get_session(info)
 
     auth_query = select(models_schema.ReportingSchema).where(models_schema.ReportingSchema.id == reporting_schema_id)
@@ -57,20 +127,64 @@ async def query_schema_categories(
     await authenticate(info, reporting_schema.project_id, check_public=True)
 
     if commit_id:
-        query = select(models_category.SchemaCategory).where(models_category.CategoryCommitLink.commit_id == commit_id)
+        members = models_commit.Commit.snapshot(models_category.CategoryCommitLink.schema_category_id, commit_id)
+        query = (
+            select(models_category.SchemaCategory, Version.data)
+            .join(members, models_category.SchemaCategory.id == members.c.member_id)
+            .outerjoin(Version, Version.id == members.c.version_id)
+            .where(models_category.SchemaCategory.reporting_schema_id == reporting_schema_id)
+            .execution_options(**INCLUDE_REMOVED)
+        )
     else:
         query = select(models_schema.SchemaCategory).where(
             models_category.SchemaCategory.reporting_schema_id == reporting_schema_id
         )
 
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_category.SchemaCategory, path)
 
     if filters:
         query = filter_model_query(models_category.SchemaCategory, filters, query)
-    categories = await session.exec(query)
-    return categories.all()
+    return query
+
+
+def category_sort_keys(commit_id: Optional[str], sort_by: Optional[SchemaCategorySort]) -> list[SortKey]:
+    """Keys to sort Schema Categories by. Categories read at a commit are sorted by the values of that commit"""
+
+    return sort_keys(models_category.SchemaCategory, sort_by, Version.data if commit_id else None)
+
+
+async def query_descendants(
+    info: Info, category_id: str, max_depth: Optional[int] = None
+) -> list[GraphQLSchemaCategory]:
+    """Get the Schema Categories below a Schema Category, nearest first. Limit how far down with `maxDepth`"""
+
+    session = get_session(info)
+    category = (
+        await session.exec(
+            select(models_category.SchemaCategory)
+            .where(models_category.SchemaCategory.id == category_id)
+            .options(selectinload(models_category.SchemaCategory.reporting_schema))
+        )
+    ).first()
+    if not category:
+        raise DatabaseItemNotFound(f"Could not find Schema Category with id: {category_id}")
+    await authenticate(info, category.reporting_schema.project_id, check_public=True)
+
+    closure = models_category.SchemaCategoryClosure
+    query = (
+        select(models_category.SchemaCategory)
+        .join(closure, closure.descendant_id == models_category.SchemaCategory.id)
+        .where(closure.ancestor_id == category_id, closure.depth > 0)
+        .order_by(closure.depth, models_category.SchemaCategory.path, models_category.SchemaCategory.id)
+    )
+    if max_depth is not None:
+        query = query.where(closure.depth <= max_depth)
+    query = graphql_options(info, query, models_category.SchemaCategory)
+
+    return (await session.exec(query)).all()
 
 
+@retry_on_conflict
 async def add_schema_category_mutation(
     info: Info,
     reporting_schema_id: str,
@@ -101,35 +215,23 @@ async def add_schema_category_mutation(
         reporting_schema_id=reporting_schema_id,
     )
 
-    # fetches the repository that belongs to the reporting schema
-    repository = (
-        await session.exec(
-            select(models_repository.Repository)
-            .where(models_repository.Repository.reporting_schema_id == reporting_schema.id)
-            .options(selectinload(models_repository.Repository.commits))
-            .options(selectinload(models_repository.Repository.reporting_schema))
-        )
-    ).first()
-
     # project_member_data = get_project_member(reporting_schema.project_id)
-    head_commit = (
-        await session.exec(
-            select(models_commit.Commit)
-            .where(models_commit.Commit.id == repository.head.id)
-            .options(selectinload(models_commit.Commit.schema_categories))
-            .options(selectinload(models_commit.Commit.schema_elements))
-            .options(selectinload(models_commit.Commit.tasks))
-        )
-    ).first()
+    # fetches the head commit of the repository that belongs to the reporting schema
+    head_commit = await models_repository.Repository.get_head_commit(session, reporting_schema.id)
 
-    # copies the latest commit in the repository
-    commit = models_commit.Commit.copy_from_parent(head_commit, author_id=user.claims.get("oid"))
+    # creates a child of the latest commit in the repository, or amends it when edits are coalesced
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
     commit.short_id = commit.id[:8]
-    # adds the schema category to the commit
-    commit.schema_categories.append(schema_category)
 
     session.add(commit)
     session.add(schema_category)
+    await session.flush()
+
+    # adds the schema category to the commit
+    session.add(commit.record_category(schema_category.id, ChangeType.ADDED))
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
 
     await session.commit()
     await session.refresh(commit)
@@ -138,13 +240,14 @@ async def add_schema_category_mutation(
     query = select(models_category.SchemaCategory).where(
         models_category.SchemaCategory.reporting_schema == reporting_schema
     )
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_category.SchemaCategory)
 
     await session.exec(query)
 
     return schema_category
 
 
+@retry_on_conflict
 async def update_schema_category_mutation(
     info: Info,
     id: str,
@@ -166,50 +269,37 @@ async def update_schema_category_mutation(
 
     await authenticate(info, reporting_schema.project_id)
 
-    repository = (
-        await session.exec(
-            select(models_repository.Repository)
-            .where(models_repository.Repository.reporting_schema_id == reporting_schema.id)
-            .options(selectinload(models_repository.Repository.commits))
-            .options(selectinload(models_repository.Repository.reporting_schema))
-        )
-    ).first()
-
     # fetch the latest commit
-    head_commit = (
-        await session.exec(
-            select(models_commit.Commit)
-            .where(models_commit.Commit.id == repository.head.id)
-            .options(selectinload(models_commit.Commit.schema_categories))
-            .options(selectinload(models_commit.Commit.schema_elements))
-            .options(selectinload(models_commit.Commit.tasks))
-        )
-    ).first()
+    head_commit = await models_repository.Repository.get_head_commit(session, reporting_schema.id)
 
-    commit = models_commit.Commit.copy_from_parent(head_commit, author_id=user.claims.get("oid"))
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
     commit.short_id = commit.id[:8]
-    commit.schema_categories.remove(schema_category)
 
     kwargs = {"name": name, "path": path, "description": description}
     for key, value in kwargs.items():
         if value:
             setattr(schema_category, key, value)
 
-    commit.schema_categories.append(schema_category)
     session.add(commit)
     session.add(schema_category)
+    await session.flush()
+    session.add(commit.record_category(schema_category.id, ChangeType.MODIFIED))
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
 
     await session.commit()
     await session.refresh(commit)
     await session.refresh(schema_category)
 
     query = select(models_category.SchemaCategory).where(models_category.SchemaCategory.id == id)
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_category.SchemaCategory)
     await session.exec(query)
 
     return schema_category
 
 
+@retry_on_conflict
 async def delete_schema_category_mutation(info: Info, id: str) -> str:
     """Delete a Schema Category"""
 
@@ -233,75 +323,22 @@ async def delete_schema_category_mutation(info: Info, id: str) -> str:
 
     await authenticate(info, reporting_schema.project_id)
 
-    repository = (
-        await session.exec(
-            select(models_repository.Repository)
-            .where(models_repository.Repository.reporting_schema_id == reporting_schema.id)
-            .options(selectinload(models_repository.Repository.commits))
-            .options(selectinload(models_repository.Repository.reporting_schema))
-        )
-    ).first()
-
-    head_commit = (
-        await session.exec(
-            select(models_commit.Commit)
-            .where(models_commit.Commit.id == repository.head.id)
-            .options(selectinload(models_commit.Commit.schema_categories))
-            .options(selectinload(models_commit.Commit.schema_elements))
-            .options(selectinload(models_commit.Commit.tasks))
-        )
-    ).first()
+    head_commit = await models_repository.Repository.get_head_commit(session, reporting_schema.id)
 
-    elements = (
-        await session.exec(
-            select(models_element.SchemaElement)
-            .where(models_element.SchemaElement.schema_category_id == id)
-            .options(selectinload(models_element.SchemaElement.schema_category))
-            .options(selectinload(models_element.SchemaElement.commits))
-        )
-    ).all()
-
-    commit = models_commit.Commit.copy_from_parent(head_commit, author_id=user.claims.get("oid"))
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
     commit.short_id = commit.id[:8]
-    commit.schema_categories.remove(schema_category)
-
-    for element in elements:
-        commit.schema_elements.remove(element)
-        await session.delete(element)
 
     session.add(commit)
-
-    await session.commit()
-    await session.refresh(commit)
-
-    await session.delete(schema_category)
+    # the elements of the category are removed with it
+    await remove_members(session, commit, categories=[schema_category])
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
     await session.commit()
 
     return id
 
 
-async def graphql_options(info, query):
-    """
-    Optionally "select IN" loads the needed collections of a Schema Category
-    based on the request provided in the info
-
-    Args:
-        info (Info): request information
-        query: current query provided
-
-    Returns: updated query
-    """
-
-    if category_field := [field for field in info.selected_fields if field.name == "schemaCategories"]:
-        if [field for field in category_field[0].selections if field.name == "commits"]:
-            query = query.options(selectinload(models_category.SchemaCategory.commits))
-        if [field for field in category_field[0].selections if field.name == "elements"]:
-            query = query.options(selectinload(models_category.SchemaCategory.elements))
-        if [field for field in category_field[0].selections if field.name == "reportingSchema"]:
-            query = query.options(selectinload(models_category.SchemaCategory.reporting_schema))
-    return query
-
-
 def is_project_member(info: Info, members) -> bool:
     user = info.context.get("user")
     for member in members:
@@ -1,8 +1,9 @@
 from enum import Enum
-from typing import TYPE_CHECKING, Annotated, Optional, Union
+from typing import TYPE_CHECKING, Annotated, Optional, Sequence, Union
 
 import strawberry
 from fastapi import HTTPException
+from graphql import GraphQLResolveInfo
 from lcacollect_config.context import get_session, get_user
 from lcacollect_config.exceptions import DatabaseItemNotFound
 from lcacollect_config.graphql.input_filters import filter_model_query
@@ -19,9 +20,22 @@ import models.schema_category as models_category
 import models.schema_element as models_element
 import models.source as models_source
 import schema.source as schema_source
+from core.loading import get_entity_loader, graphql_options
+from core.pagination import (
+    PAGE_PATH,
+    PAGE_SIZE,
+    Connection,
+    SortKey,
+    order_query,
+    paginate,
+    sort_keys,
+)
 from core.validate import authenticate
 from exceptions import SourceElementCreationError
-from schema.inputs import SchemaElementFilters
+from models.links import ChangeType
+from models.version import Version
+from schema.commit import remove_members, retry_on_conflict
+from schema.inputs import SchemaElementFilters, SchemaElementSort
 
 if TYPE_CHECKING:  # pragma: no cover
     from schema.commit import GraphQLCommit
@@ -36,6 +50,9 @@ MATERIALS_MAPPING = {
     "@columns": "Steel",
 }
 
+# large JSON columns, only read when one of the fields needing them is selected
+DEFERRED_COLUMNS = {"result": {"result"}, "meta_fields": set()}
+
 
 @strawberry.enum
 class Unit(Enum):
@@ -60,6 +77,16 @@ class GraphQLSchemaElement:
     assembly_id: str | None = strawberry.federation.field(shareable=True)
     result: JSON | None
 
+    @classmethod
+    async def resolve_reference(
+        cls, info: GraphQLResolveInfo, id: strawberry.ID
+    ) -> Optional[models_element.SchemaElement]:
+        return await get_entity_loader(info, models_element.SchemaElement, cls.__strawberry_definition__.name).load(id)
+
+    @classmethod
+    def is_type_of(cls, obj, info: GraphQLResolveInfo) -> bool:
+        return isinstance(obj, (cls, models_element.SchemaElement))
+
 
 async def query_schema_elements(
     info: Info,
@@ -67,8 +94,52 @@ async def query_schema_elements(
     element_id: Optional[str] = None,
     commit_id: Optional[str] = None,
     filters: Optional[SchemaElementFilters] = None,
+    sort_by: Optional[SchemaElementSort] = None,
 ) -> list[GraphQLSchemaElement]:
     """Get all schema elements for a list of categories"""
+
+    session = get_session(info)
+    query = await select_schema_elements(info, schema_category_ids, element_id, commit_id, filters)
+    if sort_by:
+        query = order_query(query, element_sort_keys(commit_id, sort_by))
+    elements = await session.exec(query)
+    if commit_id:
+        return [Version.restore(session, element, data) for element, data in elements.all()]
+    return elements.all()
+
+
+async def query_schema_elements_connection(
+    info: Info,
+    schema_category_ids: list[str],
+    element_id: Optional[str] = None,
+    commit_id: Optional[str] = None,
+    filters: Optional[SchemaElementFilters] = None,
+    sort_by: Optional[SchemaElementSort] = None,
+    first: int = PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Connection[GraphQLSchemaElement]:
+    """Get a page of the schema elements for a list of categories, starting after the given cursor"""
+
+    session = get_session(info)
+    query = await select_schema_elements(info, schema_category_ids, element_id, commit_id, filters, PAGE_PATH)
+    node = (lambda row: Version.restore(session, *row)) if commit_id else (lambda row: row)
+    keys = element_sort_keys(commit_id, sort_by)
+    return await paginate(session, query, models_element.SchemaElement, first, after, node, keys)
+
+
+async def select_schema_elements(
+    info: Info,
+    schema_category_ids: list[str],
+    element_id: Optional[str] = None,
+    commit_id: Optional[str] = None,
+    filters: Optional[SchemaElementFilters] = None,
+    path: Sequence[str] = (),
+):
+    """
+    Authenticates the user and returns the query of the schema elements for a list of categories.
+    Elements read at a commit are selected together with the data of their version.
+    """
+
     session = get_session(info)
 
     schema_category = (
@@ -83,7 +154,16 @@ async def query_schema_elements(
         await authenticate(info, schema_category.reporting_schema.project_id, check_public=True)
 
     if commit_id:
-        query = select(models_element.SchemaElement).where(models_element.ElementCommitLink.commit_id == commit_id)
+        members = models_commit.Commit.snapshot(models_element.ElementCommitLink.schema_element_id, commit_id)
+        reporting_schema_id = schema_category.reporting_schema_id if schema_category else None
+        query = (
+            select(models_element.SchemaElement, Version.data)
+            .join(members, models_element.SchemaElement.id == members.c.member_id)
+            .outerjoin(Version, Version.id == members.c.version_id)
+            .join(models_category.SchemaCategory)
+            .where(models_category.SchemaCategory.reporting_schema_id == reporting_schema_id)
+            .execution_options(**INCLUDE_REMOVED)
+        )
     elif element_id:
         query = select(models_element.SchemaElement).where(models_element.SchemaElement.id == element_id)
     else:
@@ -91,15 +171,20 @@ async def query_schema_elements(
             col(models_element.SchemaElement.schema_category_id).in_(schema_category_ids)
         )
 
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_element.SchemaElement, path, deferred=DEFERRED_COLUMNS)
 
     if filters:
         query = filter_model_query(models_category.SchemaElement, filters, query)
+    return query
 
-    elements = await session.exec(query)
-    return elements.all()
 
+def element_sort_keys(commit_id: Optional[str], sort_by: Optional[SchemaElementSort]) -> list[SortKey]:
+    """Keys to sort schema elements by. Elements read at a commit are sorted by the values of that commit"""
+
+    return sort_keys(models_element.SchemaElement, sort_by, Version.data if commit_id else None)
 
+
+@retry_on_conflict
 async def add_schema_element_mutation(
     info: Info,
     schema_category_id: str,
@@ -125,9 +210,13 @@ async def add_schema_element_mutation(
     )
 
     # adds the schema element to the commit
-    commit.schema_elements.append(schema_element)
     session.add(commit)
     session.add(schema_element)
+    await session.flush()
+    session.add(commit.record_element(schema_element.id, ChangeType.ADDED))
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
     await session.commit()
     await session.refresh(commit)
     await session.refresh(schema_element)
@@ -135,13 +224,24 @@ async def add_schema_element_mutation(
     query = select(models_element.SchemaElement).where(
         models_element.SchemaElement.schema_category_id == schema_category_id
     )
-    query = await graphql_options(info, query, "addSchemaElement")
+    query = graphql_options(info, query, models_element.SchemaElement)
 
     await session.exec(query)
 
     return schema_element
 
 
+@strawberry.input()
+class SchemaElementAddInput:
+    schema_category_id: str
+    name: str
+    quantity: float
+    unit: Unit
+    description: str
+    id: Optional[str] = None
+    assembly_id: Optional[str] = None
+
+
 @strawberry.input()
 class SchemaElementUpdateInput:
     id: str
@@ -154,6 +254,7 @@ class SchemaElementUpdateInput:
     assembly_id: Optional[str] = None
 
 
+@retry_on_conflict
 async def update_schema_elements_mutation(
     info: Info,
     schema_elements: list[SchemaElementUpdateInput],
@@ -166,21 +267,27 @@ async def update_schema_elements_mutation(
     commit, schema_category, _ = await fetch_models(info, schema_element.schema_category_id)
     await authenticate(info, schema_category.reporting_schema.project_id)
 
+    session.add(commit)
+    await session.flush()
+
     schema_element_models = [
         await update_schema_element_model(session, commit, schema_element_input)
         for schema_element_input in schema_elements
     ]
 
-    session.add(commit)
-
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
+    schema_element_ids = [schema_element.id for schema_element in schema_element_models]
     await session.commit()
-    await session.refresh(commit)
-    [await session.refresh(schema_element) for schema_element in schema_element_models]
 
-    query = select(models_element.SchemaElement).where(
-        col(models_element.SchemaElement.id).in_([schema_element.id for schema_element in schema_element_models])
+    # reloads the elements in one query, instead of refreshing them one by one
+    query = (
+        select(models_element.SchemaElement)
+        .where(col(models_element.SchemaElement.id).in_(schema_element_ids))
+        .execution_options(populate_existing=True)
     )
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_element.SchemaElement)
 
     _schema_elements = (await session.exec(query)).all()
     return _schema_elements
@@ -194,7 +301,18 @@ async def update_schema_element_model(
     if not schema_element:
         raise DatabaseItemNotFound(f"Could not find Schema Element with id: {schema_element_input.id}")
 
-    commit.schema_elements.remove(schema_element)
+    update_schema_element_fields(schema_element, schema_element_input)
+
+    session.add(schema_element)
+    session.add(commit.record_element(schema_element.id, ChangeType.MODIFIED))
+
+    return schema_element
+
+
+def update_schema_element_fields(
+    schema_element: models_element.SchemaElement, schema_element_input: SchemaElementUpdateInput
+) -> models_element.SchemaElement:
+    """Sets the fields of a Schema Element that are given in the input"""
 
     kwargs = {
         "name": schema_element_input.name,
@@ -210,12 +328,10 @@ async def update_schema_element_model(
         if value:
             setattr(schema_element, key, value)
 
-    commit.schema_elements.append(schema_element)
-    session.add(schema_element)
-
     return schema_element
 
 
+@retry_on_conflict
 async def delete_schema_element_mutation(info: Info, id: str) -> str:
     """Delete a Schema Element"""
 
@@ -236,45 +352,17 @@ async def delete_schema_element_mutation(info: Info, id: str) -> str:
     commit, schema_category, _ = await fetch_models(info, schema_element.schema_category_id)
     await authenticate(info, schema_category.reporting_schema.project_id)
 
-    try:
-        commit.schema_elements.remove(schema_element)
-    except ValueError as err:
-        pass
-    else:
-        session.add(commit)
-
-        await session.commit()
-        await session.refresh(commit)
-
-    await session.delete(schema_element)
+    session.add(commit)
+    await remove_members(session, commit, elements=[schema_element])
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
     await session.commit()
 
     return id
 
 
-async def graphql_options(info, query, base_field: str = "schemaElements"):
-    """
-    Optionally "select IN" loads the needed collections of a
-    Schema Element based on the request provided in the info
-
-    Args:
-        info (Info): request information
-        query: current query provided
-        base_field: base field to look up in
-
-    Returns: updated query
-    """
-
-    if element_field := [field for field in info.selected_fields if field.name == base_field]:
-        if [field for field in element_field[0].selections if field.name == "commits"]:
-            query = query.options(selectinload(models_element.SchemaElement.commits))
-        if [field for field in element_field[0].selections if field.name == "schemaCategory"]:
-            query = query.options(selectinload(models_element.SchemaElement.schema_category))
-        if [field for field in element_field[0].selections if field.name == "source"]:
-            query = query.options(selectinload(models_element.SchemaElement.source))
-    return query
-
-
+@retry_on_conflict
 async def add_schema_element_from_source_mutation(
     info: Info,
     schema_category_ids: list[str],
@@ -299,11 +387,14 @@ async def add_schema_element_from_source_mutation(
             f"Can not add elements from source: {source.id} with source type: {source.type}"
         )
 
-    for schema_element in elements:
-        commit.schema_elements.append(schema_element)
-        session.add(schema_element)
-
     session.add(commit)
+    session.add_all(elements)
+    await session.flush()
+    session.add_all([commit.record_element(schema_element.id, ChangeType.ADDED) for schema_element in elements])
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
+
     await session.commit()
     await session.refresh(commit)
     [await session.refresh(element) for element in elements]
@@ -311,7 +402,7 @@ async def add_schema_element_from_source_mutation(
     query = select(models_element.SchemaElement).where(
         col(models_element.SchemaElement.id).in_([element.id for element in elements])
     )
-    query = await graphql_options(info, query, "addSchemaElementFromSource")
+    query = graphql_options(info, query, models_element.SchemaElement)
 
     elements = (await session.exec(query)).all()
     return elements
@@ -325,10 +416,9 @@ async def fetch_models(
     user = get_user(info)
 
     schema_category = await get_category(session, schema_category_id)
-    repository = await get_repository(session, schema_category.reporting_schema.id)
-    head_commit = await get_head_commit(session, repository.head.id)
+    head_commit = await models_repository.Repository.get_head_commit(session, schema_category.reporting_schema_id)
 
-    commit = models_commit.Commit.copy_from_parent(head_commit, author_id=user.claims.get("oid"))
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
     commit.short_id = commit.id[:8]
 
     return commit, schema_category, session
@@ -344,30 +434,6 @@ async def get_category(session: AsyncSession, schema_category_id: str) -> models
     return category.one()
 
 
-async def get_repository(session: AsyncSession, repository_id: str) -> models_repository.Repository:
-    query = (
-        select(models_repository.Repository)
-        .where(models_repository.Repository.reporting_schema_id == repository_id)
-        .options(selectinload(models_repository.Repository.commits))
-        .options(selectinload(models_repository.Repository.reporting_schema))
-    )
-    repository = await session.exec(query)
-    return repository.one()
-
-
-async def get_head_commit(session: AsyncSession, head_id: str) -> models_commit.Commit:
-    query = (
-        select(models_commit.Commit)
-        .where(models_commit.Commit.id == head_id)
-        .options(selectinload(models_commit.Commit.schema_categories))
-        .options(selectinload(models_commit.Commit.schema_elements))
-        .options(selectinload(models_commit.Commit.tasks))
-    )
-    commit = await session.exec(query)
-
-    return commit.one()
-
-
 async def speckle_to_elements(elements, object_ids, schema_category, schema_category_id, source):
     """
     Converts Speckle Objects to Schema Elements
@@ -3,7 +3,7 @@ from typing import Optional
 import strawberry
 from lcacollect_config.exceptions import DatabaseItemNotFound
 from lcacollect_config.graphql.input_filters import filter_model_query
-from sqlalchemy.orm import Query, selectinload
+from sqlalchemy.orm import Query
 from sqlmodel import select
 from strawberry.types import Info
 
@@ -11,6 +11,7 @@ import models.reporting_schema as models_reporting
 import models.schema_category as models_category
 import models.schema_template as models_template
 import schema.reporting_schema as schema_reporting
+from core.loading import graphql_options
 from schema.inputs import SchemaTemplateFilters
 
 
@@ -191,18 +192,9 @@ def is_project_member(info: Info, members) -> bool:
 
 
 def check_return_values(info: Info, query: Query) -> Query:
-    joined_query = query
+    """Eager loads what is requested of the Schema Templates, only the template schemas are returned with them"""
+
     for field in info.selected_fields:
-        for template_fields in field.selections:
-            if template_fields.name == "schemas":
-                joined_query = query.options(selectinload(models_template.SchemaTemplate.schemas)).where(
-                    models_reporting.ReportingSchema.project_id == None
-                )
-                for schema_field in template_fields.selections:
-                    if schema_field.name == "categories":
-                        joined_query = query.options(
-                            selectinload(models_template.SchemaTemplate.schemas).selectinload(
-                                models_reporting.ReportingSchema.categories
-                            )
-                        ).where(models_reporting.ReportingSchema.project_id == None)
-    return joined_query
+        if [template_field for template_field in field.selections if template_field.name == "schemas"]:
+            query = query.where(models_reporting.ReportingSchema.project_id == None)
+    return graphql_options(info, query, models_template.SchemaTemplate)
@@ -0,0 +1,137 @@
+import re
+from typing import Sequence, Type
+
+import strawberry
+from lcacollect_config.context import get_session
+from sqlalchemy import column, func, literal, literal_column, or_, table
+from sqlalchemy.sql.expression import ColumnElement
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from strawberry.types import Info
+
+import models.reporting_schema as models_schema
+import models.schema_category as models_category
+import models.schema_element as models_element
+import models.task as models_task
+from core.loading import graphql_options
+from core.validate import authenticate
+from models.search import SEARCH_CONFIG
+from schema.schema_category import GraphQLSchemaCategory
+from schema.schema_element import GraphQLSchemaElement
+from schema.task import GraphQLTask
+
+# number of results of each kind, when not given
+SEARCH_LIMIT = 20
+# word similarity from which a name is spelled like the searched text, the pg_trgm default of 0.6 misses most typos
+SEARCH_SIMILARITY = 0.5
+
+
+@strawberry.type
+class GraphQLSearchResults:
+    schema_elements: list[GraphQLSchemaElement]
+    schema_categories: list[GraphQLSchemaCategory]
+    tasks: list[GraphQLTask]
+
+
+async def query_search(info: Info, project_id: str, text: str, limit: int = SEARCH_LIMIT) -> GraphQLSearchResults:
+    """
+    Search the Schema Elements, Schema Categories and Tasks of a project by their name and description.
+    Items match when their words start with the words searched for, or when their name is spelled like them.
+    Results are ordered by how well they match, best first
+    """
+
+    session = get_session(info)
+    await authenticate(info, project_id, check_public=True)
+    fuzzy = await use_trigrams(session)
+
+    schemas = select(models_schema.ReportingSchema.id).where(models_schema.ReportingSchema.project_id == project_id)
+    element_query = select(models_element.SchemaElement).join(models_category.SchemaCategory)
+
+    return GraphQLSearchResults(
+        schema_elements=await search_items(
+            info,
+            session,
+            element_query.where(col(models_category.SchemaCategory.reporting_schema_id).in_(schemas)),
+            models_element.SchemaElement,
+            text,
+            limit,
+            fuzzy,
+            ("schemaElements",),
+        ),
+        schema_categories=await search_items(
+            info,
+            session,
+            select(models_category.SchemaCategory).where(
+                col(models_category.SchemaCategory.reporting_schema_id).in_(schemas)
+            ),
+            models_category.SchemaCategory,
+            text,
+            limit,
+            fuzzy,
+            ("schemaCategories",),
+        ),
+        tasks=await search_items(
+            info,
+            session,
+            select(models_task.Task).where(col(models_task.Task.reporting_schema_id).in_(schemas)),
+            models_task.Task,
+            text,
+            limit,
+            fuzzy,
+            ("tasks",),
+        ),
+    )
+
+
+async def search_items(
+    info: Info,
+    session: AsyncSession,
+    query,
+    model: Type[SQLModel],
+    text: str,
+    limit: int,
+    fuzzy: bool,
+    path: Sequence[str],
+) -> list:
+    """
+    Returns the best matches of a search among the items of a query, using the search vector and, when fuzzy,
+    the spelling of the name of the model. Both conditions are answered by the GIN indexes of the model,
+    see `models.search.searchable`
+    """
+
+    vector = model.__table__.c.search_vector
+    words = prefix_query(text)
+    name = col(model.name)
+
+    rank = func.ts_rank(vector, words)
+    if fuzzy:
+        query = query.where(or_(vector.op("@@")(words), literal(text).op("<%")(name)))
+        rank = rank + func.word_similarity(text, func.coalesce(name, ""))
+    else:
+        query = query.where(vector.op("@@")(words))
+    query = query.order_by(rank.desc(), col(model.id))
+    query = graphql_options(info, query, model, path)
+
+    return (await session.exec(query.limit(limit))).all()
+
+
+async def use_trigrams(session: AsyncSession) -> bool:
+    """
+    Checks whether the optional pg_trgm extension is installed and sets the similarity names are matched with,
+    for the rest of the transaction
+    """
+
+    extensions = table("pg_extension", column("extname"))
+    installed = (await session.execute(select(extensions).where(extensions.c.extname == "pg_trgm"))).first()
+    if installed:
+        await session.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(SEARCH_SIMILARITY), True))
+        )
+    return bool(installed)
+
+
+def prefix_query(text: str) -> ColumnElement:
+    """Text search query matching the words that start with each of the words of the text"""
+
+    words = re.findall(r"\w+", text)
+    return func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), " & ".join(f"{word}:*" for word in words))
@@ -3,22 +3,25 @@ import datetime
 import logging
 from enum import Enum
 from hashlib import sha256
-from typing import TYPE_CHECKING, Annotated, Optional
+from typing import TYPE_CHECKING, Annotated, Optional, Sequence
 
 import strawberry
 from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
 from azure.storage.blob.aio import BlobClient
+from graphql import GraphQLResolveInfo
 from lcacollect_config.context import get_session, get_user
 from lcacollect_config.exceptions import DatabaseItemNotFound
 from lcacollect_config.graphql.input_filters import filter_model_query
-from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 from strawberry.scalars import JSON
 from strawberry.types import Info
 
 import models.source as models_source
 from core.config import settings
+from core.loading import get_entity_loader, graphql_options
+from core.pagination import PAGE_PATH, PAGE_SIZE, Connection, paginate
 from core.validate import authenticate, authenticate_project
 from schema.inputs import ProjectSourceFilters
 
@@ -28,6 +31,9 @@ if TYPE_CHECKING:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
+# large JSON columns, only read when one of the fields needing them is selected
+DEFERRED_COLUMNS = {"meta_fields": {"metaFields", "fileUrl"}, "interpretation": {"interpretation"}}
+
 
 @strawberry.enum
 class ProjectSourceType(Enum):
@@ -55,6 +61,16 @@ class GraphQLProjectSource:
     updated: datetime.datetime
     elements: list[Annotated["GraphQLSchemaElement", strawberry.lazy("schema.schema_element")]] | None
 
+    @classmethod
+    async def resolve_reference(
+        cls, info: GraphQLResolveInfo, id: strawberry.ID
+    ) -> Optional[models_source.ProjectSource]:
+        return await get_entity_loader(info, models_source.ProjectSource, cls.__strawberry_definition__.name).load(id)
+
+    @classmethod
+    def is_type_of(cls, obj, info: GraphQLResolveInfo) -> bool:
+        return isinstance(obj, (cls, models_source.ProjectSource))
+
     @strawberry.field
     def file_url(self) -> str | None:
         if self.type in (ProjectSourceType.CSV.value, ProjectSourceType.XLSX.value):
@@ -74,15 +90,7 @@ async def project_sources_query(
 
     session = get_session(info)
 
-    query = select(models_source.ProjectSource)
-    if project_id:
-        query = query.where(models_source.ProjectSource.project_id == project_id)
-    if [field for field in info.selected_fields if field.name == "elements"]:
-        query = query.options(selectinload(models_source.ProjectSource.elements))
-
-    if filters:
-        query = filter_model_query(models_source.ProjectSource, filters, query)
-
+    query = select_project_sources(info, project_id, filters)
     sources = (await session.exec(query)).all()
 
     await authenticate_project(info, project_id or sources[0].project_id)
@@ -91,6 +99,47 @@ async def project_sources_query(
     return sources
 
 
+async def project_sources_connection_query(
+    info: Info,
+    project_id: str,
+    filters: Optional[ProjectSourceFilters] = None,
+    first: int = PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Connection[GraphQLProjectSource]:
+    """Get a page of the sources associated with a project, starting after the given cursor"""
+
+    session = get_session(info)
+    connection = await paginate(
+        session,
+        select_project_sources(info, project_id, filters, PAGE_PATH),
+        models_source.ProjectSource,
+        first,
+        after,
+    )
+
+    if project_id or connection.edges:
+        _project_id = project_id or connection.edges[0].node.project_id
+        await authenticate_project(info, _project_id)
+        _ = await authenticate(info, _project_id, check_public=True)
+
+    return connection
+
+
+def select_project_sources(
+    info: Info, project_id: str, filters: Optional[ProjectSourceFilters] = None, path: Sequence[str] = ()
+) -> SelectOfScalar:
+    """Returns the query of the sources associated with a project"""
+
+    query = select(models_source.ProjectSource)
+    if project_id:
+        query = query.where(models_source.ProjectSource.project_id == project_id)
+    query = graphql_options(info, query, models_source.ProjectSource, path, deferred=DEFERRED_COLUMNS)
+
+    if filters:
+        query = filter_model_query(models_source.ProjectSource, filters, query)
+    return query
+
+
 async def add_project_source_mutation(
     info: Info,
     project_id: str,
@@ -1,5 +1,5 @@
 import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Optional, Sequence
 
 import strawberry
 from aiocache import Cache, cached
@@ -8,12 +8,15 @@ from lcacollect_config.exceptions import DatabaseItemNotFound
 from lcacollect_config.graphql.input_filters import filter_model_query
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
 from strawberry.types import Info
 
 import models.commit as models_commit
 import models.reporting_schema as models_schema
 import models.repository as models_repository
 import models.tag as models_tag
+from core.loading import graphql_options
+from core.pagination import PAGE_PATH, PAGE_SIZE, Connection, paginate
 from core.validate import authenticate
 from schema.inputs import TagFilters
 
@@ -36,20 +39,38 @@ async def query_tags(info: Info, reporting_schema_id: str, filters: Optional[Tag
     """Get all tags"""
 
     session = get_session(info)
-    reporting_schema = await session.get(models_schema.ReportingSchema, reporting_schema_id)
+    query = await select_tags(info, reporting_schema_id, filters)
+    tags = (await session.exec(query)).all()
+
+    return tags
+
+
+async def query_tags_connection(
+    info: Info,
+    reporting_schema_id: str,
+    filters: Optional[TagFilters] = None,
+    first: int = PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Connection[GraphQLTag]:
+    """Get a page of the tags, starting after the given cursor"""
+
+    query = await select_tags(info, reporting_schema_id, filters, PAGE_PATH)
+    return await paginate(get_session(info), query, models_tag.Tag, first, after)
+
+
+async def select_tags(
+    info: Info, reporting_schema_id: str, filters: Optional[TagFilters] = None, path: Sequence[str] = ()
+) -> SelectOfScalar:
+    """Authenticates the user and returns the query of the tags"""
+
+    reporting_schema = await get_session(info).get(models_schema.ReportingSchema, reporting_schema_id)
     await authenticate(info, reporting_schema.project_id)
 
-    query = select(models_tag.Tag)
-    if tags_field := [field for field in info.selected_fields if field.name == "tags"]:
-        if [field for field in tags_field[0].selections if field.name == "commit"]:
-            query = query.options(selectinload(models_tag.Tag.commit))
+    query = graphql_options(info, select(models_tag.Tag), models_tag.Tag, path)
 
     if filters:
         query = filter_model_query(models_tag.Tag, filters, query)
-
-    tags = (await session.exec(query)).all()
-
-    return tags
+    return query
 
 
 async def update_tag(info: Info, id: str, name: Optional[str] = None, commit_id: Optional[str] = None) -> GraphQLTag:
@@ -98,10 +119,7 @@ async def create_tag(info: Info, name: str, commit_id: str) -> GraphQLTag:
     await session.refresh(tag)
 
     query = select(models_tag.Tag).where(models_tag.Tag.id == tag.id)
-
-    if tags_field := [field for field in info.selected_fields if field.name == "createTag"]:
-        if [field for field in tags_field[0].selections if field.name == "commit"]:
-            query = query.options(selectinload(models_tag.Tag.commit))
+    query = graphql_options(info, query, models_tag.Tag)
 
     await session.exec(query)
     return tag
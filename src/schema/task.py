@@ -1,8 +1,9 @@
 import datetime
 from enum import Enum
-from typing import TYPE_CHECKING, Annotated, Optional, Union
+from typing import TYPE_CHECKING, Annotated, Optional, Sequence, Union
 
 import strawberry
+from graphql import GraphQLResolveInfo
 from lcacollect_config.context import get_session, get_user
 from lcacollect_config.email import EmailType, send_email
 from lcacollect_config.exceptions import DatabaseItemNotFound
@@ -18,7 +19,13 @@ import models.repository as models_repository
 import models.schema_category as models_category
 import models.schema_element as models_element
 import models.task as models_task
+from core.loading import get_entity_loader, get_loader, graphql_options
+from core.pagination import PAGE_PATH, PAGE_SIZE, Connection, paginate
 from core.validate import authenticate, authenticate_group
+from models.links import ChangeType
+from models.removable import INCLUDE_REMOVED
+from models.version import Version
+from schema.commit import remove_members, retry_on_conflict
 from schema.inputs import TaskFilters
 from schema.schema_category import GraphQLSchemaCategory
 from schema.schema_element import GraphQLSchemaElement
@@ -61,6 +68,28 @@ class GraphQLAssignee:
     type: AssigneeType
 
 
+@strawberry.input
+class TaskAddInput:
+    name: str
+    due_date: datetime.date
+    item: GraphQLTaskItem
+    description: str
+    status: TaskStatus
+    id: Optional[str] = None
+    assignee: Optional[GraphQLAssignee] = None
+
+
+@strawberry.input
+class TaskUpdateInput:
+    id: str
+    name: Optional[str] = None
+    due_date: Optional[datetime.date] = None
+    item: Optional[GraphQLTaskItem] = None
+    description: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    assignee: Optional[GraphQLAssignee] = None
+
+
 @strawberry.federation.type(keys=["id"])
 class GraphQLTask:
     id: strawberry.ID
@@ -76,21 +105,28 @@ class GraphQLTask:
     assignee_id: str | None = strawberry.federation.field(shareable=True)
     assigned_group_id: str | None = strawberry.federation.field(shareable=True)
 
+    @classmethod
+    async def resolve_reference(cls, info: GraphQLResolveInfo, id: strawberry.ID) -> Optional[models_task.Task]:
+        return await get_entity_loader(info, models_task.Task, cls.__strawberry_definition__.name).load(id)
+
+    @classmethod
+    def is_type_of(cls, obj, info: GraphQLResolveInfo) -> bool:
+        return isinstance(obj, (cls, models_task.Task))
+
     @strawberry.field
     async def item(self, info: Info) -> Union[GraphQLSchemaElement, GraphQLSchemaCategory]:
-        session = info.context.get("session")
         if self.category_id:
-            schema_category = await session.get(models_category.SchemaCategory, self.category_id)
+            schema_category = await get_loader(info, models_category.SchemaCategory).load(self.category_id)
             return GraphQLSchemaCategory(
-                **schema_category.dict(),
+                **schema_category.dict(exclude={"removed"}),
                 elements=[],
                 commits=[],
                 reporting_schema=None,
             )
         else:
-            schema_element = await session.get(models_category.SchemaElement, self.element_id)
+            schema_element = await get_loader(info, models_element.SchemaElement).load(self.element_id)
             return GraphQLSchemaElement(
-                **schema_element.dict(exclude={"schema_category_id", "source_id", "meta_fields"}),
+                **schema_element.dict(exclude={"schema_category_id", "source_id", "meta_fields", "removed"}),
                 schema_category=None,
                 source=None,
                 commits=[],
@@ -106,25 +142,67 @@ async def query_tasks(
     """Get all tasks connected to a reporting schema"""
 
     session = get_session(info)
+    tasks = await session.exec(select_tasks(info, reporting_schema_id, commit_id, filters))
+    if commit_id:
+        return [Version.restore(session, task, data) for task, data in tasks.all()]
+    return tasks.all()
+
+
+async def query_tasks_connection(
+    info: Info,
+    reporting_schema_id: str,
+    commit_id: Optional[str] = None,
+    filters: Optional[TaskFilters] = None,
+    first: int = PAGE_SIZE,
+    after: Optional[str] = None,
+) -> Connection[GraphQLTask]:
+    """Get a page of the tasks connected to a reporting schema, starting after the given cursor"""
+
+    session = get_session(info)
+    query = select_tasks(info, reporting_schema_id, commit_id, filters, PAGE_PATH)
+    node = (lambda row: Version.restore(session, *row)) if commit_id else (lambda row: row)
+    return await paginate(session, query, models_task.Task, first, after, node)
+
+
+def select_tasks(
+    info: Info,
+    reporting_schema_id: str,
+    commit_id: Optional[str] = None,
+    filters: Optional[TaskFilters] = None,
+    path: Sequence[str] = (),
+):
+    """
+    Returns the query of the tasks connected to a reporting schema.
+    Tasks read at a commit are selected together with the data of their version.
+    """
+
     # auth_query = select(models_schema.ReportingSchema).where(models_schema.ReportingSchema.id == reporting_schema_id)
     # reporting_schema = (await session.exec(auth_query)).first()
     # _ = await authenticate(info, reporting_schema.project_id)
 
     if commit_id:
-        query = select(models_task.Task).where(models_task.TaskCommitLink.commit_id == commit_id)
+        members = models_commit.Commit.snapshot(models_task.TaskCommitLink.task_id, commit_id)
+        query = (
+            select(models_task.Task, Version.data)
+            .join(members, models_task.Task.id == members.c.member_id)
+            .outerjoin(Version, Version.id == members.c.version_id)
+            .execution_options(**INCLUDE_REMOVED)
+        )
+        if reporting_schema_id:
+            query = query.where(models_task.Task.reporting_schema_id == reporting_schema_id)
     elif not reporting_schema_id:
         query = select(models_task.Task)
     else:
         query = select(models_task.Task).where(models_task.Task.reporting_schema_id == reporting_schema_id)
 
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_task.Task, path)
 
     if filters:
         query = filter_model_query(models_task.Task, filters, query)
-    tasks = await session.exec(query)
-    return tasks.all()
+    return query
 
 
+@retry_on_conflict
 async def add_task_mutation(
     info: Info,
     reporting_schema_id: str,
@@ -152,19 +230,7 @@ async def add_task_mutation(
     if not schema_part:
         raise DatabaseItemNotFound(f"{item.task_type} with id: {item.task_id} was not found")
 
-    assignee_email = ""
-    if assignee.type == AssigneeType.PROJECT_MEMBER:
-        for member in members:
-            if assignee.id == member.id:
-                assignee.id = member.user_id
-                assignee_email = member.email
-        if not assignee_email:
-            users = await get_users_from_azure(assignee.id)
-            if len(users):
-                assignee_email = users[0].get("email")
-
-    if assignee.type == AssigneeType.PROJECT_GROUP:
-        await authenticate_group(info, group_id=assignee.id, project_id=reporting_schema.project_id)
+    assignee_id, assignee_email = await resolve_assignee(info, members, assignee, reporting_schema.project_id)
 
     # creates a task database class
     task = models_task.Task(
@@ -179,36 +245,23 @@ async def add_task_mutation(
         reporting_schema=reporting_schema,
         author_id=user.claims.get("oid"),
         status=status.value,
-        assignee_id=assignee.id if assignee.type == AssigneeType.PROJECT_MEMBER else None,
-        assigned_group_id=assignee.id if assignee.type == AssigneeType.PROJECT_GROUP else None,
+        assignee_id=assignee_id if assignee.type == AssigneeType.PROJECT_MEMBER else None,
+        assigned_group_id=assignee_id if assignee.type == AssigneeType.PROJECT_GROUP else None,
     )
 
-    # fetches the repository that belongs to the reporting schema
-    repository = (
-        await session.exec(
-            select(models_repository.Repository)
-            .where(models_repository.Repository.reporting_schema_id == reporting_schema.id)
-            .options(selectinload(models_repository.Repository.commits))
-            .options(selectinload(models_repository.Repository.reporting_schema))
-        )
-    ).first()
+    # fetches the head commit of the repository that belongs to the reporting schema
+    head_commit = await models_repository.Repository.get_head_commit(session, reporting_schema.id)
 
-    head_commit = (
-        await session.exec(
-            select(models_commit.Commit)
-            .where(models_commit.Commit.id == repository.head.id)
-            .options(selectinload(models_commit.Commit.schema_categories))
-            .options(selectinload(models_commit.Commit.schema_elements))
-            .options(selectinload(models_commit.Commit.tasks))
-        )
-    ).first()
-
-    commit = models_commit.Commit.copy_from_parent(head_commit, author_id=user.claims.get("oid"))
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
     commit.short_id = commit.id[:8]
-    commit.tasks.append(task)
 
     session.add(commit)
     session.add(task)
+    await session.flush()
+    session.add(commit.record_task(task.id, ChangeType.ADDED))
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
 
     await session.commit()
 
@@ -221,12 +274,13 @@ async def add_task_mutation(
     await session.refresh(commit)
     await session.refresh(task)
     query = select(models_task.Task).where(models_task.Task.reporting_schema == reporting_schema)
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_task.Task)
     await session.exec(query)
 
     return task
 
 
+@retry_on_conflict
 async def update_task_mutation(
     info: Info,
     id: str,
@@ -251,28 +305,10 @@ async def update_task_mutation(
 
     members = await authenticate(info, reporting_schema.project_id)
 
-    repository = (
-        await session.exec(
-            select(models_repository.Repository)
-            .where(models_repository.Repository.reporting_schema_id == reporting_schema.id)
-            .options(selectinload(models_repository.Repository.commits))
-            .options(selectinload(models_repository.Repository.reporting_schema))
-        )
-    ).first()
-
-    head_commit = (
-        await session.exec(
-            select(models_commit.Commit)
-            .where(models_commit.Commit.id == repository.head.id)
-            .options(selectinload(models_commit.Commit.schema_categories))
-            .options(selectinload(models_commit.Commit.schema_elements))
-            .options(selectinload(models_commit.Commit.tasks))
-        )
-    ).first()
+    head_commit = await models_repository.Repository.get_head_commit(session, reporting_schema.id)
 
-    commit = models_commit.Commit.copy_from_parent(head_commit, author_id=user.claims.get("oid"))
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
     commit.short_id = commit.id[:8]
-    commit.tasks.remove(task)
 
     if item:
         schema_part = await session.get(
@@ -282,16 +318,11 @@ async def update_task_mutation(
     else:
         schema_part = None
 
-    assignee_email = ""
-    if assignee.type == AssigneeType.PROJECT_MEMBER:
-        for member in members:
-            if assignee.id == member.id:
-                assignee.id = member.user_id
-                assignee_email = member.email
-        if not assignee_email:
-            users = await get_users_from_azure(assignee.id)
-            if len(users):
-                assignee_email = users[0].get("email")
+    assignee_id, assignee_email = None, ""
+    if assignee and assignee.type == AssigneeType.PROJECT_MEMBER:
+        assignee_id, assignee_email = await resolve_assignee(info, members, assignee, reporting_schema.project_id)
+    elif assignee:
+        assignee_id = assignee.id
 
     if assigned_group_id:
         await authenticate_group(info, group_id=assigned_group_id, project_id=reporting_schema.project_id)
@@ -305,8 +336,8 @@ async def update_task_mutation(
         "category_id": item.id if item and item.type == TaskItemType.Category else None,
         "category": schema_part if item and item.type == TaskItemType.Category else None,
         "status": status.value if status else None,
-        "assignee_id": assignee.id if assignee and assignee.type == AssigneeType.PROJECT_MEMBER else None,
-        "assigned_group_id": assignee.id if assignee and assignee.type == AssigneeType.PROJECT_GROUP else None,
+        "assignee_id": assignee_id if assignee and assignee.type == AssigneeType.PROJECT_MEMBER else None,
+        "assigned_group_id": assignee_id if assignee and assignee.type == AssigneeType.PROJECT_GROUP else None,
     }
 
     email_type = ""
@@ -321,9 +352,13 @@ async def update_task_mutation(
                 email_type = EmailType.TASK_ASSIGN
                 email_kwargs = {"task": task.name}
 
-    commit.tasks.append(task)
     session.add(commit)
     session.add(task)
+    await session.flush()
+    session.add(commit.record_task(task.id, ChangeType.MODIFIED))
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
 
     await session.commit()
     await session.refresh(commit)
@@ -334,12 +369,13 @@ async def update_task_mutation(
         info.context["background_tasks"].add_task(send_email, assignee_email, email_type, **email_kwargs)
 
     query = select(models_task.Task).where(models_task.Task.id == task.id)
-    query = await graphql_options(info, query)
+    query = graphql_options(info, query, models_task.Task)
 
     await session.exec(query)
     return task
 
 
+@retry_on_conflict
 async def delete_task_mutation(info: Info, id: str) -> str:
     """Delete a Task"""
 
@@ -364,59 +400,39 @@ async def delete_task_mutation(info: Info, id: str) -> str:
 
     _ = await authenticate(info, reporting_schema.project_id)
 
-    repository = (
-        await session.exec(
-            select(models_repository.Repository)
-            .where(models_repository.Repository.reporting_schema_id == reporting_schema.id)
-            .options(selectinload(models_repository.Repository.commits))
-            .options(selectinload(models_repository.Repository.reporting_schema))
-        )
-    ).first()
-
-    head_commit = (
-        await session.exec(
-            select(models_commit.Commit)
-            .where(models_commit.Commit.id == repository.head.id)
-            .options(selectinload(models_commit.Commit.schema_categories))
-            .options(selectinload(models_commit.Commit.schema_elements))
-            .options(selectinload(models_commit.Commit.tasks))
-        )
-    ).first()
+    head_commit = await models_repository.Repository.get_head_commit(session, reporting_schema.id)
 
-    commit = models_commit.Commit.copy_from_parent(head_commit, author_id=user.claims.get("oid"))
+    commit = await models_commit.Commit.amend_or_copy(session, head_commit, author_id=user.claims.get("oid"))
     commit.short_id = commit.id[:8]
-    commit.tasks.remove(task)
     session.add(commit)
-
-    await session.commit()
-    await session.refresh(commit)
-
-    await session.delete(task)
+    await remove_members(session, commit, tasks=[task])
+    await models_repository.Repository.move_head(session, commit)
+    await commit.write_versions(session)
+    await commit.write_checkpoint(session)
     await session.commit()
     return id
 
 
-async def graphql_options(info, query):
+async def resolve_assignee(info: Info, members, assignee: GraphQLAssignee, project_id: str) -> tuple[str, str]:
     """
-    Optionally "select IN" loads the needed collections of a
-    Schema Element based on the request provided in the info
-
-    Args:
-        info (Info): request information
-        query: current query provided
+    Resolves the user id of an assigned project member and checks that an assigned project group exists.
+    The assignee input is left untouched, so a resolver that is retried resolves it the same way again
 
-    Returns: updated query
+    Returns: id to assign and email of the assigned user, if it could be found
     """
 
-    if task_field := [field for field in info.selected_fields if field.name == "tasks"]:
-        if [field for field in task_field[0].selections if field.name == "comments"]:
-            query = query.options(selectinload(models_task.Task.comments))
-        if [field for field in task_field[0].selections if field.name == "commits"]:
-            query = query.options(selectinload(models_task.Task.commits))
-        if [field for field in task_field[0].selections if field.name == "reportingSchema"]:
-            query = query.options(selectinload(models_task.Task.reporting_schema))
-        if [field for field in task_field[0].selections if field.name == "category"]:
-            query = query.options(selectinload(models_task.Task.category))
-        if [field for field in task_field[0].selections if field.name == "element"]:
-            query = query.options(selectinload(models_task.Task.element))
-    return query
+    assignee_id, assignee_email = assignee.id, ""
+    if assignee.type == AssigneeType.PROJECT_MEMBER:
+        for member in members:
+            if assignee.id == member.id:
+                assignee_id = member.user_id
+                assignee_email = member.email
+        if not assignee_email:
+            users = await get_users_from_azure(assignee_id)
+            if len(users):
+                assignee_email = users[0].get("email")
+
+    if assignee.type == AssigneeType.PROJECT_GROUP:
+        await authenticate_group(info, group_id=assignee.id, project_id=project_id)
+
+    return assignee_id, assignee_email
@@ -10,6 +10,7 @@ from sqlmodel import select
 from strawberry.types import Info
 
 import models.typecode as models_type_code
+from core.loading import get_loader
 
 
 @strawberry.type
@@ -22,18 +23,10 @@ class GraphQLTypeCodeElement:
 
     @strawberry.field
     async def parent_code(self, info: Info) -> str:
-        session = info.context.get("session")
         path = list(filter(None, self.parent_path.split("/")))
-        parent_code = "/"
-        if path:
-            if self.level == 2:
-                parent = await session.get(models_type_code.TypeCodeElement, path[-1])
-                parent_code = f"/{parent.code}"
-            if self.level == 3:
-                parent1 = await session.get(models_type_code.TypeCodeElement, path[0])
-                parent2 = await session.get(models_type_code.TypeCodeElement, path[1])
-                parent_code = f"/{parent1.code}/{parent2.code}"
-        return parent_code
+        # the parents of all elements in the result are loaded together
+        parents = await get_loader(info, models_type_code.TypeCodeElement).load_many(path)
+        return "/" + "/".join(parent.code for parent in parents if parent)
 
 
 async def query_type_code_elements(
@@ -0,0 +1,89 @@
+"""
+Benchmarks rebuilding the members of a commit at different depths of commit history.
+
+Run with: RUN_BENCHMARKS=1 pytest tests/benchmarks -s
+"""
+import os
+import statistics
+import time
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.commit import Commit
+from models.links import ChangeType, ElementCommitLink
+from models.reporting_schema import ReportingSchema
+from models.repository import Repository
+from models.schema_category import SchemaCategory
+from models.schema_element import SchemaElement
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") is None, reason="Set RUN_BENCHMARKS to run benchmarks")
+
+ELEMENTS = 1_000
+ROUNDS = 20
+
+
+async def build_history(session: AsyncSession, depth: int) -> str:
+    """
+    Builds a repository with a root commit adding all elements, followed by `depth` commits modifying one each.
+
+    Returns: id of the last commit
+    """
+
+    reporting_schema = ReportingSchema(name="Benchmark Schema")
+    category = SchemaCategory(name="Benchmark Category", reporting_schema=reporting_schema)
+    repository = Repository(reporting_schema=reporting_schema)
+    elements = [
+        SchemaElement(name=f"Element {i}", schema_category=category, result={}, meta_fields={}) for i in range(ELEMENTS)
+    ]
+    commit = Commit(repository=repository, author_id="benchmark")
+    session.add_all([reporting_schema, category, repository, commit, *elements])
+    await session.flush()
+    session.add_all([commit.record_element(element.id, ChangeType.ADDED) for element in elements])
+
+    for i in range(depth):
+        commit = Commit.copy_from_parent(commit, author_id="benchmark")
+        session.add(commit)
+        await session.flush()
+        session.add(commit.record_element(elements[i % ELEMENTS].id, ChangeType.MODIFIED))
+        await commit.write_checkpoint(session)
+
+    head_id = commit.id
+    await session.commit()
+    return head_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("checkpoints", [True, False])
+@pytest.mark.parametrize("depth", [10, 100, 1_000])
+async def test_snapshot_latency(db, mocker, depth: int, checkpoints: bool):
+    if not checkpoints:
+        mocker.patch.object(settings, "COMMIT_CHECKPOINT_INTERVAL", depth + 2)
+        mocker.patch.object(settings, "COMMIT_CHECKPOINT_SIZE", ELEMENTS + depth + 1)
+
+    async with AsyncSession(db) as session:
+        head_id = await build_history(session, depth)
+        snapshot = Commit.snapshot(ElementCommitLink.schema_element_id, head_id)
+        query = select(func.count()).select_from(snapshot)
+
+        timings = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            members = (await session.exec(query)).one()
+            timings.append(time.perf_counter() - start)
+
+        ancestry = (await session.exec(select(func.count()).select_from(Commit.ancestry(head_id)))).one()
+
+    print(
+        f"\ndepth={depth:>5} checkpoints={checkpoints!s:<5} ancestry={ancestry:>5} "
+        f"median={statistics.median(timings) * 1000:.2f}ms"
+    )
+
+    assert members == ELEMENTS
+    if checkpoints:
+        assert ancestry <= settings.COMMIT_CHECKPOINT_INTERVAL
+    else:
+        assert ancestry == depth + 1
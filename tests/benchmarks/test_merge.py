@@ -0,0 +1,109 @@
+"""
+Benchmarks merging a branch that modified every Schema Element of a large Reporting Schema.
+
+Run with: RUN_BENCHMARKS=1 pytest tests/benchmarks -s
+"""
+import os
+import time
+
+import pytest
+from sqlalchemy import Text, cast, func, insert, literal, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.branch import Branch
+from models.commit import Commit
+from models.links import ChangeType, ElementCommitLink
+from models.reporting_schema import ReportingSchema
+from models.repository import Repository
+from models.schema_category import SchemaCategory
+from models.schema_element import SchemaElement
+from models.version import Version
+from schema.branch import array
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") is None, reason="Set RUN_BENCHMARKS to run benchmarks")
+
+ELEMENTS = 50_000
+CATEGORIES = 100
+
+
+async def build_branch(session: AsyncSession) -> tuple[str, str, str]:
+    """
+    Builds a Reporting Schema with `ELEMENTS` elements added in a root commit, a branch modifying all of them
+    and a commit on the head modifying a single one of them.
+
+    Returns: id of the head commit, id of the branch head commit and id of the element modified on both
+    """
+
+    reporting_schema = ReportingSchema(name="Benchmark Schema")
+    categories = [SchemaCategory(name=f"Category {i}", reporting_schema=reporting_schema) for i in range(CATEGORIES)]
+    repository = Repository(reporting_schema=reporting_schema)
+    root = Commit(repository=repository, author_id="benchmark")
+    session.add_all([reporting_schema, repository, root, *categories])
+    await session.flush()
+
+    elements = [
+        SchemaElement(name=f"Element {i}", schema_category_id=categories[i % CATEGORIES].id, result={}).dict()
+        for i in range(ELEMENTS)
+    ]
+    await session.execute(insert(SchemaElement.__table__), elements)
+    await session.execute(
+        insert(ElementCommitLink.__table__),
+        [root.record_element(element["id"], ChangeType.ADDED).dict() for element in elements],
+    )
+    await root.write_versions(session)
+
+    # the branch stores the modified elements as versions only
+    branch_commit = Commit.copy_from_parent(root, author_id="benchmark")
+    session.add(branch_commit)
+    await session.flush()
+    members = SchemaElement.__table__
+    content = Version.content(members).op("||")(func.jsonb_build_object("quantity", literal(10.0)))
+    content_hash = func.md5(cast(content, Text))
+    await session.execute(insert(Version.__table__).from_select(["id", "data"], select(content_hash, content)))
+    await session.execute(
+        insert(ElementCommitLink.__table__).from_select(
+            ["schema_element_id", "commit_id", "change", "version_id"],
+            select(members.c.id, literal(branch_commit.id), literal(ChangeType.MODIFIED.value), content_hash),
+        )
+    )
+    branch = Branch(name="scenario", head_commit_id=branch_commit.id, repository_id=repository.id)
+
+    head = Commit.copy_from_parent(root, author_id="benchmark")
+    session.add_all([branch, head])
+    await session.flush()
+    await session.execute(update(members).where(members.c.id == elements[0]["id"]).values(quantity=20.0))
+    session.add(head.record_element(elements[0]["id"], ChangeType.MODIFIED))
+    await head.write_versions(session)
+
+    head_id, branch_head_id = head.id, branch_commit.id
+    await session.commit()
+    return head_id, branch_head_id, elements[0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_merge_latency(db):
+    async with AsyncSession(db) as session:
+        head_id, branch_head_id, element_id = await build_branch(session)
+
+        start = time.perf_counter()
+        base_commit_id = await Commit.merge_base(session, head_id, branch_head_id)
+        merge = Commit.merge(ElementCommitLink.schema_element_id, base_commit_id, head_id, branch_head_id)
+        rows = (await session.execute(select(merge))).all()
+        classified = time.perf_counter()
+
+        merged = [row for row in rows if not row.conflict and row.ours_change is None]
+        pairs = select(
+            func.unnest(array([row.member_id for row in merged])).label("member_id"),
+            func.unnest(array([row.version_id for row in merged])).label("version_id"),
+        ).subquery()
+        await Version.write_rows(session, SchemaElement.__table__, pairs)
+        applied = time.perf_counter()
+        await session.rollback()
+
+    print(
+        f"\nelements={ELEMENTS} classify={(classified - start) * 1000:.0f}ms apply={(applied - classified) * 1000:.0f}ms"
+    )
+
+    assert len(rows) == ELEMENTS
+    assert [row.member_id for row in rows if row.conflict] == [element_id]
+    assert len(merged) == ELEMENTS - 1
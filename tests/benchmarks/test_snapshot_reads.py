@@ -0,0 +1,105 @@
+"""
+Benchmarks reading the Schema Elements of a commit compared to reading the current Schema Elements.
+
+Run with: RUN_BENCHMARKS=1 pytest tests/benchmarks -s
+"""
+import os
+import statistics
+import time
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.commit import Commit
+from models.links import ChangeType, ElementCommitLink
+from models.reporting_schema import ReportingSchema
+from models.repository import Repository
+from models.schema_category import SchemaCategory
+from models.schema_element import SchemaElement
+
+pytestmark = pytest.mark.skipif(os.getenv("RUN_BENCHMARKS") is None, reason="Set RUN_BENCHMARKS to run benchmarks")
+
+ELEMENTS = 100_000
+CATEGORIES = 100
+DEPTH = 50
+ROUNDS = 5
+
+
+async def build_schema(session: AsyncSession) -> tuple[str, str]:
+    """
+    Builds a Reporting Schema with `ELEMENTS` elements spread over `CATEGORIES` categories,
+    added in a root commit and followed by `DEPTH` commits modifying one element each.
+    A second Reporting Schema of the same size makes sure reads are scoped to their own schema.
+
+    Returns: id of the Reporting Schema and id of the last commit
+    """
+
+    for _ in range(2):
+        reporting_schema = ReportingSchema(name="Benchmark Schema")
+        categories = [
+            SchemaCategory(name=f"Category {i}", reporting_schema=reporting_schema) for i in range(CATEGORIES)
+        ]
+        repository = Repository(reporting_schema=reporting_schema)
+        commit = Commit(repository=repository, author_id="benchmark")
+        session.add_all([reporting_schema, repository, commit, *categories])
+        await session.flush()
+
+        elements = [
+            SchemaElement(name=f"Element {i}", schema_category_id=categories[i % CATEGORIES].id, result={}).dict()
+            for i in range(ELEMENTS)
+        ]
+        await session.execute(insert(SchemaElement.__table__), elements)
+        await session.execute(
+            insert(ElementCommitLink.__table__),
+            [commit.record_element(element["id"], ChangeType.ADDED).dict() for element in elements],
+        )
+
+        for i in range(DEPTH):
+            commit = Commit.copy_from_parent(commit, author_id="benchmark")
+            session.add(commit)
+            await session.flush()
+            session.add(commit.record_element(elements[i]["id"], ChangeType.MODIFIED))
+
+        reporting_schema_id, head_id = reporting_schema.id, commit.id
+        await session.commit()
+
+    return reporting_schema_id, head_id
+
+
+async def measure(session: AsyncSession, query) -> tuple[int, float]:
+    """Returns the number of rows and the median time of running the query"""
+
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        rows = (await session.exec(query)).all()
+        timings.append(time.perf_counter() - start)
+    return len(rows), statistics.median(timings)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_read_latency(db):
+    async with AsyncSession(db) as session:
+        reporting_schema_id, head_id = await build_schema(session)
+
+        members = Commit.snapshot(ElementCommitLink.schema_element_id, head_id)
+        snapshot_query = (
+            select(SchemaElement)
+            .join(members, SchemaElement.id == members.c.member_id)
+            .join(SchemaCategory)
+            .where(SchemaCategory.reporting_schema_id == reporting_schema_id)
+        )
+        category_ids = select(SchemaCategory.id).where(SchemaCategory.reporting_schema_id == reporting_schema_id)
+        current_query = select(SchemaElement).where(col(SchemaElement.schema_category_id).in_(category_ids))
+
+        snapshot_rows, snapshot_time = await measure(session, snapshot_query)
+        current_rows, current_time = await measure(session, current_query)
+
+    print(
+        f"\nelements={ELEMENTS} depth={DEPTH} "
+        f"snapshot={snapshot_time * 1000:.2f}ms current={current_time * 1000:.2f}ms"
+    )
+
+    assert snapshot_rows == current_rows == ELEMENTS
@@ -8,6 +8,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from core.config import settings
 from models.comment import Comment
 from models.commit import Commit
+from models.links import ChangeType
 from models.reporting_schema import ReportingSchema
 from models.repository import Repository
 from models.schema_category import SchemaCategory
@@ -204,12 +205,14 @@ async def commits(db, repositories, schema_categories, schema_elements, tasks) -
             commit = Commit(
                 project_id=f"{i}",
                 repository=repositories[i],
-                schema_elements=[schema_elements[i]],
-                schema_categories=[schema_categories[i]],
-                tasks=[tasks[i]],
+                changed_schema_elements=[schema_elements[i]],
+                changed_schema_categories=[schema_categories[i]],
+                changed_tasks=[tasks[i]],
                 short_id=f"Path {i}",
             )
+            repositories[i].head_commit_id = commit.id
             session.add(commit)
+            session.add(repositories[i])
             commits.append(commit)
         await session.commit()
         [await session.refresh(commit) for commit in commits]
@@ -432,3 +435,37 @@ async def project_exists_mock(httpx_mock, datafix_dir, project_id):
         json=project_mock,
         match_content=content,
     )
+
+
+@pytest.fixture
+async def category_tree(db, reporting_schemas, commits) -> list[str]:
+    """Builds a chain of three categories with elements, committed in the first commit. Returns the category ids"""
+
+    async with AsyncSession(db) as session:
+        root = SchemaCategory(name="Root", path="/", reporting_schema_id=reporting_schemas[0].id)
+        child = SchemaCategory(name="Child", path=f"/{root.id}", reporting_schema_id=reporting_schemas[0].id)
+        leaf = SchemaCategory(name="Leaf", path=f"/{root.id}/{child.id}", reporting_schema_id=reporting_schemas[0].id)
+        elements = [
+            SchemaElement(name="Root Element", quantity=2, unit="m2", schema_category_id=root.id),
+            SchemaElement(name="Child Element", quantity=3, unit="m2", schema_category_id=child.id),
+            SchemaElement(name="Child Volume", quantity=4, unit="m3", schema_category_id=child.id),
+            SchemaElement(name="Leaf Element", quantity=5, unit="m2", schema_category_id=leaf.id),
+        ]
+        session.add_all([root, child, leaf])
+        await session.flush()
+        session.add_all(elements)
+        await session.flush()
+
+        commit = await session.get(Commit, commits[0].id)
+        for category in (root, child, leaf):
+            session.add(commit.record_category(category.id, ChangeType.ADDED))
+        for element in elements:
+            session.add(commit.record_element(element.id, ChangeType.ADDED))
+        await commit.write_versions(session)
+
+        # the leaf element changes after the commit
+        elements[-1].quantity = 50
+        category_ids = [root.id, child.id, leaf.id]
+        await session.commit()
+
+    yield category_ids
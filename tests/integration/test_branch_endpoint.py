@@ -0,0 +1,267 @@
+from typing import Callable
+
+import pytest
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.commit import Commit
+from models.repository import Repository
+from models.schema_element import SchemaElement
+
+
+async def add_branch(client: AsyncClient, get_response: Callable, reporting_schema_id: str, name: str) -> dict:
+    mutation = """
+        mutation($reportingSchemaId: String!, $name: String!) {
+            addBranch(reportingSchemaId: $reportingSchemaId, name: $name) {
+                id
+                name
+                headCommitId
+            }
+        }
+    """
+    data = await get_response(client, mutation, variables={"reportingSchemaId": reporting_schema_id, "name": name})
+    return data["addBranch"]
+
+
+async def apply_changeset(
+    client: AsyncClient, get_response: Callable, reporting_schema_id: str, changeset: dict, branch: str = None
+) -> dict:
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!, $branch: String) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset, branch: $branch) {
+                commitId
+            }
+        }
+    """
+    variables = {"reportingSchemaId": reporting_schema_id, "changeset": changeset, "branch": branch}
+    return (await get_response(client, mutation, variables=variables))["applyChangeset"]
+
+
+async def merge_branch(client: AsyncClient, get_response: Callable, reporting_schema_id: str, branch: str) -> dict:
+    mutation = """
+        mutation($reportingSchemaId: String!, $branch: String!) {
+            mergeBranch(reportingSchemaId: $reportingSchemaId, branch: $branch) {
+                baseCommitId
+                commitId
+                conflicts {
+                    memberType
+                    memberId
+                    ours
+                    theirs
+                    oursContent
+                    theirsContent
+                }
+            }
+        }
+    """
+    variables = {"reportingSchemaId": reporting_schema_id, "branch": branch}
+    return (await get_response(client, mutation, variables=variables))["mergeBranch"]
+
+
+@pytest.mark.asyncio
+async def test_add_branch(
+    client: AsyncClient,
+    commits,
+    reporting_schemas,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    branch = await add_branch(client, get_response, reporting_schemas[0].id, "scenario")
+
+    query = """
+        query($reportingSchemaId: String!) {
+            branches(reportingSchemaId: $reportingSchemaId) {
+                id
+                name
+                headCommitId
+            }
+        }
+    """
+    data = await get_response(client, query, variables={"reportingSchemaId": reporting_schemas[0].id})
+
+    assert branch == {"id": branch["id"], "name": "scenario", "headCommitId": commits[0].id}
+    assert data["branches"] == [branch]
+
+
+@pytest.mark.asyncio
+async def test_apply_changeset_on_branch(
+    client: AsyncClient,
+    db,
+    commits,
+    reporting_schemas,
+    schema_categories,
+    schema_elements,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    await add_branch(client, get_response, reporting_schemas[0].id, "scenario")
+
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!, $branch: String) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset, branch: $branch) {
+                commitId
+                schemaElements {
+                    id
+                    quantity
+                }
+            }
+        }
+    """
+    variables = {
+        "reportingSchemaId": reporting_schemas[0].id,
+        "changeset": {"updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 10}]},
+        "branch": "scenario",
+    }
+    changeset = (await get_response(client, mutation, variables=variables))["applyChangeset"]
+
+    query = """
+        query($reportingSchemaId: String!, $schemaCategoryIds: [String!]!, $commitId: String) {
+            commit(reportingSchemaId: $reportingSchemaId, ref: "scenario") {
+                id
+                parentId
+            }
+            schemaElements(schemaCategoryIds: $schemaCategoryIds, commitId: $commitId) {
+                id
+                quantity
+            }
+        }
+    """
+    data = await get_response(
+        client,
+        query,
+        variables={
+            "reportingSchemaId": reporting_schemas[0].id,
+            "schemaCategoryIds": [schema_categories[0].id],
+            "commitId": changeset["commitId"],
+        },
+    )
+
+    async with AsyncSession(db) as session:
+        element = await session.get(SchemaElement, schema_elements[0].id)
+        repository = await session.get(Repository, commits[0].repository_id)
+
+    assert changeset["schemaElements"] == [{"id": schema_elements[0].id, "quantity": 10}]
+    assert data["commit"] == {"id": changeset["commitId"], "parentId": commits[0].id}
+    assert data["schemaElements"] == [{"id": schema_elements[0].id, "quantity": 10}]
+    assert element.quantity == schema_elements[0].quantity
+    assert repository.head_commit_id == commits[0].id
+
+
+@pytest.mark.asyncio
+async def test_apply_changeset_on_branch_with_additions(
+    client: AsyncClient,
+    commits,
+    reporting_schemas,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    await add_branch(client, get_response, reporting_schemas[0].id, "scenario")
+
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset, branch: "scenario") {
+                commitId
+            }
+        }
+    """
+    variables = {
+        "reportingSchemaId": reporting_schemas[0].id,
+        "changeset": {"addSchemaCategories": [{"name": "New Category", "path": "/"}]},
+    }
+
+    response = await client.post(f"{settings.API_STR}/graphql", json={"query": mutation, "variables": variables})
+
+    assert (
+        response.json()["errors"][0]["message"]
+        == "Only updates and deletes of Schema Categories and Schema Elements can be made on a branch"
+    )
+
+
+@pytest.mark.asyncio
+async def test_merge_branch(
+    client: AsyncClient,
+    db,
+    commits,
+    reporting_schemas,
+    schema_categories,
+    schema_elements,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    reporting_schema_id = reporting_schemas[0].id
+    await add_branch(client, get_response, reporting_schema_id, "scenario")
+    await apply_changeset(
+        client,
+        get_response,
+        reporting_schema_id,
+        {"updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 10}]},
+        branch="scenario",
+    )
+    main = await apply_changeset(
+        client,
+        get_response,
+        reporting_schema_id,
+        {"updateSchemaCategories": [{"id": schema_categories[0].id, "name": "Updated Category"}]},
+    )
+
+    merge = await merge_branch(client, get_response, reporting_schema_id, "scenario")
+
+    async with AsyncSession(db) as session:
+        element = await session.get(SchemaElement, schema_elements[0].id)
+        repository = await session.get(Repository, commits[0].repository_id)
+        merge_commit = await session.get(Commit, merge["commitId"])
+
+    assert merge["baseCommitId"] == commits[0].id
+    assert merge["conflicts"] == []
+    assert element.quantity == 10
+    assert repository.head_commit_id == merge["commitId"]
+    assert merge_commit.parent_id == main["commitId"]
+
+
+@pytest.mark.asyncio
+async def test_merge_branch_with_conflicts(
+    client: AsyncClient,
+    db,
+    commits,
+    reporting_schemas,
+    schema_elements,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    reporting_schema_id = reporting_schemas[0].id
+    await add_branch(client, get_response, reporting_schema_id, "scenario")
+    await apply_changeset(
+        client,
+        get_response,
+        reporting_schema_id,
+        {"updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 10}]},
+        branch="scenario",
+    )
+    main = await apply_changeset(
+        client,
+        get_response,
+        reporting_schema_id,
+        {"updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 20}]},
+    )
+
+    merge = await merge_branch(client, get_response, reporting_schema_id, "scenario")
+
+    async with AsyncSession(db) as session:
+        element = await session.get(SchemaElement, schema_elements[0].id)
+        repository = await session.get(Repository, commits[0].repository_id)
+
+    assert merge["commitId"] is None
+    assert [
+        (conflict["memberType"], conflict["memberId"], conflict["ours"], conflict["theirs"])
+        for conflict in merge["conflicts"]
+    ] == [("SCHEMA_ELEMENT", schema_elements[0].id, "modified", "modified")]
+    assert merge["conflicts"][0]["oursContent"]["quantity"] == 20
+    assert merge["conflicts"][0]["theirsContent"]["quantity"] == 10
+    assert element.quantity == 20
+    assert repository.head_commit_id == main["commitId"]
@@ -0,0 +1,197 @@
+import datetime
+from typing import Callable
+
+import pytest
+from httpx import AsyncClient
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.commit import Commit
+from models.links import (
+    CategoryCommitLink,
+    ChangeType,
+    ElementCommitLink,
+    TaskCommitLink,
+)
+from models.task import Task
+
+
+@pytest.mark.asyncio
+async def test_apply_changeset(
+    client: AsyncClient,
+    db,
+    commits,
+    reporting_schemas,
+    schema_categories,
+    schema_elements,
+    tasks,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset) {
+                commitId
+                schemaCategories {
+                    id
+                    name
+                }
+                schemaElements {
+                    id
+                    name
+                    quantity
+                    schemaCategory {
+                        id
+                    }
+                }
+                tasks {
+                    id
+                    name
+                }
+            }
+        }
+    """
+    variables = {
+        "reportingSchemaId": reporting_schemas[0].id,
+        "changeset": {
+            "addSchemaCategories": [{"id": "new-category", "name": "New Category", "path": "/"}],
+            "updateSchemaCategories": [{"id": schema_categories[0].id, "name": "Updated Category"}],
+            "addSchemaElements": [
+                {
+                    "id": "new-element",
+                    "schemaCategoryId": "new-category",
+                    "name": "New Element",
+                    "quantity": 2,
+                    "unit": "M2",
+                    "description": "",
+                }
+            ],
+            "updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 10}],
+            "addTasks": [
+                {
+                    "name": "New Task",
+                    "dueDate": datetime.date.today().strftime("%Y-%m-%d"),
+                    "item": {"id": "new-element", "type": "Element"},
+                    "description": "do it",
+                    "status": "PENDING",
+                }
+            ],
+            "deleteTasks": [tasks[0].id],
+        },
+    }
+
+    data = await get_response(client, mutation, variables=variables)
+    changeset = data["applyChangeset"]
+
+    assert sorted(changeset["schemaCategories"], key=lambda category: category["name"]) == [
+        {"id": "new-category", "name": "New Category"},
+        {"id": schema_categories[0].id, "name": "Updated Category"},
+    ]
+    assert sorted(changeset["schemaElements"], key=lambda element: element["name"]) == [
+        {"id": "new-element", "name": "New Element", "quantity": 2, "schemaCategory": {"id": "new-category"}},
+        {
+            "id": schema_elements[0].id,
+            "name": schema_elements[0].name,
+            "quantity": 10,
+            "schemaCategory": {"id": schema_categories[0].id},
+        },
+    ]
+    assert [task["name"] for task in changeset["tasks"]] == ["New Task"]
+
+    async with AsyncSession(db) as session:
+        commit = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).one()
+        category_links = (
+            await session.exec(select(CategoryCommitLink).where(CategoryCommitLink.commit_id == commit.id))
+        ).all()
+        element_links = (
+            await session.exec(select(ElementCommitLink).where(ElementCommitLink.commit_id == commit.id))
+        ).all()
+        task_links = (await session.exec(select(TaskCommitLink).where(TaskCommitLink.commit_id == commit.id))).all()
+        remaining_tasks = (
+            await session.exec(select(Task).where(Task.reporting_schema_id == reporting_schemas[0].id))
+        ).all()
+
+    assert commit.id == changeset["commitId"]
+    assert {(link.schema_category_id, link.change) for link in category_links} == {
+        ("new-category", ChangeType.ADDED.value),
+        (schema_categories[0].id, ChangeType.MODIFIED.value),
+    }
+    assert {(link.schema_element_id, link.change) for link in element_links} == {
+        ("new-element", ChangeType.ADDED.value),
+        (schema_elements[0].id, ChangeType.MODIFIED.value),
+    }
+    assert [(link.task_id, link.change) for link in task_links] == [
+        (changeset["tasks"][0]["id"], ChangeType.ADDED.value)
+    ]
+    assert [task.name for task in remaining_tasks] == ["New Task"]
+
+
+@pytest.mark.asyncio
+async def test_apply_changeset_outside_reporting_schema(
+    client: AsyncClient,
+    db,
+    commits,
+    reporting_schemas,
+    schema_elements,
+    project_exists_mock,
+    member_mocker,
+):
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset) {
+                commitId
+            }
+        }
+    """
+    variables = {
+        "reportingSchemaId": reporting_schemas[0].id,
+        "changeset": {"updateSchemaElements": [{"id": schema_elements[1].id, "quantity": 10}]},
+    }
+
+    response = await client.post(f"{settings.API_STR}/graphql", json={"query": mutation, "variables": variables})
+
+    assert response.json()["errors"][0]["message"] == f"Could not find SchemaElement with ids: {schema_elements[1].id}"
+
+    async with AsyncSession(db) as session:
+        children = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).all()
+    assert children == []
+
+
+@pytest.mark.asyncio
+async def test_apply_changeset_with_taken_ids(
+    client: AsyncClient,
+    db,
+    commits,
+    reporting_schemas,
+    schema_categories,
+    project_exists_mock,
+    member_mocker,
+):
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset) {
+                commitId
+            }
+        }
+    """
+
+    for categories, message in (
+        (
+            [{"id": "new-category", "name": "First"}, {"id": "new-category", "name": "Second"}],
+            "SchemaCategory ids are given more than once: new-category",
+        ),
+        (
+            [{"id": schema_categories[0].id, "name": "Taken"}],
+            f"SchemaCategory ids are already taken: {schema_categories[0].id}",
+        ),
+    ):
+        variables = {"reportingSchemaId": reporting_schemas[0].id, "changeset": {"addSchemaCategories": categories}}
+        response = await client.post(f"{settings.API_STR}/graphql", json={"query": mutation, "variables": variables})
+
+        assert response.json()["errors"][0]["message"] == message
+
+    async with AsyncSession(db) as session:
+        children = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).all()
+    assert children == []
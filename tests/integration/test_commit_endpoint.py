@@ -1,10 +1,19 @@
+import datetime
 from typing import Callable
 
 import pytest
 from httpx import AsyncClient
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.config import settings
 from core.federation import GraphQLProjectMember
+from models.commit import Commit
+from models.links import ChangeType, ElementCommitLink, TaskCommitLink
+from models.repository import Repository
+from models.schema_category import SchemaCategory
+from models.schema_element import SchemaElement
+from models.tag import Tag
 
 
 @pytest.mark.asyncio
@@ -35,3 +44,597 @@ async def test_get_commits(
             "added": commits[1].added.strftime("%Y-%m-%d"),
         }
     ]
+
+
+@pytest.mark.asyncio
+async def test_commit_checkpoint(
+    client: AsyncClient,
+    db,
+    mocker,
+    commits,
+    schema_categories,
+    schema_elements,
+    tasks,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mocker.patch.object(settings, "COMMIT_CHECKPOINT_INTERVAL", 3)
+
+    mutation = """
+        mutation($id: String!, $name: String!) {
+            updateSchemaCategory(id: $id, name: $name) {
+                id
+            }
+        }
+    """
+    for name in ("First", "Second"):
+        await get_response(client, mutation, variables={"id": schema_categories[0].id, "name": name})
+
+    async with AsyncSession(db) as session:
+        first = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).one()
+        second = (await session.exec(select(Commit).where(Commit.parent_id == first.id))).one()
+        element_links = (
+            await session.exec(select(ElementCommitLink).where(ElementCommitLink.commit_id == second.id))
+        ).all()
+        task_links = (await session.exec(select(TaskCommitLink).where(TaskCommitLink.commit_id == second.id))).all()
+        ancestry = (await session.exec(select(Commit.ancestry(second.id).c.id))).all()
+
+    assert not first.checkpoint
+    assert second.checkpoint
+    assert [(link.schema_element_id, link.change) for link in element_links] == [
+        (schema_elements[0].id, ChangeType.UNCHANGED.value)
+    ]
+    assert [(link.task_id, link.change) for link in task_links] == [(tasks[0].id, ChangeType.UNCHANGED.value)]
+    assert ancestry == [second.id]
+
+    query = """
+        query ($reportingSchemaId: String!, $commitId: String) {
+            schemaCategories(reportingSchemaId: $reportingSchemaId, commitId: $commitId) {
+                id
+            }
+        }
+    """
+    variables = {"reportingSchemaId": schema_categories[0].reporting_schema_id, "commitId": second.id}
+    data = await get_response(client, query, variables=variables)
+    assert data["schemaCategories"] == [{"id": schema_categories[0].id}]
+
+
+@pytest.mark.asyncio
+async def test_get_members_of_commit_in_other_reporting_schema(
+    client: AsyncClient,
+    commits,
+    reporting_schemas,
+    schema_categories,
+    tasks,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($reportingSchemaId: String!, $schemaCategoryIds: [String!]!, $commitId: String) {
+            schemaCategories(reportingSchemaId: $reportingSchemaId, commitId: $commitId) {
+                id
+            }
+            schemaElements(schemaCategoryIds: $schemaCategoryIds, commitId: $commitId) {
+                id
+            }
+            tasks(reportingSchemaId: $reportingSchemaId, commitId: $commitId) {
+                id
+            }
+        }
+    """
+    variables = {
+        "reportingSchemaId": reporting_schemas[1].id,
+        "schemaCategoryIds": [schema_categories[1].id],
+        "commitId": commits[0].id,
+    }
+
+    data = await get_response(client, query, variables=variables)
+
+    assert data == {"schemaCategories": [], "schemaElements": [], "tasks": []}
+
+
+@pytest.mark.asyncio
+async def test_repository_head(
+    client: AsyncClient,
+    db,
+    commits,
+    repositories,
+    schema_categories,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mutation = """
+        mutation($id: String!, $name: String!) {
+            updateSchemaCategory(id: $id, name: $name) {
+                id
+            }
+        }
+    """
+    heads = []
+    for name in ("First", "Second"):
+        await get_response(client, mutation, variables={"id": schema_categories[0].id, "name": name})
+        async with AsyncSession(db) as session:
+            heads.append(await Repository.get_head_commit(session, repositories[0].reporting_schema_id))
+
+    assert heads[0].parent_id == commits[0].id
+    assert heads[1].parent_id == heads[0].id
+
+
+@pytest.fixture
+def concurrent_editor(db, mocker):
+    """Commits on top of the head right after a mutation has read it, for the given number of times"""
+
+    get_head_commit = Repository.get_head_commit
+    concurrent_commits = []
+
+    def _concurrent_editor(times: int):
+        async def get_stale_head_commit(session, reporting_schema_id):
+            head = await get_head_commit(session, reporting_schema_id)
+            if len(concurrent_commits) < times:
+                async with AsyncSession(db) as other_session:
+                    commit = Commit.copy_from_parent(head, author_id="someid1")
+                    concurrent_commits.append(commit.id)
+                    other_session.add(commit)
+                    await Repository.move_head(other_session, commit)
+                    await other_session.commit()
+            return head
+
+        mocker.patch.object(Repository, "get_head_commit", side_effect=get_stale_head_commit)
+        return concurrent_commits
+
+    return _concurrent_editor
+
+
+@pytest.mark.asyncio
+async def test_commit_conflict_retry(
+    client: AsyncClient,
+    db,
+    commits,
+    repositories,
+    schema_categories,
+    project_exists_mock,
+    member_mocker,
+    concurrent_editor,
+    get_response: Callable,
+):
+    concurrent_commits = concurrent_editor(times=1)
+
+    mutation = """
+        mutation($id: String!, $name: String!) {
+            updateSchemaCategory(id: $id, name: $name) {
+                name
+            }
+        }
+    """
+    data = await get_response(client, mutation, variables={"id": schema_categories[0].id, "name": "Updated"})
+    assert data["updateSchemaCategory"] == {"name": "Updated"}
+
+    async with AsyncSession(db) as session:
+        children = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).all()
+        head = (
+            await session.exec(
+                select(Commit)
+                .join(Repository, Repository.head_commit_id == Commit.id)
+                .where(Repository.id == repositories[0].id)
+            )
+        ).one()
+
+    assert [child.id for child in children] == concurrent_commits
+    assert head.parent_id == concurrent_commits[0]
+
+
+@pytest.mark.asyncio
+async def test_commit_conflict(
+    client: AsyncClient,
+    db,
+    commits,
+    schema_categories,
+    project_exists_mock,
+    member_mocker,
+    concurrent_editor,
+):
+    concurrent_commits = concurrent_editor(times=settings.COMMIT_CONFLICT_RETRIES + 1)
+
+    mutation = """
+        mutation($id: String!, $name: String!) {
+            updateSchemaCategory(id: $id, name: $name) {
+                name
+            }
+        }
+    """
+    response = await client.post(
+        f"{settings.API_STR}/graphql",
+        json={"query": mutation, "variables": {"id": schema_categories[0].id, "name": "Updated"}},
+    )
+    error = response.json()["errors"][0]
+
+    assert error["extensions"] == {"code": "COMMIT_CONFLICT"}
+    assert len(concurrent_commits) == settings.COMMIT_CONFLICT_RETRIES + 1
+
+    async with AsyncSession(db) as session:
+        category = await session.get(SchemaCategory, schema_categories[0].id)
+    assert category.name == schema_categories[0].name
+
+
+@pytest.mark.asyncio
+async def test_commit_diff(
+    client: AsyncClient,
+    db,
+    mocker,
+    commits,
+    reporting_schemas,
+    repositories,
+    schema_categories,
+    schema_elements,
+    tasks,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    # the changeset commit becomes a checkpoint, linking unchanged members as well
+    mocker.patch.object(settings, "COMMIT_CHECKPOINT_INTERVAL", 2)
+
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset) {
+                commitId
+            }
+        }
+    """
+    changeset = {
+        "updateSchemaCategories": [{"id": schema_categories[0].id, "name": "Updated Category"}],
+        "addSchemaElements": [
+            {
+                "id": "new-element",
+                "schemaCategoryId": schema_categories[0].id,
+                "name": "New Element",
+                "quantity": 2,
+                "unit": "M2",
+                "description": "",
+            }
+        ],
+    }
+    data = await get_response(
+        client, mutation, variables={"reportingSchemaId": reporting_schemas[0].id, "changeset": changeset}
+    )
+    head_id = data["applyChangeset"]["commitId"]
+
+    query = """
+        query($fromCommitId: String!, $toCommitId: String!) {
+            commitDiff(fromCommitId: $fromCommitId, toCommitId: $toCommitId) {
+                addedSchemaCategories { id }
+                removedSchemaCategories { id }
+                modifiedSchemaCategories { id name }
+                addedSchemaElements { id schemaCategory { id } }
+                removedSchemaElements { id }
+                modifiedSchemaElements { id }
+                addedTasks { id }
+                removedTasks { id }
+                modifiedTasks { id }
+            }
+        }
+    """
+    data = await get_response(client, query, variables={"fromCommitId": commits[0].id, "toCommitId": head_id})
+    assert data["commitDiff"] == {
+        "addedSchemaCategories": [],
+        "removedSchemaCategories": [],
+        "modifiedSchemaCategories": [{"id": schema_categories[0].id, "name": "Updated Category"}],
+        "addedSchemaElements": [{"id": "new-element", "schemaCategory": {"id": schema_categories[0].id}}],
+        "removedSchemaElements": [],
+        "modifiedSchemaElements": [],
+        "addedTasks": [],
+        "removedTasks": [],
+        "modifiedTasks": [],
+    }
+
+    data = await get_response(client, query, variables={"fromCommitId": head_id, "toCommitId": commits[0].id})
+    assert data["commitDiff"]["removedSchemaElements"] == [{"id": "new-element"}]
+    assert data["commitDiff"]["modifiedSchemaCategories"] == [
+        {"id": schema_categories[0].id, "name": "Updated Category"}
+    ]
+    assert data["commitDiff"]["addedSchemaElements"] == []
+
+    response = await client.post(
+        f"{settings.API_STR}/graphql",
+        json={"query": query, "variables": {"fromCommitId": commits[0].id, "toCommitId": commits[1].id}},
+    )
+    assert response.json()["errors"][0]["message"] == (
+        f"Could not find Commit with id: {commits[1].id} in the repository of {commits[0].id}"
+    )
+
+
+@pytest.fixture
+async def history(db, commits, repositories) -> list[str]:
+    """Builds 3 commits on top of the first commit, a day apart. Returns the commit ids, oldest first"""
+
+    start = datetime.date.today() - datetime.timedelta(days=3)
+    async with AsyncSession(db) as session:
+        commit = await session.get(Commit, commits[0].id)
+        commit.added = start
+        history = [commit]
+        for i in range(1, 4):
+            commit = Commit.copy_from_parent(history[-1], author_id="author")
+            commit.added = start + datetime.timedelta(days=i)
+            session.add(commit)
+            history.append(commit)
+        session.add(Tag(name="Release 1.0", commit_id=history[2].id))
+        repository = await session.get(Repository, repositories[0].id)
+        repository.head_commit_id = history[-1].id
+        commit_ids = [commit.id for commit in history]
+        await session.commit()
+
+    yield commit_ids
+
+
+@pytest.mark.asyncio
+async def test_get_commits_paginated(
+    client: AsyncClient, history, reporting_schemas, project_exists_mock, member_mocker, get_response: Callable
+):
+    query = """
+        query ($reportingSchemaId: String!, $after: String) {
+            commits(reportingSchemaId: $reportingSchemaId, first: 2, after: $after) {
+                id
+            }
+        }
+    """
+    variables = {"reportingSchemaId": reporting_schemas[0].id}
+
+    data = await get_response(client, query, variables=variables)
+    assert [commit["id"] for commit in data["commits"]] == [history[3], history[2]]
+
+    data = await get_response(client, query, variables={**variables, "after": history[2]})
+    assert [commit["id"] for commit in data["commits"]] == [history[1], history[0]]
+
+    data = await get_response(client, query, variables={**variables, "after": history[0]})
+    assert data["commits"] == []
+
+
+@pytest.mark.asyncio
+async def test_get_commits_of_one_day(
+    client: AsyncClient,
+    commits,
+    reporting_schemas,
+    schema_elements,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset) {
+                commitId
+            }
+        }
+    """
+    commit_ids = [commits[0].id]
+    for quantity in range(5):
+        changeset = {"updateSchemaElements": [{"id": schema_elements[0].id, "quantity": quantity}]}
+        data = await get_response(
+            client, mutation, variables={"reportingSchemaId": reporting_schemas[0].id, "changeset": changeset}
+        )
+        commit_ids.append(data["applyChangeset"]["commitId"])
+
+    query = """
+        query ($reportingSchemaId: String!, $after: String) {
+            commits(reportingSchemaId: $reportingSchemaId, first: 3, after: $after) {
+                id
+            }
+        }
+    """
+    variables = {"reportingSchemaId": reporting_schemas[0].id}
+    first_page = (await get_response(client, query, variables=variables))["commits"]
+    second_page = (await get_response(client, query, variables={**variables, "after": first_page[-1]["id"]}))["commits"]
+
+    # commits made on the same day still come newest first
+    assert [commit["id"] for commit in [*first_page, *second_page]] == commit_ids[::-1]
+
+
+@pytest.mark.asyncio
+async def test_get_commits_sorted(
+    client: AsyncClient, history, reporting_schemas, project_exists_mock, member_mocker, get_response: Callable
+):
+    query = """
+        query ($reportingSchemaId: String!, $after: String) {
+            commits(reportingSchemaId: $reportingSchemaId, sortBy: {added: ASC}, first: 3, after: $after) {
+                id
+            }
+        }
+    """
+    variables = {"reportingSchemaId": reporting_schemas[0].id}
+
+    data = await get_response(client, query, variables=variables)
+    assert [commit["id"] for commit in data["commits"]] == history[:3]
+
+    data = await get_response(client, query, variables={**variables, "after": history[2]})
+    assert [commit["id"] for commit in data["commits"]] == [history[3]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "ref, index",
+    [("HEAD", 3), ("HEAD~", 2), ("HEAD~3", 0), ("Release 1.0", 2), ("Release 1.0~2", 0), ("id~1", 0)],
+)
+async def test_get_commit_by_ref(
+    client: AsyncClient,
+    history,
+    reporting_schemas,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+    ref: str,
+    index: int,
+):
+    query = """
+        query ($reportingSchemaId: String!, $ref: String!) {
+            commit(reportingSchemaId: $reportingSchemaId, ref: $ref) {
+                id
+            }
+        }
+    """
+    variables = {"reportingSchemaId": reporting_schemas[0].id, "ref": ref.replace("id", history[1])}
+
+    data = await get_response(client, query, variables=variables)
+    assert data["commit"]["id"] == history[index]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "ref, message",
+    [
+        ("HEAD~4", "Could not find Commit for ref: HEAD~4"),
+        ("Release 2.0", "Could not find Commit for ref: Release 2.0"),
+        ("HEAD~x", "Could not resolve ref: HEAD~x"),
+    ],
+)
+async def test_get_commit_by_unknown_ref(
+    client: AsyncClient, history, reporting_schemas, project_exists_mock, member_mocker, ref: str, message: str
+):
+    query = """
+        query ($reportingSchemaId: String!, $ref: String!) {
+            commit(reportingSchemaId: $reportingSchemaId, ref: $ref) {
+                id
+            }
+        }
+    """
+    variables = {"reportingSchemaId": reporting_schemas[0].id, "ref": ref}
+
+    response = await client.post(f"{settings.API_STR}/graphql", json={"query": query, "variables": variables})
+
+    assert response.json()["errors"][0]["message"] == message
+
+
+@pytest.mark.asyncio
+async def test_revert_to_commit(
+    client: AsyncClient,
+    db,
+    commits,
+    reporting_schemas,
+    repositories,
+    schema_categories,
+    schema_elements,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    changeset_mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset) {
+                commitId
+            }
+        }
+    """
+    target = {"updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 10}]}
+    changeset = {
+        "updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 20}],
+        "addSchemaElements": [
+            {
+                "id": "new-element",
+                "schemaCategoryId": schema_categories[0].id,
+                "name": "New Element",
+                "quantity": 2,
+                "unit": "M2",
+                "description": "",
+            }
+        ],
+    }
+    for variables in (target, changeset):
+        await get_response(
+            client, changeset_mutation, variables={"reportingSchemaId": reporting_schemas[0].id, "changeset": variables}
+        )
+
+    mutation = """
+        mutation($reportingSchemaId: String!, $ref: String!) {
+            revertToCommit(reportingSchemaId: $reportingSchemaId, ref: $ref) {
+                id
+                parentId
+            }
+        }
+    """
+    data = await get_response(
+        client, mutation, variables={"reportingSchemaId": reporting_schemas[0].id, "ref": "HEAD~1"}
+    )
+    revert = data["revertToCommit"]
+
+    async with AsyncSession(db) as session:
+        repository = await session.get(Repository, repositories[0].id)
+        commit = await session.get(Commit, revert["id"])
+        elements = (
+            await session.exec(select(SchemaElement).where(SchemaElement.schema_category_id == schema_categories[0].id))
+        ).all()
+        links = (await session.exec(select(ElementCommitLink).where(ElementCommitLink.commit_id == revert["id"]))).all()
+
+    assert repository.head_commit_id == revert["id"]
+    assert commit.checkpoint
+    assert [(element.id, element.quantity) for element in elements] == [(schema_elements[0].id, 10)]
+    assert [(link.schema_element_id, link.change) for link in links] == [
+        (schema_elements[0].id, ChangeType.MODIFIED.value)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_commit_members(
+    client: AsyncClient,
+    commits,
+    reporting_schemas,
+    schema_categories,
+    schema_elements,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    changeset_mutation = """
+        mutation($reportingSchemaId: String!, $changeset: ChangesetInput!) {
+            applyChangeset(reportingSchemaId: $reportingSchemaId, changeset: $changeset) {
+                commitId
+            }
+        }
+    """
+    for changeset in (
+        {"updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 10}]},
+        {
+            "updateSchemaElements": [{"id": schema_elements[0].id, "quantity": 20}],
+            "addSchemaElements": [
+                {
+                    "id": "new-element",
+                    "schemaCategoryId": schema_categories[0].id,
+                    "name": "New Element",
+                    "quantity": 2,
+                    "unit": "M2",
+                    "description": "",
+                }
+            ],
+        },
+    ):
+        await get_response(
+            client,
+            changeset_mutation,
+            variables={"reportingSchemaId": reporting_schemas[0].id, "changeset": changeset},
+        )
+
+    query = """
+        query ($reportingSchemaId: String!) {
+            head: commit(reportingSchemaId: $reportingSchemaId, ref: "HEAD") { ...members }
+            previous: commit(reportingSchemaId: $reportingSchemaId, ref: "HEAD~1") { ...members }
+            root: commit(reportingSchemaId: $reportingSchemaId, ref: "HEAD~2") { ...members }
+        }
+
+        fragment members on GraphQLCommit {
+            schemaCategories { id }
+            schemaElements { id quantity }
+            tasks { id }
+        }
+    """
+    data = await get_response(client, query, variables={"reportingSchemaId": reporting_schemas[0].id})
+    head, previous, root = data["head"], data["previous"], data["root"]
+
+    # every commit returns its own members with the content they had in it, not only the members it changed
+    assert sorted((element["id"], element["quantity"]) for element in head["schemaElements"]) == sorted(
+        [(schema_elements[0].id, 20), ("new-element", 2)]
+    )
+    assert previous["schemaElements"] == [{"id": schema_elements[0].id, "quantity": 10}]
+    assert [element["id"] for element in root["schemaElements"]] == [schema_elements[0].id]
+    assert head["schemaCategories"] == previous["schemaCategories"] == [{"id": schema_categories[0].id}]
+    assert previous["tasks"] == root["tasks"]
@@ -0,0 +1,49 @@
+from typing import Callable
+
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_get_schema_aggregates(
+    client: AsyncClient,
+    reporting_schemas,
+    commits,
+    category_tree,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($reportingSchemaId: String!, $commitId: String) {
+            schemaAggregates(reportingSchemaId: $reportingSchemaId, commitId: $commitId) {
+                schemaCategoryId
+                unit
+                elementCount
+                quantity
+            }
+        }
+    """
+    root, child, leaf = category_tree
+
+    data = await get_response(client, query, variables={"reportingSchemaId": reporting_schemas[0].id})
+    aggregates = {
+        (aggregate["schemaCategoryId"], aggregate["unit"]): (aggregate["elementCount"], aggregate["quantity"])
+        for aggregate in data["schemaAggregates"]
+    }
+    assert {key: value for key, value in aggregates.items() if key[0] in category_tree} == {
+        (root, "M2"): (3, 55),
+        (root, "M3"): (1, 4),
+        (child, "M2"): (2, 53),
+        (child, "M3"): (1, 4),
+        (leaf, "M2"): (1, 50),
+    }
+
+    variables = {"reportingSchemaId": reporting_schemas[0].id, "commitId": commits[0].id}
+    data = await get_response(client, query, variables=variables)
+    aggregates = {
+        (aggregate["schemaCategoryId"], aggregate["unit"]): (aggregate["elementCount"], aggregate["quantity"])
+        for aggregate in data["schemaAggregates"]
+    }
+    assert aggregates[(root, "M2")] == (3, 10)
+    assert aggregates[(leaf, "M2")] == (1, 5)
@@ -7,6 +7,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.config import settings
 from models.commit import Commit
+from models.links import CategoryCommitLink, ChangeType
 from models.schema_category import SchemaCategory
 
 
@@ -51,6 +52,50 @@ async def test_get_schema_categories(
     }
 
 
+@pytest.mark.asyncio
+async def test_get_schema_categories_nested_selections(
+    client: AsyncClient,
+    schema_categories,
+    schema_elements,
+    reporting_schemas,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($reportingSchemaId: String!){
+            schemaCategories(reportingSchemaId: $reportingSchemaId){
+                id
+                elements {
+                    ...ElementFields
+                }
+            }
+        }
+
+        fragment ElementFields on GraphQLSchemaElement {
+            id
+            schemaCategory {
+                id
+                reportingSchemaId
+            }
+            commits {
+                shortId
+            }
+        }
+    """
+    variables = {"reportingSchemaId": f"{reporting_schemas[0].id}"}
+
+    data = await get_response(client, query, variables=variables)
+    category = [category for category in data["schemaCategories"] if category["id"] == schema_categories[0].id][0]
+    assert category["elements"]
+    for element in category["elements"]:
+        assert element["schemaCategory"] == {
+            "id": schema_categories[0].id,
+            "reportingSchemaId": reporting_schemas[0].id,
+        }
+        assert isinstance(element["commits"], list)
+
+
 @pytest.mark.asyncio
 async def test_get_schema_categories_with_filters(
     client: AsyncClient,
@@ -77,6 +122,48 @@ async def test_get_schema_categories_with_filters(
     assert len(data["schemaCategories"]) == 1
 
 
+@pytest.mark.asyncio
+async def test_get_schema_categories_by_commit(
+    client: AsyncClient,
+    db,
+    schema_categories,
+    reporting_schemas,
+    commits,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mutation = """
+        mutation($id: String!) {
+            updateSchemaCategory(id: $id, name: "Updated Category") {
+                id
+            }
+        }
+    """
+    await get_response(client, mutation, variables={"id": schema_categories[0].id})
+
+    async with AsyncSession(db) as session:
+        head = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).one()
+        links = (await session.exec(select(CategoryCommitLink).where(CategoryCommitLink.commit_id == head.id))).all()
+
+    assert [(link.schema_category_id, link.change) for link in links] == [
+        (schema_categories[0].id, ChangeType.MODIFIED.value)
+    ]
+
+    query = """
+        query ($reportingSchemaId: String!, $commitId: String) {
+            schemaCategories(reportingSchemaId: $reportingSchemaId, commitId: $commitId) {
+                id
+                name
+            }
+        }
+    """
+    for commit_id in (commits[0].id, head.id):
+        variables = {"reportingSchemaId": reporting_schemas[0].id, "commitId": commit_id}
+        data = await get_response(client, query, variables=variables)
+        assert data["schemaCategories"] == [{"id": schema_categories[0].id, "name": "Updated Category"}]
+
+
 @pytest.mark.asyncio
 async def test_create_schema_category(
     client: AsyncClient,
@@ -210,3 +297,50 @@ async def test_delete_schema_category(
 
     assert len(commits_after) != len(commits_before)
     print(commits_after)
+
+
+@pytest.mark.asyncio
+async def test_get_descendants(
+    client: AsyncClient,
+    db,
+    reporting_schemas,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    async with AsyncSession(db) as session:
+        root = SchemaCategory(name="Root", path="/", reporting_schema_id=reporting_schemas[0].id)
+        child = SchemaCategory(name="Child", path=f"/{root.id}", reporting_schema_id=reporting_schemas[0].id)
+        leaf = SchemaCategory(name="Leaf", path=f"/{root.id}/{child.id}", reporting_schema_id=reporting_schemas[0].id)
+        other = SchemaCategory(name="Other", path="/", reporting_schema_id=reporting_schemas[0].id)
+        session.add_all([root, child, leaf, other])
+        ids = {category.name: category.id for category in (root, child, leaf, other)}
+        await session.commit()
+
+    query = """
+        query ($categoryId: String!, $maxDepth: Int) {
+            descendants(categoryId: $categoryId, maxDepth: $maxDepth) {
+                name
+            }
+        }
+    """
+
+    data = await get_response(client, query, variables={"categoryId": ids["Root"]})
+    assert [category["name"] for category in data["descendants"]] == ["Child", "Leaf"]
+
+    data = await get_response(client, query, variables={"categoryId": ids["Root"], "maxDepth": 1})
+    assert [category["name"] for category in data["descendants"]] == ["Child"]
+
+    # moving the child moves the leaf below it along, once its path follows
+    async with AsyncSession(db) as session:
+        for name, path in (("Child", f"/{ids['Other']}"), ("Leaf", f"/{ids['Other']}/{ids['Child']}")):
+            category = await session.get(SchemaCategory, ids[name])
+            category.path = path
+            session.add(category)
+        await session.commit()
+
+    data = await get_response(client, query, variables={"categoryId": ids["Root"]})
+    assert data["descendants"] == []
+
+    data = await get_response(client, query, variables={"categoryId": ids["Other"]})
+    assert [category["name"] for category in data["descendants"]] == ["Child", "Leaf"]
@@ -2,12 +2,18 @@ from typing import Callable
 
 import pytest
 from httpx import AsyncClient
-from sqlmodel import select
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from core.config import settings
 from models.commit import Commit
+from models.links import ChangeType, ElementCommitLink
+from models.repository import Repository
 from models.schema_element import SchemaElement
 from models.source import ProjectSource
+from models.tag import Tag
 from schema.schema_element import Unit
 
 
@@ -44,6 +50,38 @@ async def test_get_schema_elements(
     }
 
 
+@pytest.mark.asyncio
+async def test_get_schema_elements_defers_result(
+    client: AsyncClient, schema_elements, project_exists_mock, member_mocker, get_response: Callable
+):
+    query = """
+        query ($schemaCategoryIds: [String!]!) {
+            schemaElements(schemaCategoryIds: $schemaCategoryIds) {
+                name
+                quantity
+                unit
+            }
+        }
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        data = await get_response(
+            client, query, variables={"schemaCategoryIds": [schema_elements[0].schema_category_id]}
+        )
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert data["schemaElements"] == [{"name": "Schema Element 0", "quantity": 0, "unit": "M2"}]
+    elements_query = [statement for statement in statements if "FROM schemaelement" in statement][0]
+    assert "schemaelement.result" not in elements_query
+    assert "schemaelement.meta_fields" not in elements_query
+
+
 @pytest.mark.asyncio
 async def test_get_schema_elements_with_filters(
     client: AsyncClient, schema_elements, project_exists_mock, member_mocker, get_response: Callable
@@ -65,6 +103,115 @@ async def test_get_schema_elements_with_filters(
     assert len(data["schemaElements"]) == 1
 
 
+@pytest.mark.asyncio
+async def test_get_schema_elements_connection(
+    client: AsyncClient, schema_elements, project_exists_mock, member_mocker, get_response: Callable
+):
+    query = """
+        query ($schemaCategoryIds: [String!]!, $after: String) {
+            schemaElementsConnection(schemaCategoryIds: $schemaCategoryIds, first: 3, after: $after) {
+                totalCount
+                numEdges
+                pageInfo {
+                    hasNextPage
+                    endCursor
+                }
+                edges {
+                    node {
+                        id
+                        schemaCategory {
+                            id
+                        }
+                    }
+                }
+            }
+        }
+    """
+    variables = {"schemaCategoryIds": [element.schema_category_id for element in schema_elements]}
+
+    first = (await get_response(client, query, variables=variables))["schemaElementsConnection"]
+    variables["after"] = first["pageInfo"]["endCursor"]
+    second = (await get_response(client, query, variables=variables))["schemaElementsConnection"]
+
+    ids = [edge["node"]["id"] for page in (first, second) for edge in page["edges"]]
+    assert ids == sorted(element.id for element in schema_elements)
+    assert (first["totalCount"], first["numEdges"], first["pageInfo"]["hasNextPage"]) == (4, 3, True)
+    assert (second["totalCount"], second["numEdges"], second["pageInfo"]["hasNextPage"]) == (4, 1, False)
+
+
+@pytest.mark.asyncio
+async def test_get_schema_elements_connection_sorted(
+    client: AsyncClient, schema_elements, project_exists_mock, member_mocker, get_response: Callable
+):
+    query = """
+        query ($schemaCategoryIds: [String!]!, $after: String) {
+            schemaElementsConnection(
+                schemaCategoryIds: $schemaCategoryIds, sortBy: {quantity: DSC}, first: 3, after: $after
+            ) {
+                pageInfo {
+                    endCursor
+                }
+                edges {
+                    node {
+                        quantity
+                    }
+                }
+            }
+        }
+    """
+    variables = {"schemaCategoryIds": [element.schema_category_id for element in schema_elements]}
+
+    first = (await get_response(client, query, variables=variables))["schemaElementsConnection"]
+    variables["after"] = first["pageInfo"]["endCursor"]
+    second = (await get_response(client, query, variables=variables))["schemaElementsConnection"]
+
+    quantities = [edge["node"]["quantity"] for page in (first, second) for edge in page["edges"]]
+    assert quantities == [3, 2, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_get_schema_elements_by_commit(
+    client: AsyncClient,
+    db,
+    schema_elements,
+    schema_categories,
+    commits,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mutation = """
+        mutation addElement($schemaCategoryId: String!) {
+            addSchemaElement(name: "New Element", schemaCategoryId: $schemaCategoryId, unit: M2, quantity: 1, description: "") {
+                id
+            }
+        }
+    """
+    data = await get_response(client, mutation, variables={"schemaCategoryId": schema_categories[0].id})
+    element_id = data["addSchemaElement"]["id"]
+
+    async with AsyncSession(db) as session:
+        head = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).one()
+        links = (await session.exec(select(ElementCommitLink).where(ElementCommitLink.commit_id == head.id))).all()
+
+    assert [(link.schema_element_id, link.change) for link in links] == [(element_id, ChangeType.ADDED.value)]
+
+    query = """
+        query getElements($schemaCategoryIds: [String!]!, $commitId: String){
+            schemaElements(schemaCategoryIds: $schemaCategoryIds, commitId: $commitId) {
+                id
+            }
+        }
+    """
+    variables = {"schemaCategoryIds": [schema_categories[0].id], "commitId": head.id}
+    data = await get_response(client, query, variables=variables)
+    assert {element["id"] for element in data["schemaElements"]} == {schema_elements[0].id, element_id}
+
+    variables = {"schemaCategoryIds": [schema_categories[0].id], "commitId": commits[0].id}
+    data = await get_response(client, query, variables=variables)
+    assert [element["id"] for element in data["schemaElements"]] == [schema_elements[0].id]
+
+
 @pytest.mark.asyncio
 async def test_create_schema_element_from_source(
     client: AsyncClient,
@@ -313,3 +460,208 @@ async def test_delete_schema_element(
         commits_after = commits_after.all()
 
     assert len(commits_after) != len(commits_before)
+
+
+@pytest.mark.asyncio
+async def test_delete_schema_element_keeps_earlier_commits(
+    client: AsyncClient,
+    db,
+    schema_elements,
+    commits,
+    schema_categories,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mutation = """
+        mutation($id: String!) {
+            deleteSchemaElement(id: $id)
+        }
+    """
+    query = """
+        query getElements($schemaCategoryIds: [String!]!, $commitId: String){
+            schemaElements(schemaCategoryIds: $schemaCategoryIds, commitId: $commitId) {
+                id
+            }
+        }
+    """
+    element = schema_elements[0]
+
+    async with AsyncSession(db) as session:
+        repository = await session.get(Repository, commits[0].repository_id)
+        earlier_commit_id = repository.head_commit_id
+
+    assert await get_response(client, mutation, variables={"id": element.id})
+
+    variables = {"schemaCategoryIds": [element.schema_category_id]}
+    data = await get_response(client, query, variables=variables)
+    assert element.id not in [_element["id"] for _element in data["schemaElements"]]
+
+    # the earlier commit still holds the deleted element
+    data = await get_response(client, query, variables={**variables, "commitId": earlier_commit_id})
+    assert element.id in [_element["id"] for _element in data["schemaElements"]]
+
+    async with AsyncSession(db) as session:
+        await session.refresh(repository)
+        link = await session.get(ElementCommitLink, (element.id, repository.head_commit_id))
+    assert link.change == ChangeType.REMOVED.value
+
+
+@pytest.mark.asyncio
+async def test_get_schema_elements_of_earlier_commit(
+    client: AsyncClient,
+    db,
+    schema_elements,
+    commits,
+    schema_categories,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mutation = """
+        mutation updateElements($elements: [SchemaElementUpdateInput!]!){
+            updateSchemaElements(schemaElements: $elements) {
+                id
+            }
+        }
+    """
+    query = """
+        query getElements($schemaCategoryIds: [String!]!, $commitId: String){
+            schemaElements(schemaCategoryIds: $schemaCategoryIds, commitId: $commitId) {
+                id
+                name
+                quantity
+            }
+        }
+    """
+
+    for quantity in (10.0, 20.0, 10.0):
+        await get_response(
+            client, mutation, variables={"elements": {"id": schema_elements[0].id, "quantity": quantity}}
+        )
+
+    async with AsyncSession(db) as session:
+        parents = dict(
+            (
+                await session.exec(
+                    select(Commit.parent_id, Commit.id).where(Commit.repository_id == commits[0].repository_id)
+                )
+            ).all()
+        )
+        history = [parents[commits[0].id]]
+        while history[-1] in parents:
+            history.append(parents[history[-1]])
+        version_ids = (
+            await session.exec(
+                select(ElementCommitLink.version_id).where(col(ElementCommitLink.commit_id).in_(history))
+            )
+        ).all()
+
+    quantities = []
+    for commit_id in history:
+        data = await get_response(
+            client, query, variables={"schemaCategoryIds": [schema_categories[0].id], "commitId": commit_id}
+        )
+        quantities.append(data["schemaElements"][0]["quantity"])
+
+    assert quantities == [10.0, 20.0, 10.0]
+    assert len(version_ids) == 3
+    assert len(set(version_ids)) == 2
+
+
+@pytest.mark.asyncio
+async def test_update_schema_elements_coalesced(
+    client: AsyncClient,
+    db,
+    mocker,
+    schema_elements,
+    commits,
+    schema_categories,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    mocker.patch.object(settings, "COMMIT_COALESCE_WINDOW_SECONDS", 60)
+
+    mutation = """
+        mutation updateElements($elements: [SchemaElementUpdateInput!]!){
+            updateSchemaElements(schemaElements: $elements) {
+                id
+                quantity
+            }
+        }
+    """
+
+    for quantity in (10.0, 20.0):
+        await get_response(
+            client, mutation, variables={"elements": {"id": schema_elements[0].id, "quantity": quantity}}
+        )
+
+    async with AsyncSession(db) as session:
+        children = (await session.exec(select(Commit).where(Commit.parent_id == commits[0].id))).all()
+        assert len(children) == 1
+        child_id = children[0].id
+        links = (
+            await session.exec(
+                select(ElementCommitLink.schema_element_id, ElementCommitLink.change).where(
+                    ElementCommitLink.commit_id == child_id
+                )
+            )
+        ).all()
+        session.add(Tag(name="Release", commit_id=child_id))
+        await session.commit()
+
+    assert links == [(schema_elements[0].id, ChangeType.MODIFIED.value)]
+
+    # a tagged commit is not amended
+    data = await get_response(client, mutation, variables={"elements": {"id": schema_elements[0].id, "quantity": 30.0}})
+    assert data["updateSchemaElements"] == [{"id": schema_elements[0].id, "quantity": 30.0}]
+
+    async with AsyncSession(db) as session:
+        grandchildren = (await session.exec(select(Commit).where(Commit.parent_id == child_id))).all()
+    assert len(grandchildren) == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_schema_element_references(client: AsyncClient, schema_elements, tasks, get_response: Callable):
+    query = """
+        query ($representations: [_Any!]!) {
+            _entities(representations: $representations) {
+                ... on GraphQLSchemaElement {
+                    id
+                    schemaCategory { name }
+                }
+                ... on GraphQLTask {
+                    id
+                    name
+                }
+            }
+        }
+    """
+    representations = [
+        *[{"__typename": "GraphQLSchemaElement", "id": element.id} for element in schema_elements],
+        *[{"__typename": "GraphQLTask", "id": task.id} for task in tasks],
+        {"__typename": "GraphQLSchemaElement", "id": "missing"},
+    ]
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        data = await get_response(client, query, variables={"representations": representations})
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    # the references to each entity are fetched together, with the selected relationships
+    assert len([statement for statement in statements if "FROM schemaelement" in statement]) == 1
+    assert len([statement for statement in statements if "FROM task" in statement]) == 1
+    assert not [statement for statement in statements if "FROM schemacategory" in statement]
+
+    entities = data["_entities"]
+    assert [entity["id"] for entity in entities[: len(schema_elements)]] == [element.id for element in schema_elements]
+    assert entities[0]["schemaCategory"] == {"name": "Schema Category 0"}
+    assert entities[len(schema_elements)] == {"id": tasks[0].id, "name": "Name 0"}
+    assert entities[-1] is None
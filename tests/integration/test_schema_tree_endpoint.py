@@ -0,0 +1,106 @@
+from typing import Callable
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@pytest.mark.asyncio
+async def test_get_schema_tree(
+    client: AsyncClient,
+    reporting_schemas,
+    commits,
+    category_tree,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($reportingSchemaId: String!, $commitId: String) {
+            schemaTree(reportingSchemaId: $reportingSchemaId, commitId: $commitId) {
+                id
+                depth
+                elements { name quantity }
+                children {
+                    id
+                    depth
+                    elements { name quantity }
+                    children {
+                        id
+                        depth
+                        elements { name quantity }
+                        children { id }
+                    }
+                }
+            }
+        }
+    """
+    root, child, leaf = category_tree
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        data = await get_response(client, query, variables={"reportingSchemaId": reporting_schemas[0].id})
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    # categories and elements are each fetched once, whatever the depth of the tree
+    assert len([statement for statement in statements if "FROM schemacategory" in statement]) == 1
+    assert len([statement for statement in statements if "FROM schemaelement" in statement]) == 1
+
+    (root_node,) = [node for node in data["schemaTree"] if node["id"] == root]
+    assert root_node["depth"] == 0
+    assert root_node["elements"] == [{"name": "Root Element", "quantity": 2}]
+
+    (child_node,) = root_node["children"]
+    assert child_node["id"] == child
+    assert child_node["depth"] == 1
+    assert sorted(element["name"] for element in child_node["elements"]) == ["Child Element", "Child Volume"]
+
+    (leaf_node,) = child_node["children"]
+    assert leaf_node["id"] == leaf
+    assert leaf_node["depth"] == 2
+    assert leaf_node["elements"] == [{"name": "Leaf Element", "quantity": 50}]
+    assert leaf_node["children"] == []
+
+    variables = {"reportingSchemaId": reporting_schemas[0].id, "commitId": commits[0].id}
+    data = await get_response(client, query, variables=variables)
+    (root_node,) = [node for node in data["schemaTree"] if node["id"] == root]
+    assert root_node["children"][0]["children"][0]["elements"] == [{"name": "Leaf Element", "quantity": 5}]
+
+
+@pytest.mark.asyncio
+async def test_get_schema_tree_without_elements(
+    client: AsyncClient,
+    reporting_schemas,
+    category_tree,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($reportingSchemaId: String!) {
+            schemaTree(reportingSchemaId: $reportingSchemaId) {
+                id
+                children { id children { id } }
+            }
+        }
+    """
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        await get_response(client, query, variables={"reportingSchemaId": reporting_schemas[0].id})
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert not [statement for statement in statements if "FROM schemaelement" in statement]
@@ -0,0 +1,91 @@
+from typing import Callable
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+
+@pytest.mark.asyncio
+async def test_search(
+    client: AsyncClient,
+    project_id,
+    category_tree,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($projectId: String!, $text: String!) {
+            search(projectId: $projectId, text: $text) {
+                schemaElements { name schemaCategory { name } }
+                schemaCategories { name }
+                tasks { name }
+            }
+        }
+    """
+
+    data = await get_response(client, query, variables={"projectId": project_id, "text": "volu"})
+    assert data["search"] == {
+        "schemaElements": [{"name": "Child Volume", "schemaCategory": {"name": "Child"}}],
+        "schemaCategories": [],
+        "tasks": [],
+    }
+
+    data = await get_response(client, query, variables={"projectId": project_id, "text": "descr 2"})
+    assert [element["name"] for element in data["search"]["schemaElements"]] == ["Schema Element 2"]
+    assert data["search"]["tasks"] == [{"name": "Name 2"}]
+
+
+@pytest.fixture
+async def trigrams(db):
+    async with db.connect() as connection:
+        installed = (await connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))).first()
+    if not installed:
+        pytest.skip("pg_trgm is not installed")
+
+
+@pytest.mark.asyncio
+async def test_search_misspelled(
+    client: AsyncClient,
+    trigrams,
+    project_id,
+    category_tree,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($projectId: String!, $text: String!) {
+            search(projectId: $projectId, text: $text) {
+                schemaElements { name }
+            }
+        }
+    """
+
+    # names spelled alike match as well
+    for typo in ("Volme", "Volumen"):
+        data = await get_response(client, query, variables={"projectId": project_id, "text": typo})
+        assert [element["name"] for element in data["search"]["schemaElements"]] == ["Child Volume"]
+
+
+@pytest.mark.asyncio
+async def test_search_limit(
+    client: AsyncClient,
+    project_id,
+    category_tree,
+    project_exists_mock,
+    member_mocker,
+    get_response: Callable,
+):
+    query = """
+        query ($projectId: String!, $text: String!, $limit: Int!) {
+            search(projectId: $projectId, text: $text, limit: $limit) {
+                schemaCategories { name }
+            }
+        }
+    """
+
+    data = await get_response(client, query, variables={"projectId": project_id, "text": "category", "limit": 2})
+    categories = data["search"]["schemaCategories"]
+    assert len(categories) == 2
+    assert all(category["name"].startswith("Schema Category") for category in categories)
@@ -4,10 +4,15 @@ from typing import Callable
 import pytest
 from httpx import AsyncClient
 from lcacollect_config.email import EmailType
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from core.config import settings
+from exceptions import CommitConflictError
 from models.commit import Commit
+from models.repository import Repository
 from models.task import Task
 
 
@@ -69,6 +74,54 @@ async def test_get_task_filter(client: AsyncClient, reporting_schemas, tasks, ge
     }
 
 
+@pytest.mark.asyncio
+async def test_get_tasks_items(
+    client: AsyncClient, reporting_schemas, tasks, schema_categories, get_response: Callable
+):
+    query = """
+        query {
+            tasks(reportingSchemaId: "") {
+                id
+                item {
+                    ... on GraphQLSchemaCategory {
+                        id
+                    }
+                }
+            }
+        }
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        data = await get_response(client, query)
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert {task["id"]: task["item"]["id"] for task in data["tasks"]} == {task.id: task.category_id for task in tasks}
+    # the items of all tasks are loaded together
+    assert len([statement for statement in statements if "FROM schemacategory" in statement]) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_connection_invalid_cursor(client: AsyncClient, reporting_schemas, tasks):
+    query = """
+        query ($reportingSchemaId: String!){
+            tasksConnection(reportingSchemaId: $reportingSchemaId, after: "invalid") {
+                totalCount
+            }
+        }
+    """
+    variables = {"reportingSchemaId": f"{reporting_schemas[0].id}"}
+
+    response = await client.post(f"{settings.API_STR}/graphql", json={"query": query, "variables": variables})
+
+    assert response.json()["errors"][0]["message"] == "Invalid cursor: invalid"
+
+
 @pytest.mark.asyncio
 async def test_create_task(
     client: AsyncClient,
@@ -132,6 +185,49 @@ async def test_create_task(
     assert email_mock.mock_calls[0][2] == {"task": "test"}
 
 
+@pytest.mark.asyncio
+async def test_create_task_retried_on_conflict(
+    client: AsyncClient,
+    reporting_schemas,
+    commits,
+    schema_elements,
+    db,
+    member_mocker,
+    get_response: Callable,
+    mocker,
+):
+    mocker.patch("schema.task.send_email")
+    move_head = Repository.move_head.__func__
+    attempts = []
+
+    async def conflicting_move_head(cls, session, commit):
+        attempts.append(commit.id)
+        if len(attempts) == 1:
+            raise CommitConflictError("The head was moved")
+        return await move_head(cls, session, commit)
+
+    mocker.patch.object(Repository, "move_head", classmethod(conflicting_move_head))
+
+    task_item = f"""{{id: "{schema_elements[0].id}", type: Element}}"""
+    assignee = """{id: "580aadba-0758-48dd-a78f-4103aaf15908", type: PROJECT_MEMBER}"""
+    mutation = f"""
+        mutation {{
+            addTask(reportingSchemaId: "{reporting_schemas[0].id}", name: "test", dueDate:
+            "{datetime.date.today().strftime("%Y-%m-%d")}",  item: {task_item}, description: "do it",
+            status: APPROVED, assignee: {assignee}) {{
+                id
+            }}
+        }}
+    """
+    data = await get_response(client, mutation)
+    assert len(attempts) == 2
+
+    # the project member is resolved to the same user on the retry
+    async with AsyncSession(db) as session:
+        task = await session.get(Task, data["addTask"]["id"])
+    assert task.assignee_id == "someid0"
+
+
 @pytest.mark.asyncio
 async def test_create_task_category(
     client: AsyncClient,
@@ -3,6 +3,11 @@ from typing import Callable
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.typecode import TypeCodeElement
 
 
 @pytest.mark.asyncio
@@ -242,3 +247,43 @@ async def test_add_type_code_elements_from_source(
         "parentPath": f'/{data["typeCodeElements"][0]["id"]}',
         "id": data["typeCodeElements"][1]["id"],
     }
+
+
+@pytest.mark.asyncio
+async def test_get_type_code_elements_parent_code(client: AsyncClient, db, is_admin_mock, get_response: Callable):
+    async with AsyncSession(db) as session:
+        level1 = TypeCodeElement(name="Name 1", code="1", level=1, parent_path="/")
+        level2 = TypeCodeElement(name="Name 2", code="12", level=2, parent_path=f"/{level1.id}")
+        level3 = [
+            TypeCodeElement(name=f"Name 3{i}", code=f"12{i}", level=3, parent_path=f"/{level1.id}/{level2.id}")
+            for i in range(5)
+        ]
+        session.add_all([level1, level2, *level3])
+        await session.commit()
+
+    query = """
+        query {
+            typeCodeElements {
+                code
+                parentCode
+            }
+        }
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        data = await get_response(client, query)
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert {element["code"]: element["parentCode"] for element in data["typeCodeElements"]} == {
+        "1": "/",
+        "12": "/1",
+        **{f"12{i}": "/1/12" for i in range(5)},
+    }
+    # the parents of all elements are loaded together
+    assert len(statements) == 2
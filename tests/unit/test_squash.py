@@ -0,0 +1,125 @@
+import datetime
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from logic.squash import squash_repositories
+from models.commit import Commit
+from models.links import ChangeType, ElementCommitLink
+from models.reporting_schema import ReportingSchema
+from models.repository import Repository
+from models.schema_category import SchemaCategory
+from models.schema_element import SchemaElement
+from models.tag import Tag
+
+
+@pytest.fixture()
+async def history(db) -> list[str]:
+    """
+    Builds a repository with the history:
+    root <- 1 <- 2 (a day later) <- 3 (tagged) <- 4 <- 5 (other author) <- 6 (other author, today)
+
+    Returns: ids of the commits, oldest first
+    """
+
+    earlier = datetime.date.today() - datetime.timedelta(days=3)
+    later = earlier + datetime.timedelta(days=1)
+    async with AsyncSession(db) as session:
+        reporting_schema = ReportingSchema(name="Squash Schema")
+        category = SchemaCategory(name="Squash Category", reporting_schema=reporting_schema)
+        repository = Repository(reporting_schema=reporting_schema)
+        elements = [
+            SchemaElement(name=f"Element {i}", schema_category=category, result={}, meta_fields={}) for i in range(2)
+        ]
+        commit = Commit(repository=repository, author_id="author", added=earlier - datetime.timedelta(days=2))
+        session.add_all([reporting_schema, category, repository, commit, *elements])
+        await session.flush()
+        session.add(commit.record_element(elements[0].id, ChangeType.ADDED))
+        commits = [commit]
+
+        changes = [
+            ("author", earlier, elements[1], ChangeType.ADDED),
+            ("author", later, elements[0], ChangeType.MODIFIED),
+            ("author", later, elements[1], ChangeType.REMOVED),
+            ("author", later, elements[0], ChangeType.MODIFIED),
+            ("other", later, elements[0], ChangeType.MODIFIED),
+            ("other", datetime.date.today(), elements[0], ChangeType.MODIFIED),
+        ]
+        for author_id, added, element, change in changes:
+            commit = Commit.copy_from_parent(commits[-1], author_id=author_id)
+            commit.added = added
+            session.add(commit)
+            await session.flush()
+            session.add(commit.record_element(element.id, change))
+            commits.append(commit)
+
+        session.add(Tag(name="v1", commit_id=commits[3].id, author_id="author"))
+        repository.head_commit_id = commits[-1].id
+        commit_ids = [commit.id for commit in commits]
+        await session.commit()
+
+    yield commit_ids
+
+
+async def get_snapshots(session: AsyncSession, commit_ids: list[str]) -> dict[str, set[str]]:
+    return {
+        commit_id: set(
+            (
+                await session.exec(select(Commit.snapshot(ElementCommitLink.schema_element_id, commit_id).c.member_id))
+            ).all()
+        )
+        for commit_id in commit_ids
+    }
+
+
+@pytest.mark.asyncio
+async def test_squash_dry_run(db, history):
+    reports = await squash_repositories(dry_run=True)
+
+    assert [report.runs for report in reports] == [[history[1:4]]]
+    assert reports[0].squashed_commits == 2
+
+    async with AsyncSession(db) as session:
+        commits = (await session.exec(select(func.count()).select_from(Commit))).one()
+    assert commits == len(history)
+
+
+@pytest.mark.asyncio
+async def test_squash(db, history):
+    async with AsyncSession(db) as session:
+        kept = [history[0], *history[3:]]
+        snapshots = await get_snapshots(session, kept)
+
+    reports = await squash_repositories()
+
+    assert [report.runs for report in reports] == [[history[1:4]]]
+
+    async with AsyncSession(db) as session:
+        commits = (await session.exec(select(Commit.id, Commit.parent_id))).all()
+        tag = (await session.exec(select(Tag))).one()
+        changes = (
+            await session.exec(select(ElementCommitLink.change).where(ElementCommitLink.commit_id == history[3]))
+        ).all()
+
+        assert await get_snapshots(session, kept) == snapshots
+
+    assert dict(commits) == {
+        history[0]: None,
+        history[3]: history[0],
+        history[4]: history[3],
+        history[5]: history[4],
+        history[6]: history[5],
+    }
+    assert tag.commit_id == history[3]
+    assert sorted(changes) == sorted([ChangeType.MODIFIED.value, ChangeType.REMOVED.value])
+
+    assert await squash_repositories() == []
+
+
+@pytest.mark.asyncio
+async def test_squash_window(db, history):
+    reports = await squash_repositories(dry_run=True, window=datetime.timedelta(days=0))
+
+    assert [report.runs for report in reports] == [[history[2:4]]]